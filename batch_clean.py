@@ -0,0 +1,205 @@
+"""
+Batch re-cleaning of a transcript folder with a process pool.
+
+Runs `clean_text` over every `.txt` under the transcript folder (skipping hidden
+folders such as `.journal`), e.g. after the cleaning rules changed or for autosaves that
+were never cleaned. Files are cleaned in place, or into a mirror tree with `dest`, and
+always written atomically.
+
+A manifest (`.reclean.json` in the output folder) records, per file, the SHA-256 of its
+content after the last run together with its mtime and size. A file whose mtime and
+size still match is skipped without being read; one whose content hash still matches is
+skipped without being cleaned. The manifest is dropped when `CLEANER_VERSION` or the
+threshold differ from the ones it was made with. Sessions whose journal is unfinished
+(still recording, or waiting for crash recovery) are left alone.
+
+Usage:
+    stats = reclean(transcript_dir, workers=4)
+    print(stats.summary())
+"""
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import os
+import time
+
+import session_journal
+import text_cleaner
+from transcript_writer import write_atomic
+
+MANIFEST_NAME = '.reclean.json'
+
+
+class BatchStats:
+    def __init__(self):
+        self.scanned = 0
+        self.cleaned = 0      # rewritten with new content
+        self.unchanged = 0    # read and hashed or cleaned, nothing to write
+        self.skipped = 0      # mtime and size matched the manifest
+        self.busy = 0         # session still being recorded or recovered
+        self.errors = []      # (path, message)
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+
+    @property
+    def processed(self):
+        return self.cleaned + self.unchanged
+
+    def files_per_second(self):
+        return self.processed / self.seconds if self.seconds else 0.0
+
+    def bytes_per_second(self):
+        return self.bytes_read / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (f"{self.scanned} files: {self.cleaned} cleaned, {self.unchanged} unchanged, "
+                f"{self.skipped} skipped, {self.busy} in use, {len(self.errors)} errors "
+                f"in {self.seconds:.2f}s ({self.files_per_second():.1f} files/s, "
+                f"{self.bytes_per_second() / 1e6:.2f} MB/s)")
+
+
+def transcript_files(transcript_dir):
+    """Every .txt under `transcript_dir`, as paths relative to it, skipping hidden folders."""
+    for root, dirs, files in os.walk(transcript_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if name.endswith('.txt'):
+                yield os.path.relpath(os.path.join(root, name), transcript_dir)
+
+
+def load_manifest(path, threshold):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if (data.get('version') != text_cleaner.CLEANER_VERSION
+            or data.get('threshold') != threshold):
+        return {}
+    return data.get('files', {})
+
+
+def save_manifest(path, files, threshold):
+    write_atomic(path, json.dumps({'version': text_cleaner.CLEANER_VERSION,
+                                   'threshold': threshold, 'files': files}))
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def clean_file(src, dst, threshold, known_hash=None):
+    """Clean `src` into `dst`; runs in a pool worker.
+
+    Returns (status, manifest entry, bytes read, bytes written) where status is
+    'cleaned', 'unchanged' or 'error' (the entry is then the message).
+    """
+    try:
+        with open(src, 'rb') as f:
+            data = f.read()
+        digest = _sha256(data)
+        written = 0
+        if digest == known_hash and os.path.exists(dst):
+            status = 'unchanged'
+        else:
+            cleaned = text_cleaner.clean_text(data.decode('utf-8', 'replace'), threshold)
+            out = cleaned.encode('utf-8')
+            same_file = os.path.abspath(src) == os.path.abspath(dst)
+            if same_file and out == data:
+                status = 'unchanged'
+            else:
+                os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+                write_atomic(dst, cleaned)
+                written = len(out)
+                status = 'cleaned'
+                if same_file:
+                    digest = _sha256(out)
+        st = os.stat(src)
+        return status, {'sha256': digest, 'mtime': st.st_mtime, 'size': st.st_size}, len(data), written
+    except Exception as e:
+        return 'error', f'{type(e).__name__}: {e}', 0, 0
+
+
+def reclean(transcript_dir, dest=None, workers=None, threshold=text_cleaner.NEAR_DUP_THRESHOLD,
+            force=False, dry_run=False, progress=None):
+    """Re-clean every transcript under `transcript_dir` and return a BatchStats.
+
+    `dest` writes the cleaned files to a mirror tree instead of in place. `workers`
+    defaults to the CPU count; 1 cleans in this process. `force` ignores the manifest,
+    `dry_run` only counts the files that would be cleaned. `progress(done, total)` is
+    called as files complete.
+    """
+    stats = BatchStats()
+    t0 = time.perf_counter()
+    out_dir = dest or transcript_dir
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    manifest = {} if force else load_manifest(manifest_path, threshold)
+    busy = {f"{os.path.basename(d)}.txt"
+            for d in session_journal.unfinished_sessions(transcript_dir)}
+
+    rels = list(transcript_files(transcript_dir))
+    jobs = []
+    for rel in rels:
+        stats.scanned += 1
+        if rel in busy:
+            stats.busy += 1
+            continue
+        src = os.path.join(transcript_dir, rel)
+        dst = os.path.join(out_dir, rel)
+        entry = manifest.get(rel)
+        if entry is not None:
+            try:
+                st = os.stat(src)
+            except OSError:
+                continue
+            if ((st.st_mtime, st.st_size) == (entry.get('mtime'), entry.get('size'))
+                    and os.path.exists(dst)):
+                stats.skipped += 1
+                continue
+        jobs.append((rel, src, dst, entry.get('sha256') if entry else None))
+
+    if dry_run:
+        stats.cleaned = len(jobs)
+        stats.seconds = time.perf_counter() - t0
+        return stats
+
+    # files that are gone drop out of the manifest
+    seen = set(rels)
+    manifest = {rel: e for rel, e in manifest.items() if rel in seen}
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers <= 1 or len(jobs) <= 1:
+            results = (clean_file(src, dst, threshold, h) for _rel, src, dst, h in jobs)
+            _collect(jobs, results, manifest, stats, progress)
+        else:
+            chunksize = max(1, min(16, len(jobs) // (workers * 4)))
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = pool.map(clean_file, [j[1] for j in jobs], [j[2] for j in jobs],
+                                   [threshold] * len(jobs), [j[3] for j in jobs],
+                                   chunksize=chunksize)
+                _collect(jobs, results, manifest, stats, progress)
+    finally:
+        # keep what was done, even if the run was interrupted
+        os.makedirs(out_dir, exist_ok=True)
+        save_manifest(manifest_path, manifest, threshold)
+        stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def _collect(jobs, results, manifest, stats, progress):
+    for done, (job, (status, entry, read, written)) in enumerate(zip(jobs, results), 1):
+        rel = job[0]
+        if status == 'error':
+            stats.errors.append((rel, entry))
+            manifest.pop(rel, None)
+        else:
+            manifest[rel] = entry
+            if status == 'cleaned':
+                stats.cleaned += 1
+            else:
+                stats.unchanged += 1
+        stats.bytes_read += read
+        stats.bytes_written += written
+        if progress:
+            progress(done, len(jobs))
@@ -0,0 +1,114 @@
+"""Throughput and recall of session-wide near-duplicate detection in `clean_text`.
+
+Builds a synthetic transcript of N distinct sentences in which a share of sentences are
+re-emitted, lightly revised or cut down to a few of their words, several sentences
+after the original (as Live Captions does). Compares the MinHash/LSH index against an
+exact scan of every earlier sentence; the scan is skipped above --exact-limit sentences.
+
+With --check the run fails (exit status 1) when the index drops fewer sentences than the
+exact scan at any size both ran, i.e. when it misses repeats the scan finds.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+import text_cleaner
+from text_cleaner import SentenceIndex, clean_text
+
+FUNCTION_WORDS = "the a to and of we it that is in for you on this so but with".split()
+# Zipf-ish vocabulary: a few very common words and a long tail
+VOCAB = FUNCTION_WORDS * 20 + [f"word{i}" for i in range(3000)]
+
+
+def make_transcript(n, revise_rate=0.1, seed=7):
+    """Return (text, revisions) with n original sentences plus revised repeats."""
+    rnd = random.Random(seed)
+    originals = []
+    out = []
+    revisions = 0
+    for i in range(n):
+        words = [rnd.choice(VOCAB) for _ in range(rnd.randint(8, 16))] + [f"item{i}"]
+        originals.append(words)
+        out.append(' '.join(words).capitalize() + '.')
+        if i > 10 and rnd.random() < revise_rate:
+            # re-emit a sentence from a few sentences back with one word revised
+            prev = list(originals[i - rnd.randint(2, 10)])
+            if rnd.random() < 0.5:
+                prev[rnd.randrange(len(prev) - 1)] = rnd.choice(VOCAB)
+                prev = prev + [rnd.choice(VOCAB)]
+            else:
+                # only part of it, which shares few of the original's words
+                start = rnd.randrange(len(prev) - 4)
+                prev = prev[start:start + rnd.randint(4, 8)]
+            out.append(' '.join(prev).capitalize() + '.')
+            revisions += 1
+    return ' '.join(out), revisions
+
+
+class _ExactIndex:
+    """Reference: compare against every earlier kept sentence (quadratic)."""
+
+    def __init__(self, *args, **kwargs):
+        self._sets = []
+
+    def add(self, words):
+        self._sets.append(frozenset(words))
+
+    def contains_similar(self, words, threshold):
+        need = threshold * len(words)
+        return any(len(words & s) > need for s in self._sets)
+
+
+def run(text, exact=False):
+    saved = text_cleaner.SentenceIndex
+    if exact:
+        text_cleaner.SentenceIndex = _ExactIndex
+    try:
+        t0 = time.perf_counter()
+        out = clean_text(text)
+        return time.perf_counter() - t0, out
+    finally:
+        text_cleaner.SentenceIndex = saved
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[1_000, 5_000, 10_000, 20_000],
+                    help='original sentences per transcript')
+    ap.add_argument('--exact-limit', type=int, default=10_000,
+                    help='largest size the (quadratic) exact scan is run for')
+    ap.add_argument('--runs', type=int, default=1, help='timings per size; the median is reported')
+    ap.add_argument('--check', action='store_true', help='fail if the index misses repeats')
+    args = ap.parse_args(argv)
+
+    failures = []
+    print(f"{'sentences':>10}  {'lsh s':>8}  {'sent/s':>9}  {'exact s':>8}  {'dropped lsh/exact':>18}")
+    for n in args.sizes:
+        text, revisions = make_transcript(n)
+        total = n + revisions
+        lsh_runs = [run(text) for _ in range(args.runs)]
+        lsh_t = statistics.median(t for t, _out in lsh_runs)
+        dropped_lsh = total - lsh_runs[0][1].count('.')
+        if n <= args.exact_limit:
+            exact_runs = [run(text, exact=True) for _ in range(args.runs)]
+            exact_col = f"{statistics.median(t for t, _out in exact_runs):8.2f}"
+            dropped_exact = total - exact_runs[0][1].count('.')
+            if dropped_lsh < dropped_exact:
+                failures.append(f"{total} sentences: index dropped {dropped_lsh}, "
+                                f"exact scan {dropped_exact}")
+        else:
+            exact_col, dropped_exact = f"{'-':>8}", '-'
+        print(f"{total:>10}  {lsh_t:8.2f}  {total / lsh_t:9.0f}  {exact_col}  "
+              f"{f'{dropped_lsh}/{dropped_exact}':>18}")
+    if args.check:
+        for msg in failures:
+            print(f"FAIL {msg}", file=sys.stderr)
+        if failures:
+            return 1
+        print("index recall matches the exact scan", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""What the live de-dup stage gets from the reader: the last line (extract_tail) vs. deltas.
+
+A synthetic meeting goes through the reader's hand-off and LiveDeduper twice: once as
+`on_change` delivers it (the last line, cut to TAIL_LIMIT characters) and once as
+`on_delta` does (CaptionDeltas against the previous text). Longer `--line-chars` stand
+for faster speech: more text arrives before Live Captions starts a new line.
+
+Reported per mode: characters tokenized per update, the p50/p99 cost of the reader's
+split/delta plus the de-dup, and how the appended transcript compares with the words
+actually spoken - words missing from it and words added (repeated or stale revisions).
+"""
+import argparse
+from difflib import SequenceMatcher
+import sys
+import time
+
+import caption_tokens
+from live_caption_reader import compute_delta, extract_tail
+from live_dedup import LiveDeduper, normalize_snapshot, normalize_token
+
+from benchmarks.streams import synthetic_meeting
+from benchmarks.suite import percentile
+
+
+class CountingTokenizer:
+    """The shared tokenizer, counting the characters it is given."""
+
+    def __init__(self):
+        self.inner = caption_tokens.shared()
+        self.chars = 0
+
+    def tokens(self, text, **kwargs):
+        self.chars += len(text)
+        return self.inner.tokens(text, **kwargs)
+
+
+def spoken_words(stream):
+    """The final words of a stream: each line once it is no longer the last one, then
+    the last line of the last snapshot."""
+    words, final = [], set()
+    for _t, text in stream:
+        for line in text.split('\n')[:-1]:
+            if line not in final:
+                final.add(line)
+                words += normalize_snapshot(line).split()
+    words += normalize_snapshot(stream[-1][1].split('\n')[-1]).split()
+    return words
+
+
+def run(stream, mode):
+    tokenizer = CountingTokenizer()
+    dedup = LiveDeduper(min_interval=0.5, tokenizer=tokenizer)
+    clock = time.perf_counter_ns
+    times, out = [], []
+    prev = last_tail = None
+    for t, text in stream:
+        seg = dedup.poll(now=t)
+        if seg:
+            out += seg.split()
+        t0 = clock()
+        if mode == 'tail':
+            snapshot = extract_tail(text)
+            if not snapshot or snapshot == last_tail:
+                continue
+            last_tail = snapshot
+        else:
+            if text == prev:
+                continue
+            snapshot = compute_delta(prev or '', text)
+            prev = text
+        seg = dedup.process(snapshot, now=t)
+        times.append(clock() - t0)
+        if seg:
+            out += seg.split()
+    seg = dedup.flush()
+    if seg:
+        out += seg.split()
+    return times, tokenizer.chars, out
+
+
+def compare(spoken, shown):
+    a = [normalize_token(w) for w in spoken]
+    b = [normalize_token(w) for w in shown]
+    same = sum(block.size for block in SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks())
+    return len(a) - same, len(b) - same
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--minutes', type=float, default=20)
+    ap.add_argument('--line-chars', type=int, nargs='+', default=[90, 300, 1000])
+    args = ap.parse_args(argv)
+
+    print(f"{'line':>5}  {'mode':<5}  {'updates':>7}  {'chars/upd':>9}  {'p50 us':>7}  {'p99 us':>7}  "
+          f"{'missing':>7}  {'added':>7}  {'spoken':>7}")
+    for line_chars in args.line_chars:
+        stream = synthetic_meeting(args.minutes, line_chars=line_chars)
+        spoken = spoken_words(stream)
+        for mode in ('tail', 'delta'):
+            times, chars, shown = run(stream, mode)
+            missing, added = compare(spoken, shown)
+            times.sort()
+            print(f"{line_chars:>5}  {mode:<5}  {len(times):>7}  {chars / len(times):>9.0f}  "
+                  f"{percentile(times, 50) / 1e3:7.1f}  {percentile(times, 99) / 1e3:7.1f}  "
+                  f"{missing:>7}  {added:>7}  {len(spoken):>7}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Per-update cost of the live overlap matcher as a session grows.
+
+Simulates the Live Captions snapshot stream (the last ~40 words of the running line)
+and times `OverlapEngine.match` once the session already holds N shown words. With the
+linear-time engine the per-update cost should stay flat as N grows; the legacy nested
+loop from the old `on_live_text` is timed alongside it for small N. The traced memory
+of the engine is reported too, and should stop growing once the look-back window fills.
+
+With --check the run fails (exit status 1) when the engine's median cost per update at
+the largest size is more than FLAT_TOLERANCE times its cost at the smallest.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from live_dedup import OverlapEngine, normalize_token
+
+VOCAB = ("the a to and of we it that is in for you on this so but with "
+         "meeting project deadline budget review design caption window text "
+         "really think going need week next last team customer release").split()
+SNAPSHOT_WORDS = 40
+# --check: allowed growth of the per-update cost from the smallest to the largest session
+FLAT_TOLERANCE = 3.0
+
+
+def legacy_match(shown_words, curr_words):
+    """The matcher `on_live_text` used before the overlap engine (for comparison)."""
+    match_idx = 0
+    for i in range(len(curr_words)):
+        for j in range(len(shown_words)):
+            tail_shown = shown_words[j:]
+            if i + len(tail_shown) <= len(curr_words):
+                if all(normalize_token(tail_shown[k]) == normalize_token(curr_words[i + k])
+                       for k in range(len(tail_shown))):
+                    match_idx = i + len(tail_shown)
+                    break
+        if match_idx > 0:
+            break
+    return match_idx
+
+
+def _session(n, seed=1):
+    rnd = random.Random(seed)
+    return [rnd.choice(VOCAB) for _ in range(n)]
+
+
+def time_engine(session_words, updates=200):
+    engine = OverlapEngine(session_words)
+    snapshot = session_words[-(SNAPSHOT_WORDS - 5):] + _session(5, seed=2)
+    t0 = time.perf_counter()
+    for _ in range(updates):
+        engine.match(snapshot)
+    return (time.perf_counter() - t0) / updates
+
+
+def engine_memory(session_words):
+    tracemalloc.start()
+    engine = OverlapEngine()
+    engine.extend(session_words)
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del engine
+    return size
+
+
+def time_legacy(session_words, updates=3):
+    snapshot = session_words[-(SNAPSHOT_WORDS - 5):] + _session(5, seed=2)
+    t0 = time.perf_counter()
+    for _ in range(updates):
+        legacy_match(session_words, snapshot)
+    return (time.perf_counter() - t0) / updates
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--sizes', type=int, nargs='+', default=[100, 1_000, 10_000, 100_000, 1_000_000],
+                    help='shown words in the session')
+    ap.add_argument('--runs', type=int, default=3, help='timings per size; the median is reported')
+    ap.add_argument('--check', action='store_true', help='fail if the cost per update is not flat')
+    args = ap.parse_args(argv)
+
+    legacy_limit = 1_000
+    costs = []
+    print(f"{'shown words':>12}  {'engine us/update':>17}  {'engine KiB':>11}  {'legacy us/update':>17}")
+    for n in args.sizes:
+        words = _session(n)
+        engine_us = statistics.median(time_engine(words) for _ in range(args.runs)) * 1e6
+        costs.append(engine_us)
+        legacy = f"{time_legacy(words) * 1e6:17.1f}" if n <= legacy_limit else f"{'-':>17}"
+        kib = engine_memory(words) / 1024
+        print(f"{n:>12}  {engine_us:17.1f}  {kib:11.1f}  {legacy}")
+    if args.check:
+        if costs[-1] > costs[0] * FLAT_TOLERANCE:
+            print(f"FAIL engine: {costs[-1]:.1f} us/update at {args.sizes[-1]} words, "
+                  f"{costs[0]:.1f} us at {args.sizes[0]} (more than {FLAT_TOLERANCE:g}x)",
+                  file=sys.stderr)
+            return 1
+        print("engine cost per update is flat", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Caption latency vs. UIA call volume for the reader's polling policies.
+
+A fake Live Captions control follows a timeline of speech bursts (text changing every
+~0.25 s) and silences. For each policy the reader runs through the timeline in real
+time; reported are the delay between a caption change and the reader delivering it
+(p50 / p95 / max) and the number of window_text() calls made - the CPU side of the
+tradeoff. 'fixed 0.5s' is the reader's original behaviour.
+"""
+from bisect import bisect_left
+import sys
+import time
+
+from fake_desktop import FakeDesktop, FakeSource
+from live_caption_reader import LiveCaptionReader, PollPolicy
+
+from benchmarks.suite import percentile
+
+WORDS = "so the plan for next week is to finish the review and ship it".split()
+# (start, end) of each speech burst, in seconds; silence in between
+SPEECH = [(0.2, 2.2), (5.0, 7.0)]
+DURATION = 9.0
+
+
+def timeline():
+    out, words, i = [], [], 0
+    for start, end in SPEECH:
+        t = start
+        while t < end:
+            words.append(WORDS[i % len(WORDS)])
+            i += 1
+            out.append((round(t, 3), ' '.join(words[-30:])))
+            t += 0.25
+    return out
+
+
+def run(policy):
+    events = timeline()
+    desktop = FakeDesktop()
+    desktop.add_window('Live captions', [events])
+    reader = LiveCaptionReader(source=FakeSource(desktop), policy=policy)
+    delivered = []
+    reader.on_change = lambda _tail: delivered.append(desktop.elapsed())
+    reader.start()
+    time.sleep(DURATION)
+    reader.stop()
+    delays = []
+    for t, _text in events:
+        i = bisect_left(delivered, t)
+        if i < len(delivered):
+            delays.append(delivered[i] - t)
+    delays.sort()
+    return (percentile(delays, 50) * 1e3, percentile(delays, 95) * 1e3,
+            delays[-1] * 1e3 if delays else 0.0, desktop.calls['window_text'])
+
+
+def main(argv=None):
+    policies = [('fixed 0.5s', PollPolicy.fixed(0.5))]
+    policies += [(name, PollPolicy.preset(name)) for name in ('low_latency', 'balanced', 'low_cpu')]
+    print(f"{'policy':<12}  {'p50 ms':>7}  {'p95 ms':>7}  {'max ms':>7}  {'window_text calls':>18}")
+    for name, policy in policies:
+        p50, p95, worst, calls = run(policy)
+        print(f"{name:<12}  {p50:7.0f}  {p95:7.0f}  {worst:7.0f}  {calls:18d}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Headless LiveCaptionReader throughput and discovery latency on a FakeDesktop.
+
+Throughput: the Live Captions control plays back a scripted stream of growing snapshots
+and the reader polls as fast as it can; reported as snapshots delivered per second for
+a few simulated `window_text()` latencies.
+
+Discovery: the Live Captions window opens after a delay among many unrelated windows
+with slow UIA calls; reported as the time from the window appearing to the first
+caption reaching `on_change`, plus the UIA calls spent getting there.
+"""
+import sys
+import time
+
+from fake_desktop import FakeDesktop, FakeSource
+from live_caption_reader import LiveCaptionReader
+
+WORDS = "so the plan for next week is to finish the review and ship it".split()
+
+
+def snapshot_stream(n):
+    out, line = [], []
+    for i in range(n):
+        line.append(WORDS[i % len(WORDS)])
+        out.append(' '.join(line[-60:]) + f' #{i}')
+    return out
+
+
+def _wait(pred, timeout):
+    deadline = time.perf_counter() + timeout
+    while not pred() and time.perf_counter() < deadline:
+        time.sleep(0.001)
+
+
+def bench_throughput(n=2000, text_latency=0.0):
+    desktop = FakeDesktop(latency={'window_text': text_latency})
+    desktop.add_window('Live captions', [snapshot_stream(n)])
+    reader = LiveCaptionReader(poll_interval=0.0, source=FakeSource(desktop))
+    got = []
+    reader.on_change = got.append
+    t0 = time.perf_counter()
+    reader.start()
+    _wait(lambda: len(got) >= n, timeout=60)
+    elapsed = time.perf_counter() - t0
+    reader.stop()
+    return len(got) / elapsed, desktop.calls['window_text']
+
+
+def bench_discovery(noise_windows=200, appear_after=0.3, call_latency=0.0005):
+    desktop = FakeDesktop(latency={'descendants': call_latency, 'window_text': call_latency,
+                                   'windows': call_latency})
+    for i in range(noise_windows):
+        desktop.add_window(f'Document {i} - Editor', [f'body {i}'])
+    desktop.add_window('Closed caption settings')  # matches a fallback title, rejected
+    desktop.add_window('Live captions', [['hello everyone']], appear_after=appear_after)
+    reader = LiveCaptionReader(poll_interval=0.05, source=FakeSource(desktop))
+    got = []
+    reader.on_change = got.append
+    t0 = time.perf_counter()
+    reader.start()
+    _wait(lambda: got, timeout=30)
+    latency = time.perf_counter() - t0 - appear_after
+    reader.stop()
+    return latency, sum(desktop.calls.values())
+
+
+def main(argv=None):
+    print("throughput (poll_interval=0)")
+    print(f"{'window_text latency':>20}  {'snapshots/s':>12}  {'window_text calls':>18}")
+    for lat in (0.0, 0.001, 0.005):
+        rate, calls = bench_throughput(n=2000 if lat == 0 else 200, text_latency=lat)
+        print(f"{lat * 1000:>17.1f} ms  {rate:12.0f}  {calls:18d}")
+    print()
+    print("discovery (Live Captions opens 0.3s after start, poll_interval=0.05)")
+    print(f"{'noise windows':>14}  {'latency ms':>11}  {'UIA calls':>10}")
+    for noise in (10, 100, 400):
+        latency, calls = bench_discovery(noise_windows=noise)
+        print(f"{noise:>14}  {latency * 1000:11.1f}  {calls:10d}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
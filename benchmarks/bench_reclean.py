@@ -0,0 +1,61 @@
+"""Batch re-cleaning throughput: files/s and MB/s by worker count, and a no-change rerun.
+
+Generates --files raw (uncleaned) autosaves of about --minutes of meeting each, re-cleans
+copies of them with 1 worker and with each --workers count, then reruns the last one to
+show the cost of a run where the manifest lets every file be skipped.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from batch_clean import reclean
+from live_dedup import LiveDeduper
+
+from benchmarks.streams import synthetic_meeting
+
+
+def make_autosave(minutes, seed):
+    dedup = LiveDeduper(min_interval=0)
+    parts = []
+    for t, text in synthetic_meeting(minutes=minutes, seed=seed):
+        seg = dedup.process(text, now=t)
+        if seg:
+            parts.append(seg + ' ')
+    return ''.join(parts)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--files', type=int, default=200)
+    ap.add_argument('--minutes', type=float, default=20)
+    ap.add_argument('--workers', type=int, nargs='+', default=[os.cpu_count() or 1])
+    args = ap.parse_args(argv)
+
+    bodies = [make_autosave(args.minutes, seed) for seed in range(8)]
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'corpus')
+        os.makedirs(corpus)
+        for i in range(args.files):
+            with open(os.path.join(corpus, f'{i:05d}.txt'), 'w', encoding='utf-8') as f:
+                f.write(bodies[i % len(bodies)])
+        print(f"{args.files} autosaves, "
+              f"{sum(len(b.encode()) for b in bodies) * args.files / len(bodies) / 1e6:.1f} MB")
+        print(f"{'workers':>7} {'seconds':>8} {'files/s':>8} {'MB/s':>7}")
+        for n in [1] + [w for w in args.workers if w != 1]:
+            run = os.path.join(tmp, f'run{n}')
+            shutil.copytree(corpus, run)
+            stats = reclean(run, workers=n)
+            print(f"{n:>7} {stats.seconds:>8.2f} {stats.files_per_second():>8.1f} "
+                  f"{stats.bytes_per_second() / 1e6:>7.2f}")
+        t0 = time.perf_counter()
+        stats = reclean(run, workers=n)
+        print(f"rerun, nothing changed: {(time.perf_counter() - t0) * 1e3:.1f} ms "
+              f"({stats.skipped} skipped)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
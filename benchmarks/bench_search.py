@@ -0,0 +1,83 @@
+"""Transcript search index: cold build, no-change sync and query latency.
+
+Generates --files synthetic transcripts (about --minutes of meeting each) in a temporary
+transcript folder, builds the FTS5 index, re-syncs it with nothing changed, touches 1%
+of the files and syncs again, then runs a set of one- to three-word queries.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from live_dedup import LiveDeduper
+from text_cleaner import clean_text
+from transcript_index import TranscriptIndex
+
+from benchmarks.streams import synthetic_meeting
+from benchmarks.suite import percentile
+
+QUERIES = ['budget', 'sign off', 'design team mockups', 'customer feedback', 'export search',
+           'finance', 'review and ship', 'share your screen', 'nonexistentword']
+
+
+def make_transcript(minutes, seed):
+    dedup = LiveDeduper(min_interval=0)
+    parts = []
+    for t, text in synthetic_meeting(minutes=minutes, seed=seed):
+        seg = dedup.process(text, now=t)
+        if seg:
+            parts.append(seg)
+    return clean_text(' '.join(parts))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--files', type=int, default=500)
+    ap.add_argument('--minutes', type=float, default=30)
+    args = ap.parse_args(argv)
+
+    # a handful of distinct meetings, reused so generating the corpus stays quick
+    bodies = [make_transcript(args.minutes, seed) for seed in range(8)]
+    with tempfile.TemporaryDirectory() as tmp:
+        total = 0
+        for i in range(args.files):
+            name = f"2024{1 + i // 28 % 12:02d}{1 + i % 28:02d}_{9 + i % 8:02d}0000.txt"
+            path = os.path.join(tmp, f"{i:05d}_{name}")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(bodies[i % len(bodies)])
+            total += os.path.getsize(path)
+        print(f"{args.files} transcripts, {total / 1e6:.1f} MB")
+
+        with TranscriptIndex(tmp) as index:
+            t0 = time.perf_counter()
+            index.sync()
+            print(f"cold build        {time.perf_counter() - t0:8.2f} s")
+            t0 = time.perf_counter()
+            index.sync()
+            print(f"sync, no changes  {(time.perf_counter() - t0) * 1e3:8.1f} ms")
+            rnd = random.Random(1)
+            for name in rnd.sample(sorted(os.listdir(tmp)), max(1, args.files // 100)):
+                if name.endswith('.txt'):
+                    with open(os.path.join(tmp, name), 'a', encoding='utf-8') as f:
+                        f.write(' An added sentence about the budget.')
+            t0 = time.perf_counter()
+            indexed, _removed, _unchanged = index.sync()
+            print(f"sync, {indexed:>3} changed {(time.perf_counter() - t0) * 1e3:8.1f} ms")
+
+            print(f"{'query':<22} {'hits':>5} {'p50 ms':>8} {'p99 ms':>8}")
+            for q in QUERIES:
+                times = []
+                for _ in range(30):
+                    t0 = time.perf_counter()
+                    hits = index.search(q)
+                    times.append(time.perf_counter() - t0)
+                times.sort()
+                print(f"{q:<22} {len(hits):>5} {percentile(times, 50) * 1e3:>8.2f} "
+                      f"{percentile(times, 99) * 1e3:>8.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Load test of the local SSE caption server with hundreds of simulated subscribers.
+
+A CaptionServer runs on a free localhost port; N subscribers (asyncio connections in
+this process) read /events while segments are published from another thread, like the
+pipeline worker does. Reported per subscriber count: segments delivered to all of
+them, publish-to-receive delay percentiles, and how many of the `--stalled`
+subscribers that stop reading were cut off (without holding up the others). A stalled
+subscriber is only cut off once the socket buffers in between are full too, which on
+loopback takes a few MB; `--segments 2000 --rate 500 --chars 4000` gets there.
+"""
+import argparse
+import asyncio
+import socket
+import sys
+from threading import Thread
+import time
+
+from caption_server import CaptionServer
+
+from benchmarks.suite import percentile
+
+TEXT = "so the plan for next week is to finish the review and ship it on friday"
+
+
+async def _subscriber(port, n, delays, stall=False):
+    sock = socket.socket()
+    if stall:
+        # small buffers, so a stalled reader backs up into the server soon
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+    reader, writer = await asyncio.open_connection(sock=sock, limit=4096 if stall else 2**16)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await reader.readuntil(b'\r\n\r\n')
+    got = 0
+    try:
+        while got < n:
+            if stall and got:
+                await asyncio.sleep(3600)
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b'data: '):
+                # the segment text ends with its publish time
+                sent = float(line.rsplit(b'@', 1)[1].split(b'"', 1)[0])
+                delays.append(time.perf_counter() - sent)
+                got += 1
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+    return got
+
+
+def _publish(server, n, rate, chars):
+    text = (TEXT * (chars // len(TEXT) + 1))[:chars]
+    for _ in range(n):
+        server.publish(f"{text} @{time.perf_counter():.6f}")
+        time.sleep(1.0 / rate)
+
+
+async def _run(server, subscribers, stalled, n, rate, chars):
+    delays = []
+    tasks = [asyncio.create_task(_subscriber(server.port, n, delays)) for _ in range(subscribers)]
+    stalls = [asyncio.create_task(_subscriber(server.port, n, [], stall=True)) for _ in range(stalled)]
+    while server.clients < subscribers + stalled:
+        await asyncio.sleep(0.01)
+    publisher = Thread(target=_publish, args=(server, n, rate, chars))
+    publisher.start()
+    got = await asyncio.gather(*tasks)
+    await asyncio.sleep(0.2)
+    for t in stalls:
+        t.cancel()
+    await asyncio.gather(*stalls, return_exceptions=True)
+    publisher.join()
+    return got, delays
+
+
+def bench(subscribers, stalled, n, rate, buffer, chars=len(TEXT)):
+    server = CaptionServer(port=0, buffer=buffer)
+    server.start()
+    try:
+        got, delays = asyncio.run(_run(server, subscribers, stalled, n, rate, chars))
+    finally:
+        server.stop()
+    delays.sort()
+    return sum(got) / (subscribers * n), delays, server.dropped_clients
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--subscribers', type=int, nargs='+', default=[10, 100, 500])
+    ap.add_argument('--segments', type=int, default=200)
+    ap.add_argument('--rate', type=float, default=50, help='segments published per second')
+    ap.add_argument('--stalled', type=int, default=5, help='subscribers that stop reading')
+    ap.add_argument('--buffer', type=int, default=16, help='per-client buffer (events)')
+    ap.add_argument('--chars', type=int, default=len(TEXT), help='characters per segment')
+    args = ap.parse_args(argv)
+
+    print(f"{args.segments} segments of {args.chars} chars at {args.rate:g}/s, buffer {args.buffer}, "
+          f"{args.stalled} stalled subscribers")
+    print(f"{'subscribers':>12}  {'delivered':>9}  {'p50 ms':>7}  {'p99 ms':>7}  {'max ms':>7}  {'cut off':>7}")
+    for subscribers in args.subscribers:
+        delivered, delays, dropped = bench(subscribers, args.stalled, args.segments, args.rate,
+                                           args.buffer, args.chars)
+        print(f"{subscribers:>12}  {delivered:9.1%}  {percentile(delays, 50) * 1e3:7.2f}  "
+              f"{percentile(delays, 99) * 1e3:7.2f}  {delays[-1] * 1e3:7.2f}  {dropped:>7}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
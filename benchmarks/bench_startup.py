@@ -0,0 +1,138 @@
+"""Startup time and memory: headless capture (ocaption) vs. the Tk GUI (captioner).
+
+Each variant runs in a fresh interpreter, which reports the time from its first line to
+"ready to capture" and its peak RSS:
+
+    headless  import ocaption, start a HeadlessCapture on a replayed stream
+    gui       import captioner, create the Tk root and CaptionerApp, draw it once
+
+Without a display the GUI can't create its window; then only its import is measured
+(reported as gui-import). Results are the median of --runs runs.
+
+With --check the run fails (exit status 1) when a median time-to-ready exceeds its
+budget in startup_budget.json by more than the tolerance, or when the GUI has loaded the
+capture backend (live_caption_reader / pywinauto) before the first Start Captioning.
+For a per-module breakdown of a slow start, run `python captioner.py --profile-startup`.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+_PRELUDE = """
+import json, os, sys, time
+t0 = time.perf_counter()
+def peak_rss_mb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1 << 20) if sys.platform == 'darwin' else rss / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1 << 20)
+        except Exception:
+            return float('nan')
+def report(name, **extra):
+    print(json.dumps(dict(name=name, ready_ms=(time.perf_counter() - t0) * 1e3,
+                          rss_mb=peak_rss_mb(), tk='tkinter' in sys.modules,
+                          reader='live_caption_reader' in sys.modules,
+                          pywinauto='pywinauto' in sys.modules, **extra)))
+"""
+
+HEADLESS = _PRELUDE + """
+import ocaption
+from fake_desktop import FakeSource, replay_desktop
+cap = ocaption.HeadlessCapture(sys.argv[1], source=FakeSource(replay_desktop([(0.0, 'hello')])))
+cap.start()
+report('headless')
+cap.stop()
+"""
+
+GUI = _PRELUDE + """
+import captioner
+import tkinter as tk
+try:
+    root = tk.Tk()
+except tk.TclError:
+    report('gui-import')
+else:
+    app = captioner.CaptionerApp(root)
+    root.update()
+    report('gui')
+    root.destroy()
+"""
+
+
+def run_once(script, tmp):
+    proc = subprocess.run([sys.executable, '-c', script, tmp], cwd=ROOT, capture_output=True,
+                          text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(script, runs):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for _ in range(runs):
+            results.append(run_once(script, tmp))
+    return {
+        'name': results[0]['name'],
+        'ready_ms': statistics.median(r['ready_ms'] for r in results),
+        'rss_mb': statistics.median(r['rss_mb'] for r in results),
+        'tk': results[0]['tk'],
+        'reader': any(r['reader'] for r in results),
+        'pywinauto': any(r['pywinauto'] for r in results),
+    }
+
+
+def check(rows, budget):
+    """Return the list of budget violations in `rows`."""
+    tolerance = budget.get('tolerance', 0.0)
+    failures = []
+    for r in rows:
+        limit = budget.get('ready_ms', {}).get(r['name'])
+        if limit is not None and r['ready_ms'] > limit * (1 + tolerance):
+            failures.append(f"{r['name']}: ready in {r['ready_ms']:.1f} ms, budget {limit} ms "
+                            f"(+{tolerance:.0%})")
+        if r['name'].startswith('gui') and (r['reader'] or r['pywinauto']):
+            failures.append(f"{r['name']}: capture backend imported before Start Captioning")
+        if r['pywinauto'] and r['name'] == 'headless':
+            failures.append("headless: pywinauto imported for a fake source")
+    return failures
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--runs', type=int, default=5)
+    ap.add_argument('--json', action='store_true', help='print results as JSON')
+    ap.add_argument('--check', action='store_true', help='fail if over the startup budget')
+    ap.add_argument('--budget', default=BUDGET_FILE, help='budget file for --check')
+    args = ap.parse_args(argv)
+
+    rows = [measure(HEADLESS, args.runs), measure(GUI, args.runs)]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"{'variant':<12} {'ready ms':>10} {'peak RSS MB':>12}  tkinter  reader  pywinauto")
+        for r in rows:
+            print(f"{r['name']:<12} {r['ready_ms']:>10.1f} {r['rss_mb']:>12.1f}  "
+                  f"{r['tk']!s:<7}  {r['reader']!s:<6}  {r['pywinauto']}")
+    if args.check:
+        with open(args.budget, 'r', encoding='utf-8') as f:
+            failures = check(rows, json.load(f))
+        for msg in failures:
+            print(f"FAIL {msg}", file=sys.stderr)
+        if failures:
+            return 1
+        print("startup within budget", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""Overhead of the always-on stage stats (stage_stats.py).
+
+Measures the cost of one timed stage (two perf_counter calls and a histogram record)
+and compares the live stage over a synthetic meeting with and without it: the bare
+LiveDeduper vs. CaptionPipeline.process, which times every snapshot.
+"""
+import argparse
+import sys
+import time
+
+from caption_pipeline import CaptionPipeline
+from live_caption_reader import compute_delta
+from live_dedup import LiveDeduper
+from stage_stats import StageStats
+
+from benchmarks.streams import synthetic_meeting
+
+
+def per_record_ns(n=200_000):
+    stats = StageStats()
+    clock = time.perf_counter
+    t0 = time.perf_counter_ns()
+    for _ in range(n):
+        s = clock()
+        stats.record('stage', clock() - s)
+    return (time.perf_counter_ns() - t0) / n
+
+
+def live_seconds(deltas, timed):
+    dedup = LiveDeduper(min_interval=0)
+    process = CaptionPipeline(dedup=dedup).process if timed else dedup.process
+    t0 = time.perf_counter()
+    for t, delta in deltas:
+        process(delta, now=t)
+    return time.perf_counter() - t0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--minutes', type=float, default=30)
+    ap.add_argument('--runs', type=int, default=5)
+    args = ap.parse_args(argv)
+
+    # the deltas the reader emits for each changed text
+    deltas, previous = [], ''
+    for t, text in synthetic_meeting(args.minutes):
+        if text != previous:
+            deltas.append((t, compute_delta(previous, text)))
+            previous = text
+    ns = per_record_ns()
+    bare = min(live_seconds(deltas, False) for _ in range(args.runs))
+    timed = min(live_seconds(deltas, True) for _ in range(args.runs))
+    n = len(deltas)
+    print(f"timed stage (2x perf_counter + record): {ns:.0f} ns")
+    print(f"live stage, {n} deltas: {bare / n * 1e6:.1f} us bare, {timed / n * 1e6:.1f} us "
+          f"with stats ({(timed - bare) / bare:+.1%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Fan-out of reader.stream() to many asyncio subscribers from one poller.
+
+The Live Captions control plays back a scripted stream of growing snapshots and the
+reader polls as fast as it can; for each subscriber count, reported are updates per
+second, the delay from a poll reading a snapshot to a subscriber receiving it, and the
+UIA `window_text()` calls (one per poll, however many subscribers). The last row adds
+one subscriber that reads 10x slower than the others with the default 'drop_oldest'
+overflow, and shows the others are not held up.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from fake_desktop import FakeDesktop, FakeSource
+from live_caption_reader import LiveCaptionReader
+
+from benchmarks.bench_reader import snapshot_stream
+from benchmarks.suite import percentile
+
+
+async def _consume(stream, n, delays, delay=0.0):
+    got = 0
+    async for update in stream:
+        delays.append(time.time() - update.time)
+        got += 1
+        if delay:
+            await asyncio.sleep(delay)
+        if update.seq >= n:
+            break
+    await stream.aclose()
+    return got
+
+
+async def _run(reader, n, subscribers, slow):
+    delays = []
+    consumers = [_consume(reader.stream(maxsize=64), n, delays) for _ in range(subscribers)]
+    if slow:
+        consumers.append(_consume(reader.stream(maxsize=8), n, [], delay=0.005))
+    t0 = time.perf_counter()
+    got = await asyncio.gather(*consumers)
+    return time.perf_counter() - t0, delays, got
+
+
+def bench(n, subscribers, slow=False):
+    desktop = FakeDesktop()
+    desktop.add_window('Live captions', [snapshot_stream(n)])
+    reader = LiveCaptionReader(poll_interval=0.0, source=FakeSource(desktop))
+    elapsed, delays, got = asyncio.run(_run(reader, n, subscribers, slow))
+    delays.sort()
+    return n / elapsed, delays, desktop.calls['window_text'], got
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--updates', type=int, default=2000)
+    args = ap.parse_args(argv)
+
+    print(f"{'subscribers':>12}  {'updates/s':>10}  {'p50 ms':>7}  {'p99 ms':>7}  {'window_text':>11}  slow got")
+    for subscribers, slow in ((1, False), (10, False), (100, False), (10, True)):
+        rate, delays, calls, got = bench(args.updates, subscribers, slow)
+        print(f"{subscribers:>12}  {rate:10.0f}  {percentile(delays, 50) * 1e3:7.2f}  "
+              f"{percentile(delays, 99) * 1e3:7.2f}  {calls:11d}  {got[-1] if slow else '-'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""Streaming subtitle export over a long session: per-segment cost by hour and memory.
+
+A synthetic meeting of `--minutes` (4 hours by default) goes through the live de-dup
+stage; every segment is handed to a SubtitleWriter with its capture time, as during a
+session. Reported per hour of the session: the p50/p99 cost of `add()` (formatting the
+finished cue and queueing it for the writer thread), then the peak memory allocated
+while exporting, against the size of the subtitle file written.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from live_caption_reader import compute_delta
+from live_dedup import LiveDeduper
+from subtitle_export import SubtitleWriter
+
+from benchmarks.streams import synthetic_meeting
+from benchmarks.suite import percentile
+
+
+def segments(minutes):
+    dedup = LiveDeduper(min_interval=0.5)
+    out = []
+    previous = ''
+    for t, text in synthetic_meeting(minutes):
+        if text == previous:
+            continue
+        seg = dedup.process(compute_delta(previous, text), now=t)
+        previous = text
+        if seg:
+            out.append((dedup.captured_at, seg))
+    return out
+
+
+def export(segs, path, fmt, timed):
+    subs = SubtitleWriter(path, fmt, origin=0.0, commit_delay=0.1)
+    per_hour = {}
+    clock = time.perf_counter_ns
+    for t, seg in segs:
+        if timed:
+            t0 = clock()
+            subs.add(seg, t)
+            per_hour.setdefault(int(t // 3600), []).append(clock() - t0)
+        else:
+            subs.add(seg, t)
+    subs.close()
+    return per_hour, subs.cues
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--minutes', type=float, default=240)
+    ap.add_argument('--format', default='srt', choices=('srt', 'vtt'))
+    args = ap.parse_args(argv)
+
+    segs = segments(args.minutes)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f'session.{args.format}')
+        per_hour, cues = export(segs, path, args.format, timed=True)
+        print(f"{len(segs)} segments -> {cues} cues")
+        print(f"{'hour':>4}  {'segments':>8}  {'p50 us':>7}  {'p99 us':>7}")
+        for hour, times in sorted(per_hour.items()):
+            times.sort()
+            print(f"{hour + 1:>4}  {len(times):>8}  {percentile(times, 50) / 1e3:7.1f}  "
+                  f"{percentile(times, 99) / 1e3:7.1f}")
+        os.remove(path)
+        tracemalloc.start()
+        export(segs, path, args.format, timed=False)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        size = os.path.getsize(path)
+    print(f"peak memory while exporting {peak / 1024:.0f} KiB for a {size / 1024:.0f} KiB file")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Text passes, time and transient memory per update: shared tokenizer vs. the regex chains.
+
+The "regex" rows are the normalization chains the live stage and the cleaner used
+before caption_tokens.py; the "tokens" rows are the current code paths. For each
+snapshot of a synthetic meeting (after extract_tail, as the reader delivers it):
+
+    live   snapshot -> comparison keys of its words        (LiveDeduper._update)
+    clean  appended segment -> sentences with their words  (StreamingCleaner)
+
+`passes` counts the operations that walk the whole text; per-word work on words seen
+before is a dict lookup in both versions. Peak transient memory is measured with
+tracemalloc around each update and averaged.
+"""
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+
+import caption_tokens
+from live_caption_reader import extract_tail
+
+from benchmarks.streams import synthetic_meeting
+from benchmarks.suite import percentile
+
+_CONTROL_TOKEN_RE = re.compile(r"\binstructions\[LiveCaptions\]\s*\d+\b", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+_REPEAT3_RE = re.compile(r"\b(\w+)(?:\s+\1\b){2,}", re.IGNORECASE)
+_REPEAT2_RE = re.compile(r"\b(\w+)(?:\s+\1\b)+", re.IGNORECASE)
+_SPLIT_RE = re.compile(r"(?<=[\.!?])\s+")
+_NORM_RE = re.compile(r"[^a-z0-9 ]+")
+
+
+def regex_live(raw, cache):
+    # strip, control tokens, whitespace, strip, repeats, split
+    s = _REPEAT3_RE.sub(r"\1", _WS_RE.sub(" ", _CONTROL_TOKEN_RE.sub("", raw.strip())).strip())
+    keys = []
+    for w in s.split():
+        k = cache.get(w)
+        if k is None:
+            k = cache[w] = w.lower().rstrip('.,!?;:')
+        keys.append(k)
+    return keys
+
+
+def regex_clean(text):
+    # whitespace, strip, repeats, sentence split, then per sentence: lower, norm, strip, split
+    s = _REPEAT2_RE.sub(r"\1", _WS_RE.sub(" ", text).strip())
+    return [_NORM_RE.sub("", sent.lower()).strip().split() for sent in _SPLIT_RE.split(s)]
+
+
+def tokens_live(raw, tokenizer):
+    return [t.key for t in tokenizer.tokens(raw, min_repeat=3, controls=True)]
+
+
+def tokens_clean(text, tokenizer):
+    out, sent = [], []
+    for t in tokenizer.tokens(text, min_repeat=2):
+        sent.append(t.word)
+        if t.ends:
+            out.append(sent)
+            sent = []
+    return out + [sent] if sent else out
+
+
+VARIANTS = [
+    ('live', 'regex', 6, lambda: (lambda s, cache={}: regex_live(s, cache))),
+    # split, plus a scan for '[' before looking for control tokens
+    ('live', 'tokens', 2, lambda: (lambda s, tk=caption_tokens.Tokenizer(): tokens_live(s, tk))),
+    ('clean', 'regex', 8, lambda: regex_clean),
+    ('clean', 'tokens', 1, lambda: (lambda s, tk=caption_tokens.Tokenizer(): tokens_clean(s, tk))),
+]
+
+
+def measure(fn, inputs, memory):
+    times, peaks = [], []
+    for s in inputs:
+        if memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            fn(s)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        else:
+            t0 = time.perf_counter_ns()
+            fn(s)
+            times.append(time.perf_counter_ns() - t0)
+    return times, peaks
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--minutes', type=float, default=30)
+    args = ap.parse_args(argv)
+
+    snapshots = [tail for tail in (extract_tail(text) for _t, text in synthetic_meeting(args.minutes))
+                 if tail]
+    # the cleaner sees the words the live stage appends: roughly the last clause
+    segments = [' '.join(s.split()[-8:]) + ' ' for s in snapshots]
+    print(f"{len(snapshots)} snapshots")
+    print(f"{'stage':<6} {'impl':<7} {'passes':>6} {'p50 us':>8} {'p99 us':>8} {'peak B/upd':>11}")
+    for stage, impl, passes, make in VARIANTS:
+        inputs = snapshots if stage == 'live' else segments
+        times, _ = measure(make(), inputs, memory=False)
+        tracemalloc.start()
+        try:
+            _, peaks = measure(make(), inputs, memory=True)
+        finally:
+            tracemalloc.stop()
+        times.sort()
+        print(f"{stage:<6} {impl:<7} {passes:>6} {percentile(times, 50) / 1e3:>8.1f} "
+              f"{percentile(times, 99) / 1e3:>8.1f} {sum(peaks) / len(peaks):>11.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
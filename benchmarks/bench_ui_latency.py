@@ -0,0 +1,126 @@
+"""UI event latency under bursty caption input: inline sanitizing vs. CaptionPipeline.
+
+Models the Tk event loop as a single thread draining a callback queue (what
+`root.after(0, ...)` feeds) plus a UI heartbeat event every 10 ms standing in for
+repaints and clicks. A feeder thread delivers caption snapshots in bursts, either
+straight onto the UI loop to be sanitized there (the old `on_live_text` path), to a
+CaptionPipeline whose worker posts each finished segment back, or to a pipeline feeding
+an UpdateQueue drained once per 40 ms frame (what the app does). Reported: heartbeat
+lateness percentiles and UI callbacks run for each burst size.
+
+The worker takes the sanitizing off the UI thread but still competes with it for the
+GIL, so under large bursts the heartbeat p99 grows in the pipeline modes as well (on a
+multi-core machine to about the 5 ms switch interval; on one core much like inline).
+What the pipeline and the frame queue cut is the number of UI callbacks.
+"""
+from queue import Queue, Empty
+from threading import Thread
+import sys
+import time
+
+from caption_pipeline import CaptionPipeline, UpdateQueue
+from live_caption_reader import extract_tail
+from live_dedup import LiveDeduper
+
+from benchmarks.streams import synthetic_meeting
+from benchmarks.suite import percentile
+
+HEARTBEAT = 0.010
+FRAME = 0.040
+
+
+class EventLoop:
+    """Single-threaded callback queue, like Tk's after(0, ...) queue."""
+
+    def __init__(self, frame_fn=None):
+        self._q = Queue()
+        self.frame_fn = frame_fn  # called every FRAME seconds, like an after() tick
+        self.lateness = []
+        self.callbacks = 0
+
+    def after(self, _ms, fn, *args):
+        self._q.put((fn, args))
+
+    def run(self, duration):
+        end = time.perf_counter() + duration
+        next_beat = time.perf_counter() + HEARTBEAT
+        next_frame = time.perf_counter() + FRAME
+        while True:
+            now = time.perf_counter()
+            if now >= next_beat:
+                self.lateness.append(now - next_beat)
+                next_beat += HEARTBEAT
+                if next_beat < now:
+                    next_beat = now + HEARTBEAT
+            if self.frame_fn and now >= next_frame:
+                self.callbacks += 1
+                self.frame_fn()
+                next_frame = now + FRAME
+            if now >= end:
+                return
+            try:
+                fn, args = self._q.get(timeout=max(0.0, next_beat - now))
+            except Empty:
+                continue
+            self.callbacks += 1
+            fn(*args)
+
+
+def run(mode, burst, bursts=10, gap=0.2):
+    # worst case for the UI: no rate limiting, every snapshot is fully processed
+    snapshots = [text for _t, text in synthetic_meeting(minutes=10)]
+    loop = EventLoop()
+    inserted = []
+    dedup = LiveDeduper(min_interval=0)
+    pipeline = None
+    updates = None
+
+    if mode == 'inline':
+        def on_snapshot(text):
+            seg = dedup.process(text)
+            if seg:
+                inserted.append(seg)
+
+        def deliver(text):
+            loop.after(0, on_snapshot, text)
+    elif mode == 'frame':
+        updates = UpdateQueue()
+        loop.frame_fn = lambda: inserted.extend(updates.drain())
+        pipeline = CaptionPipeline(on_segment=updates.put, dedup=dedup)
+        pipeline.start()
+        deliver = pipeline.submit
+    else:
+        pipeline = CaptionPipeline(on_segment=lambda seg: loop.after(0, inserted.append, seg),
+                                   dedup=dedup)
+        pipeline.start()
+        deliver = pipeline.submit
+
+    def feeder():
+        i = 0
+        for _ in range(bursts):
+            for _ in range(burst):
+                deliver(extract_tail(snapshots[i % len(snapshots)], limit=10000))
+                i += 1
+            time.sleep(gap)
+
+    t = Thread(target=feeder, daemon=True)
+    t.start()
+    loop.run(bursts * gap + 0.3)
+    t.join()
+    if pipeline:
+        pipeline.stop()
+    v = sorted(loop.lateness)
+    return percentile(v, 50) * 1e3, percentile(v, 99) * 1e3, v[-1] * 1e3, loop.callbacks
+
+
+def main(argv=None):
+    modes = ('inline', 'pipeline', 'frame')
+    print(f"{'burst':>6}" + ''.join(f"  {m + ' p50/p99/max ms (calls)':>36}" for m in modes))
+    for burst in (1, 50, 200, 1000, 2000):
+        cells = ['%.2f / %.2f / %.1f (%d)' % run(m, burst) for m in modes]
+        print(f"{burst:>6}" + ''.join(f"  {c:>36}" for c in cells))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
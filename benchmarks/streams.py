@@ -0,0 +1,73 @@
+"""Live Captions snapshot streams for the benchmarks.
+
+A stream is a list of (t, text) pairs: seconds since the start of the recording and the
+full text of the caption control at that moment. Recorded streams are JSON lines files
+in benchmarks/corpus/ ({"t": ..., "text": ...} per line); record new ones on Windows with
+
+    python live_caption_reader.py --record benchmarks/corpus/my_meeting.jsonl
+
+`synthetic_meeting` generates a long, deterministic stream with the same shape.
+"""
+import glob
+import json
+import os
+import random
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'corpus')
+
+_VOCAB = ("so the plan for next week is to finish the review and ship it but we still "
+          "need budget sign off from finance I think the design team has the mockups "
+          "ready can you share your screen yeah that looks right let's move on to the "
+          "customer feedback there were a lot of questions about export and search").split()
+
+
+def load_stream(path):
+    """Read a recorded stream from a JSON lines file."""
+    out = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rec = json.loads(line)
+                out.append((float(rec['t']), rec['text']))
+    return out
+
+
+def recorded_streams(corpus_dir=CORPUS_DIR):
+    """{name: stream} for every recording in the corpus directory."""
+    streams = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '*.jsonl'))):
+        streams[os.path.splitext(os.path.basename(path))[0]] = load_stream(path)
+    return streams
+
+
+def synthetic_meeting(minutes=60, seed=11, visible_lines=3, line_chars=90):
+    """A stream like Live Captions produces: a few visible lines, words arriving 1-3 at
+    a time, the last word sometimes revised, sentences ending every 8-16 words."""
+    rnd = random.Random(seed)
+    lines = ["Ready to show live captions in English (United States)"]
+    current = []
+    until_stop = rnd.randint(8, 16)
+    t = 0.0
+    out = []
+    end = minutes * 60.0
+    while t < end:
+        t += rnd.uniform(0.15, 0.6)
+        if current and rnd.random() < 0.2:
+            current[-1] = rnd.choice(_VOCAB)  # revision of the last word
+        for _ in range(rnd.randint(1, 3)):
+            word = rnd.choice(_VOCAB)
+            until_stop -= 1
+            if until_stop <= 0:
+                word += rnd.choice('..?')
+                until_stop = rnd.randint(8, 16)
+            if not current and word[:1].isalpha():
+                word = word.capitalize()
+            current.append(word)
+        text = ' '.join(current)
+        if len(text) > line_chars:
+            lines.append(text)
+            current = []
+        shown = lines[-(visible_lines - 1):] + ([text] if current else [])
+        out.append((round(t, 3), '\n'.join(shown)))
+    return out
@@ -0,0 +1,161 @@
+"""Benchmark suite for the caption text pipeline, using the production code paths.
+
+For every snapshot stream (the recordings in benchmarks/corpus/ plus a synthetic
+meeting) each snapshot goes through:
+
+    delta  live_caption_reader.compute_delta  (what the reader hands to on_delta)
+    live   live_dedup.LiveDeduper.process     (the pipeline's normalization + overlap)
+    clean  text_cleaner.StreamingCleaner.feed (incremental final cleaning)
+
+and the session is finished with StreamingCleaner.finish() and a batch clean_text()
+for comparison. Reports per-update latency percentiles, throughput and peak traced
+memory per stream; --json writes the same numbers in machine-readable form.
+
+    python -m benchmarks.suite [--minutes 60] [--json results.json]
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from live_caption_reader import compute_delta
+from live_dedup import LiveDeduper
+from text_cleaner import StreamingCleaner, clean_text
+
+from benchmarks.streams import recorded_streams, synthetic_meeting
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(q / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def summarize(samples_ns):
+    """Latency stats in microseconds plus throughput for one stage."""
+    v = sorted(samples_ns)
+    total = sum(v)
+    return {
+        'count': len(v),
+        'total_ms': total / 1e6,
+        'per_sec': len(v) / (total / 1e9) if total else 0.0,
+        'p50_us': percentile(v, 50) / 1e3,
+        'p90_us': percentile(v, 90) / 1e3,
+        'p99_us': percentile(v, 99) / 1e3,
+        'max_us': (v[-1] / 1e3) if v else 0.0,
+    }
+
+
+def run_pipeline(stream, timed=True):
+    """Push one stream through the pipeline; returns (timings, output info)."""
+    clock = time.perf_counter_ns if timed else (lambda: 0)
+    times = {'delta': [], 'live': [], 'clean': []}
+    dedup = LiveDeduper()
+    cleaner = StreamingCleaner()
+    segments = []
+    previous = ''
+    for t, text in stream:
+        if text == previous:
+            continue  # the reader only emits a delta when the text changed
+        t0 = clock()
+        delta = compute_delta(previous, text)
+        t1 = clock()
+        times['delta'].append(t1 - t0)
+        previous = text
+
+        t0 = clock()
+        seg = dedup.process(delta, now=t)
+        t1 = clock()
+        times['live'].append(t1 - t0)
+        if not seg:
+            continue
+
+        seg += " "
+        segments.append(seg)
+        t0 = clock()
+        cleaner.feed(seg)
+        t1 = clock()
+        times['clean'].append(t1 - t0)
+
+    t0 = clock()
+    cleaned = cleaner.finish()
+    finish_ns = clock() - t0
+    t0 = clock()
+    batch = clean_text(''.join(segments))
+    batch_ns = clock() - t0
+    info = {
+        'snapshots': len(stream),
+        'segments': len(segments),
+        'cleaned_chars': len(cleaned),
+        'streaming_matches_batch': cleaned == batch,
+        'finish_ms': finish_ns / 1e6,
+        'batch_clean_ms': batch_ns / 1e6,
+    }
+    return times, info
+
+
+def peak_memory(stream):
+    tracemalloc.start()
+    try:
+        run_pipeline(stream, timed=False)
+        _size, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_suite(minutes=60):
+    streams = recorded_streams()
+    streams[f'synthetic_meeting_{minutes}min'] = synthetic_meeting(minutes)
+    results = {}
+    for name, stream in streams.items():
+        times, info = run_pipeline(stream)
+        wall = sum(sum(v) for v in times.values())
+        info['stages'] = {stage: summarize(v) for stage, v in times.items()}
+        info['updates_per_sec'] = len(stream) / (wall / 1e9) if wall else 0.0
+        info['peak_kib'] = peak_memory(stream) / 1024
+        results[name] = info
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'streams': results,
+    }
+
+
+def print_report(report, out=sys.stdout):
+    for name, info in report['streams'].items():
+        print(f"{name}: {info['snapshots']} snapshots -> {info['segments']} segments, "
+              f"{info['updates_per_sec']:.0f} updates/s, peak {info['peak_kib']:.0f} KiB, "
+              f"finish {info['finish_ms']:.2f} ms (batch clean {info['batch_clean_ms']:.1f} ms)"
+              + ('' if info['streaming_matches_batch'] else '  STREAMING != BATCH'), file=out)
+        print(f"  {'stage':<6} {'count':>7} {'p50 us':>9} {'p90 us':>9} {'p99 us':>9} "
+              f"{'max us':>9} {'per sec':>10}", file=out)
+        for stage, st in info['stages'].items():
+            print(f"  {stage:<6} {st['count']:>7} {st['p50_us']:>9.1f} {st['p90_us']:>9.1f} "
+                  f"{st['p99_us']:>9.1f} {st['max_us']:>9.1f} {st['per_sec']:>10.0f}", file=out)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument('--minutes', type=int, default=60, help='length of the synthetic meeting')
+    ap.add_argument('--json', metavar='FILE', help="write results as JSON ('-' for stdout)")
+    args = ap.parse_args(argv)
+
+    report = run_suite(args.minutes)
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 0
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
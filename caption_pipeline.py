@@ -0,0 +1,178 @@
+"""
+Runs the live-caption sanitize/dedup stage on its own worker thread.
+
+The reader thread hands raw snapshots (or CaptionDeltas) to `CaptionPipeline.submit`;
+a worker thread runs them through `LiveDeduper` and calls `on_segment(text)` with each
+ready-to-insert segment. When the dedup holds a snapshot back for its debounce window,
+the worker wakes at the end of the window to process it, so a pause in speech never
+strands the last words. Nothing here touches Tk, so the GUI only has to insert
+finished text.
+
+The time spent in the dedup per snapshot is recorded as 'live_match' in `stats`
+(stage_stats.py), and held snapshots replaced by a newer one before being processed are
+counted as 'dropped_updates' (deltas held by the debounce window are merged, not
+dropped). `stop()` processes what is still queued, so nothing submitted before it is lost.
+
+Rather than one `root.after(0, ...)` per segment, segments go into an `UpdateQueue` that
+the Tk thread drains once per frame tick, so a burst becomes a single insert.
+
+Usage:
+    updates = UpdateQueue()
+    pipeline = CaptionPipeline(on_segment=updates.put)
+    reader.on_delta = pipeline.submit
+    pipeline.start()
+    ...
+    # on the Tk thread, every 1/frame_hz seconds:
+    segments = updates.drain()
+    ...
+    pipeline.stop()
+"""
+from collections import deque
+from queue import Queue, Empty
+from threading import Thread
+import time
+import traceback
+
+from live_dedup import LiveDeduper
+from stage_stats import StageStats
+
+_STOP = object()
+
+
+class CaptionPipeline:
+    def __init__(self, on_segment=None, dedup=None, clock=time.time, stats=None):
+        self.dedup = dedup if dedup is not None else LiveDeduper()
+        self.on_segment = on_segment  # callback(text), called on the worker thread
+        self.stats = stats if stats is not None else StageStats()
+        self._clock = clock
+        self._queue = Queue()
+        self._thread = None
+        # counters, for diagnostics
+        self.submitted = 0
+        self.emitted = 0
+
+    def submit(self, raw_text):
+        """Queue a raw snapshot or CaptionDelta. Safe to call from any thread, before or
+        after start()."""
+        self.submitted += 1
+        # timestamp on arrival so rate limiting doesn't depend on worker lag
+        self._queue.put((raw_text, self._clock()))
+
+    def start(self):
+        """Start processing; snapshots submitted earlier are processed first."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = Thread(target=self._run, name='caption-pipeline', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the worker once it has processed everything submitted so far. A snapshot
+        held by the debounce window stays in `dedup` (see LiveDeduper.flush).
+
+        Returns True once the worker has exited. If it is still busy after `timeout`
+        seconds it returns False and the worker keeps running; only then is `dedup` not
+        safe to touch from the calling thread, and stop() can be called again."""
+        if not self._thread:
+            return True
+        # queued behind the pending snapshots, so the worker gets to all of them first
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            return False
+        self._thread = None
+        return True
+
+    def process(self, raw_text, now=None):
+        """Run one snapshot through the stage synchronously; returns the segment or None."""
+        superseded = self.dedup.superseded
+        t0 = time.perf_counter()
+        seg = self.dedup.process(raw_text, now=now)
+        self.stats.record('live_match', time.perf_counter() - t0)
+        if self.dedup.superseded != superseded:
+            self.stats.count('dropped_updates')
+        if seg:
+            self.emitted += 1
+        return seg
+
+    def poll(self, now=None):
+        """Process a snapshot held by the debounce window if it is due; returns the segment."""
+        t0 = time.perf_counter()
+        seg = self.dedup.poll(now=now)
+        self.stats.record('live_match', time.perf_counter() - t0)
+        if seg:
+            self.emitted += 1
+        return seg
+
+    def _run(self):
+        while True:
+            due = self.dedup.next_due()
+            try:
+                if due is None:
+                    item = self._queue.get()
+                else:
+                    item = self._queue.get(timeout=max(0.0, due - self._clock()))
+            except Empty:
+                item = None
+            if item is _STOP:
+                return
+            try:
+                if item is None:
+                    seg = self.poll(now=self._clock())
+                else:
+                    raw_text, now = item
+                    seg = self.process(raw_text, now=now)
+                if seg and self.on_segment:
+                    self.on_segment(seg)
+            except Exception:
+                traceback.print_exc()
+            # let the Tk thread take the GIL between snapshots during bursts
+            time.sleep(0)
+
+
+class UpdateQueue:
+    """Thread-safe hand-off of finished segments to the UI thread.
+
+    Producers `put` from any thread; the UI thread calls `drain()` once per frame and
+    inserts everything pending at once.
+    """
+
+    def __init__(self):
+        self._items = deque()
+        # counters, for diagnostics
+        self.puts = 0
+        self.drains = 0       # drains that returned something
+        self.drained = 0      # items returned by those drains
+        self.max_depth = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def depth(self):
+        """Segments waiting for the next frame."""
+        return len(self._items)
+
+    @property
+    def merge_ratio(self):
+        """Average number of segments merged into one UI update."""
+        return self.drained / self.drains if self.drains else 0.0
+
+    def put(self, item):
+        self._items.append(item)
+        self.puts += 1
+        depth = len(self._items)
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def drain(self) -> list:
+        """Remove and return everything pending, oldest first."""
+        items = []
+        try:
+            while True:
+                items.append(self._items.popleft())
+        except IndexError:
+            pass
+        if items:
+            self.drains += 1
+            self.drained += len(items)
+        return items
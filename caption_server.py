@@ -0,0 +1,284 @@
+"""
+Local Server-Sent Events (SSE) stream of de-duplicated caption segments.
+
+Other tools (note-takers, a translation overlay) subscribe over HTTP instead of tailing
+the autosave file, and get every segment the moment the live de-dup stage emits it:
+
+    GET /events              text/event-stream, one event per segment
+    GET /events?since=SEQ    resume: first replay the retained segments after SEQ
+    GET /status              JSON: sequence number, clients, drops
+
+Each event carries the segment's sequence number as its SSE id and JSON data:
+
+    id: 42
+    data: {"seq": 42, "time": 1704443400.125, "text": "so the budget is signed off"}
+
+Browsers' EventSource reconnects by itself and sends the last id it saw as
+`Last-Event-ID`, which resumes like `since`. The last `history` segments are kept for
+resuming; if a client asks for older ones, it first gets a `gap` event naming the
+missing sequence numbers.
+
+The server runs its own asyncio loop on a daemon thread; `publish()` can be called from
+any thread (the pipeline worker) and only encodes the event once, however many clients
+there are. Each client has a bounded buffer of `buffer` events: a client that falls
+that far behind is disconnected rather than slowing the others or growing memory, and
+can resume with the id of the last event it received. Idle streams get a comment line
+every `keepalive` seconds so dead connections are noticed.
+
+The server binds to 127.0.0.1 only. Set `allow_origin` to let web pages from another
+origin read the stream (CORS); by default they cannot.
+
+Usage:
+    server = CaptionServer(port=8765)
+    server.start()
+    pipeline = CaptionPipeline(on_segment=server.publish)
+    ...
+    server.stop()
+
+    curl -N http://127.0.0.1:8765/events?since=0
+"""
+import asyncio
+from collections import deque
+import json
+from threading import Event, Lock, Thread
+import time
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_PORT = 8765
+_MAX_REQUEST = 8192
+
+
+def encode_event(seq, t, text) -> bytes:
+    data = json.dumps({'seq': seq, 'time': round(t, 3), 'text': text}, ensure_ascii=False)
+    return f"id: {seq}\ndata: {data}\n\n".encode('utf-8')
+
+
+class _Client:
+    __slots__ = ('writer', 'queue', 'task')
+
+    def __init__(self, writer, buffer):
+        self.writer = writer
+        self.queue = asyncio.Queue(buffer)
+        self.task = None
+
+
+class CaptionServer:
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT, buffer=256, history=1000,
+                 keepalive=15.0, max_clients=1000, allow_origin=None):
+        self.host = host
+        self.port = port            # 0 picks a free port; the bound port replaces it on start
+        self.buffer = buffer
+        self.keepalive = keepalive
+        self.max_clients = max_clients
+        self.allow_origin = allow_origin
+        self.seq = 0
+        self._history = deque(maxlen=history)   # (seq, encoded event), on the loop thread
+        self._sent_seq = 0                      # last seq handed to the clients
+        self._clients = set()
+        self._lock = Lock()
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._last_send = 0.0   # loop time of the last event or keepalive
+        # counters, for diagnostics
+        self.published = 0
+        self.connections = 0
+        self.resumed = 0
+        self.dropped_clients = 0
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def start(self):
+        """Bind and serve on a background thread; raises OSError if the port is taken."""
+        if self._thread is not None:
+            return
+        ready = Event()
+        error = []
+
+        def run():
+            loop = self._loop = asyncio.new_event_loop()
+            try:
+                self._server = loop.run_until_complete(asyncio.start_server(
+                    self._handle, self.host, self.port, limit=_MAX_REQUEST))
+                self.port = self._server.sockets[0].getsockname()[1]
+                keepalive = loop.create_task(self._keepalive())
+            except OSError as e:
+                error.append(e)
+                loop.close()
+                ready.set()
+                return
+            ready.set()
+            try:
+                loop.run_forever()
+                keepalive.cancel()
+                loop.run_until_complete(asyncio.gather(
+                    keepalive, *(c.task for c in self._clients), return_exceptions=True))
+            finally:
+                loop.close()
+
+        self._thread = Thread(target=run, name='caption-server', daemon=True)
+        self._thread.start()
+        ready.wait()
+        if error:
+            self._thread = None
+            raise error[0]
+
+    def stop(self, timeout=2.0):
+        """Close every stream and the listening socket."""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._shutdown)
+        thread.join(timeout=timeout)
+
+    def publish(self, text: str, t=None) -> int:
+        """Send a segment to every client; safe from any thread. Returns its sequence number."""
+        with self._lock:
+            self.seq += 1
+            seq = self.seq
+            event = encode_event(seq, time.time() if t is None else t, text)
+            loop = self._loop
+            if loop is not None and self._thread is not None:
+                loop.call_soon_threadsafe(self._fanout, seq, event)
+        return seq
+
+    def status(self) -> dict:
+        history = self._history.copy()
+        return {'seq': self.seq, 'oldest': history[0][0] if history else None,
+                'clients': self.clients, 'connections': self.connections,
+                'published': self.published, 'resumed': self.resumed,
+                'dropped_clients': self.dropped_clients}
+
+    # --- on the server loop ---
+
+    def _fanout(self, seq, event):
+        self._history.append((seq, event))
+        self._sent_seq = seq
+        self.published += 1
+        self._send(event)
+
+    def _send(self, event):
+        self._last_send = self._loop.time()
+        for client in list(self._clients):
+            try:
+                client.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # too far behind: cut it off, it can resume from its last id
+                self.dropped_clients += 1
+                self._drop(client)
+
+    def _drop(self, client):
+        self._clients.discard(client)
+        client.writer.transport.abort()
+        if client.task is not None:
+            client.task.cancel()
+
+    def _shutdown(self):
+        for client in list(self._clients):
+            client.writer.transport.abort()
+            client.task.cancel()
+        if self._server is not None:
+            self._server.close()
+        self._loop.stop()
+
+    async def _keepalive(self):
+        # a comment line on quiet streams, so dead connections are noticed
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(max(0.0, self._last_send + self.keepalive - loop.time()))
+            if loop.time() - self._last_send >= self.keepalive:
+                self._send(b': keepalive\n\n')
+
+    async def _handle(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout=5.0)
+            lines = head.decode('latin-1').split('\r\n')
+            method, target, _version = lines[0].split(' ', 2)
+            headers = {}
+            for line in lines[1:]:
+                name, sep, value = line.partition(':')
+                if sep:
+                    headers[name.strip().lower()] = value.strip()
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ValueError, ConnectionError):
+            writer.close()
+            return
+        url = urlsplit(target)
+        if method != 'GET':
+            await self._respond(writer, '405 Method Not Allowed', 'text/plain', b'GET only\n')
+        elif url.path == '/events':
+            await self._stream(reader, writer, url, headers)
+        elif url.path == '/status':
+            await self._respond(writer, '200 OK', 'application/json',
+                                json.dumps(self.status()).encode('utf-8'))
+        else:
+            await self._respond(writer, '404 Not Found', 'text/plain', b'try /events\n')
+
+    @staticmethod
+    async def _until_eof(reader):
+        # the client has nothing more to say; EOF means it went away
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            pass
+
+    def _headers(self, status, content_type, extra=''):
+        cors = f"Access-Control-Allow-Origin: {self.allow_origin}\r\n" if self.allow_origin else ''
+        return (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n{cors}{extra}"
+                f"Connection: close\r\n\r\n").encode('latin-1')
+
+    async def _respond(self, writer, status, content_type, body):
+        writer.write(self._headers(status, content_type, f"Content-Length: {len(body)}\r\n"))
+        writer.write(body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def _stream(self, reader, writer, url, headers):
+        if len(self._clients) >= self.max_clients:
+            await self._respond(writer, '503 Service Unavailable', 'text/plain', b'too many clients\n')
+            return
+        since = parse_qs(url.query).get('since', [headers.get('last-event-id')])[0]
+        try:
+            since = int(since) if since not in (None, '') else None
+        except ValueError:
+            since = None
+
+        self.connections += 1
+        client = _Client(writer, self.buffer)
+        client.task = asyncio.current_task()
+        writer.write(self._headers('200 OK', 'text/event-stream',
+                                   'Cache-Control: no-cache\r\nX-Accel-Buffering: no\r\n'))
+        writer.write(b'retry: 1000\n\n')
+        if since is not None:
+            # replay and subscribe without yielding, so no event is missed or repeated
+            self.resumed += 1
+            history = self._history
+            if since > self._sent_seq:
+                since = 0   # an id from before the server restarted
+            oldest = history[0][0] if history else self._sent_seq + 1
+            if since + 1 < oldest:
+                gap = json.dumps({'first': since + 1, 'last': oldest - 1})
+                writer.write(f"event: gap\ndata: {gap}\n\n".encode('utf-8'))
+            for seq, event in history:
+                if seq > since:
+                    writer.write(event)
+        self._clients.add(client)
+        hangup = asyncio.ensure_future(self._until_eof(reader))
+        hangup.add_done_callback(lambda f: f.cancelled() or client.task.cancel())
+        try:
+            while True:
+                event = await client.queue.get()
+                writer.write(event)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            hangup.cancel()
+            self._clients.discard(client)
+            writer.transport.abort()
@@ -0,0 +1,230 @@
+"""
+asyncio interface to LiveCaptionReader: `async for update in reader.stream()`.
+
+One `CaptionBroadcaster` per reader polls on the event loop and fans every caption
+change out to all of its subscribers, so any number of consumers share one poller and
+one set of UI Automation calls. The blocking part of a poll (`reader.poll_once`: locate,
+`window_text`, delta) runs on a single dedicated worker thread, which keeps the
+loop responsive and all COM calls on one thread. Between polls the broadcaster sleeps
+as the reader's PollPolicy says.
+
+Each subscriber gets a bounded queue. When a slow consumer's queue is full:
+
+    'drop_oldest'   the oldest queued update is discarded (counted in `dropped` and as
+                    'stream_dropped' in `reader.stats`); others are not held up
+    'wait'          the poller waits until this consumer catches up (backpressure)
+
+An update's `stable` / `tail` are relative to the update before it. A subscriber that
+missed updates (dropped, or subscribed mid-stream) gets its next one with `stable` 0, so
+`text[:stable]` is always text that subscriber has already seen.
+
+The poller starts with the first subscriber and stops when the last one leaves.
+Cancelling a consumer, or leaving its `async for`, unsubscribes it; `reader.stop()`
+ends every stream after its queued updates have been delivered. The thread poller
+(`reader.start()`) and streams cannot run at the same time.
+
+Usage:
+    reader = LiveCaptionReader(source=FakeSource(desktop))
+    async for update in reader.stream(maxsize=16):
+        print(update.seq, update.stable, update.tail)
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from live_caption_reader import CaptionDelta
+
+OVERFLOW = ('drop_oldest', 'wait')
+_CLOSED = object()
+
+
+class CaptionUpdate:
+    """One change of the caption text, as `on_delta` received it."""
+
+    __slots__ = ('seq', 'delta', 'time')
+
+    def __init__(self, seq, delta, time):
+        self.seq = seq      # 1, 2, ... per reader, never reused
+        self.delta = delta  # live_caption_reader.CaptionDelta
+        self.time = time    # time.time() when it was read
+
+    @property
+    def text(self) -> str:
+        """The full control text."""
+        return self.delta.text
+
+    @property
+    def stable(self) -> int:
+        """Length of the start of `text` that is unchanged since the previous update."""
+        return self.delta.stable
+
+    @property
+    def tail(self) -> str:
+        """The part of `text` that is new or revised."""
+        return self.delta.tail
+
+    def standalone(self):
+        """The same update with nothing taken as already seen."""
+        return CaptionUpdate(self.seq, CaptionDelta(self.text), self.time)
+
+    def __repr__(self):
+        return f"CaptionUpdate({self.seq}, {self.stable}, {self.tail!r})"
+
+
+class Subscription:
+    __slots__ = ('queue', 'overflow', 'closed', 'dropped')
+
+    def __init__(self, maxsize, overflow):
+        self.queue = asyncio.Queue(maxsize)
+        self.overflow = overflow
+        self.closed = False
+        self.dropped = 0
+
+
+class CaptionBroadcaster:
+    def __init__(self, reader):
+        self.reader = reader
+        self._loop = None
+        self._task = None
+        self._executor = None
+        self._subscribers = []
+        self.seq = 0
+        # counters, for diagnostics
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, maxsize=64, overflow='drop_oldest'):
+        """Async iterator of CaptionUpdates; subscribes when iteration starts."""
+        if overflow not in OVERFLOW:
+            raise ValueError(f"overflow must be one of {OVERFLOW}, not {overflow!r}")
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        return self._iterate(maxsize, overflow)
+
+    async def _iterate(self, maxsize, overflow):
+        sub = self._subscribe(Subscription(maxsize, overflow))
+        last = None
+        try:
+            while not (sub.closed and sub.queue.empty()):
+                update = await sub.queue.get()
+                if update is _CLOSED:
+                    return
+                if update.seq != (last or 0) + 1 and update.stable:
+                    # the previous text is not the one this subscriber saw last
+                    update = update.standalone()
+                last = update.seq
+                yield update
+        finally:
+            self._unsubscribe(sub)
+
+    def _subscribe(self, sub):
+        loop = asyncio.get_running_loop()
+        thread = self.reader._thread
+        if thread is not None and thread.is_alive():
+            raise RuntimeError('reader is already polling on its own thread (start())')
+        if loop is not self._loop:
+            if self.running:
+                raise RuntimeError('reader is already streaming on another event loop')
+            self._loop = loop
+        self._subscribers.append(sub)
+        if not self.running:
+            self._task = loop.create_task(self._run())
+        return sub
+
+    def _unsubscribe(self, sub):
+        if sub in self._subscribers:
+            self._subscribers.remove(sub)
+        if sub.overflow == 'wait':
+            # unblock a poller waiting for room in this queue
+            while not sub.queue.empty():
+                sub.queue.get_nowait()
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _uia_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='caption-uia')
+        return self._executor
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        reader = self.reader
+        policy = reader.policy
+        interval = policy.min_interval
+        while self._subscribers:
+            found, changed, delta = await loop.run_in_executor(self._uia_executor(), reader.poll_once)
+            if delta is not None:
+                self.seq += 1
+                await self._publish(CaptionUpdate(self.seq, delta, time.time()))
+            interval = policy.next_interval(interval, changed, found)
+            await asyncio.sleep(interval)
+
+    async def _publish(self, update):
+        self.published += 1
+        waits = []
+        for sub in self._subscribers:
+            q = sub.queue
+            if q.full():
+                if sub.overflow == 'wait':
+                    waits.append(q.put(update))
+                    continue
+                q.get_nowait()
+                sub.dropped += 1
+                self.dropped += 1
+                self.reader.stats.count('stream_dropped')
+            q.put_nowait(update)
+        if waits:
+            await asyncio.gather(*waits)
+
+    async def current_text(self, timeout=2.0, poll=0.15) -> str:
+        """The control's full text, retrying for up to `timeout` seconds ('' if not found)."""
+        reader = self.reader
+        if not reader.source.available():
+            return ""
+        loop = asyncio.get_running_loop()
+        end = loop.time() + max(0.0, float(timeout))
+        while True:
+            text = await loop.run_in_executor(self._uia_executor(), reader._read_control_text)
+            if text or loop.time() + poll > end:
+                return text
+            await asyncio.sleep(poll)
+
+    def close(self):
+        """End every stream and stop polling. Safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._shutdown_executor()
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._close()
+        else:
+            loop.call_soon_threadsafe(self._close)
+
+    def _close(self):
+        for sub in self._subscribers:
+            sub.closed = True
+            if not sub.queue.full():
+                sub.queue.put_nowait(_CLOSED)
+        self._subscribers = []
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._shutdown_executor()
+
+    def _shutdown_executor(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,133 @@
+"""
+Single-pass tokenizer shared by the live de-dup stage and the transcript cleaner.
+
+Both stages used to run their own chain of regex passes over the whole text (control
+tokens, whitespace collapse, repeated-word collapse, sentence split, a per-sentence
+normalization regex) and the live stage then lowercased and stripped every word again.
+`Tokenizer` splits the text once and hands both stages the same `Token`s:
+
+    raw    the word as shown                                   'Friday!'
+    key    live comparison key: lowercase, trailing .,!?;: cut  'friday'
+    word   cleaner comparison key: only a-z and 0-9 kept       'friday'
+    ends   a sentence ends after this word                     True
+
+Tokens are cached by their raw text, so a word seen before costs one dict lookup; a
+caption stream re-sends the same few hundred words over and over. Repeated words are
+collapsed on the token list with exactly the result of the old
+`re.sub(r"\\b(\\w+)(?:\\s+\\1\\b){n-1,}", r"\\1", ...)` over the whitespace-collapsed text.
+
+Usage:
+    tokens = tokenize("So the the plan is set. Ok then", min_repeat=2)
+    [t.raw for t in tokens]    # ['So', 'the', 'plan', 'is', 'set.', 'Ok', 'then']
+    [t.ends for t in tokens]   # [False, False, False, False, True, False, False]
+"""
+import re
+
+STRIP_CHARS = '.,!?;:'
+SENTENCE_END = ('.', '!', '?')
+_CONTROL_TOKEN_RE = re.compile(r"\binstructions\[LiveCaptions\]\s*\d+\b", re.IGNORECASE)
+_LEAD_RE = re.compile(r"\w*")
+_TAIL_RE = re.compile(r"\w*\Z")
+_WORD_RE = re.compile(r"[^a-z0-9]+")
+# distinct raw words cached before the cache is dropped and rebuilt
+_CACHE_SIZE = 100000
+
+
+def normalize_key(word: str) -> str:
+    """Comparison key for a caption word: lowercased, trailing punctuation removed."""
+    return word.lower().rstrip(STRIP_CHARS)
+
+
+class Token:
+    __slots__ = ('raw', 'key', 'word', 'ends', 'lead', 'tail', 'whole')
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        self.key = normalize_key(raw)
+        self.word = _WORD_RE.sub('', self.key)
+        self.ends = raw.endswith(SENTENCE_END)
+        # for the repeated-word collapse: the word characters (\w) the token starts and
+        # ends with, lowercased, and whether it is nothing but word characters
+        lead = _LEAD_RE.match(raw).group()
+        self.lead = lead.lower()
+        self.tail = _TAIL_RE.search(raw).group().lower()
+        self.whole = len(lead) == len(raw)
+
+    def __repr__(self):
+        return f"Token({self.raw!r})"
+
+
+class Tokenizer:
+    def __init__(self, cache_size=_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def token(self, raw: str) -> Token:
+        """The (cached) Token for one whitespace-free word."""
+        tok = self._cache.get(raw)
+        if tok is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache = {}
+            tok = self._cache[raw] = Token(raw)
+        return tok
+
+    def tokens(self, text: str, min_repeat=2, controls=False) -> list:
+        """Split `text` at whitespace and collapse runs of `min_repeat`+ repeated words.
+
+        `controls` also drops Live Captions control tokens (`instructions[LiveCaptions] N`).
+        """
+        if controls and '[' in text:
+            text = _CONTROL_TOKEN_RE.sub('', text)
+        cache = self._cache
+        toks = [cache.get(w) or self.token(w) for w in text.split()]
+        return self.collapse(toks, min_repeat) if min_repeat else toks
+
+    def collapse(self, toks: list, min_repeat=2) -> list:
+        """Collapse `min_repeat`+ consecutive repeats of a word (case-insensitive) to the first.
+
+        Like the regex, a repeat must match a whole word, and the last one may carry
+        trailing punctuation, which is kept: "the the." -> "the.". Returns `toks`
+        itself when nothing repeats.
+        """
+        if not any([a.tail == b.lead and a.tail for a, b in zip(toks, toks[1:])]):
+            return toks
+        out = []
+        n = len(toks)
+        copied = False
+        i = 0
+        while i < n:
+            t = toks[i]
+            tail = t.tail
+            if tail and i + 1 < n and toks[i + 1].lead == tail:
+                j = i + 1
+                while j < n and toks[j].whole and toks[j].lead == tail:
+                    j += 1
+                if j < n and toks[j].lead == tail:
+                    if j - i + 1 >= min_repeat:
+                        # the repeat carrying punctuation merges into t and may itself
+                        # start the next run
+                        if not copied:
+                            toks, copied = list(toks), True
+                        rest = toks[j].raw[_LEAD_RE.match(toks[j].raw).end():]
+                        toks[j] = self.token(t.raw + rest)
+                        i = j
+                        continue
+                elif j - i >= min_repeat:
+                    out.append(t)
+                    i = j
+                    continue
+            out.append(t)
+            i += 1
+        return out
+
+
+_shared = Tokenizer()
+
+
+def tokenize(text: str, min_repeat=2, controls=False) -> list:
+    """`Tokenizer.tokens` on the tokenizer shared by the live and cleaning stages."""
+    return _shared.tokens(text, min_repeat, controls)
+
+
+def shared() -> Tokenizer:
+    return _shared
@@ -0,0 +1,178 @@
+"""
+Bounded ("virtualized") transcript display for multi-hour sessions.
+
+A Tk Text widget gets slower to index, scroll and wrap as it grows, so
+`VirtualizedDisplay` keeps about `max_chars` characters in the widget. Once it holds
+`chunk_chars` more than that, the oldest text (cut at whitespace) is moved to a
+`SpillStore`. Scrolling to the top loads the most recently spilled chunk back in, one
+chunk at a time, keeping the view where it was. Text is only trimmed while the newest
+text is in view, so nothing is pulled away from under a reader who has scrolled back.
+
+`SpillStore` keeps spilled chunks in memory or, given a path, in an append-only file
+(the app puts it in the session's journal directory) with only their offsets in memory.
+
+Usage:
+    display = VirtualizedDisplay(scrolled_text, max_chars=200_000)
+    display.insert(tk.END, text)
+    full_text = display.get_all()
+"""
+import os
+
+# characters kept in the widget (0 keeps everything)
+DEFAULT_MAX_CHARS = 200_000
+# characters moved out or back in at a time
+DEFAULT_CHUNK_CHARS = 50_000
+
+
+class SpillStore:
+    """Stack of text chunks moved out of the display, oldest at the bottom."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self._chunks = []    # in memory: the chunks; on disk: (offset, length) pairs
+        self._file = None
+        if path is not None:
+            self._file = open(path, 'w+b')
+
+    def __len__(self):
+        return len(self._chunks)
+
+    def push(self, text: str):
+        if self._file is None:
+            self._chunks.append(text)
+            return
+        data = text.encode('utf-8')
+        self._file.seek(0, os.SEEK_END)
+        self._chunks.append((self._file.tell(), len(data)))
+        self._file.write(data)
+
+    def pop(self) -> str:
+        """Remove and return the most recently pushed chunk."""
+        if self._file is None:
+            return self._chunks.pop()
+        offset, length = self._chunks.pop()
+        self._file.seek(offset)
+        data = self._file.read(length)
+        self._file.truncate(offset)
+        return data.decode('utf-8')
+
+    def text(self) -> str:
+        """All chunks, oldest first."""
+        if self._file is None:
+            return ''.join(self._chunks)
+        self._file.seek(0)
+        return self._file.read().decode('utf-8')
+
+    def close(self, remove=True):
+        self._chunks = []
+        if self._file is not None:
+            try:
+                self._file.close()
+                if remove:
+                    os.remove(self.path)
+            except OSError:
+                pass
+            self._file = None
+
+
+class VirtualizedDisplay:
+    """Keeps a Text widget bounded, spilling its oldest text and loading it back on demand.
+
+    Appends should go through `insert`, followed by `trim()` once the view has been
+    scrolled; direct edits to the widget are fine, the character count is re-synced
+    before every trim.
+    """
+
+    def __init__(self, widget, max_chars=DEFAULT_MAX_CHARS, chunk_chars=DEFAULT_CHUNK_CHARS,
+                 scrollbar=None):
+        self.widget = widget
+        self.max_chars = max_chars
+        self.chunk_chars = max(1, chunk_chars)
+        self.spill_path = None  # file for the spill store, opened on the first spill
+        self.store = None
+        self._chars = 0
+        self._load_pending = False
+        # counters, for diagnostics
+        self.spills = 0
+        self.loads = 0
+        scrollbar = scrollbar if scrollbar is not None else getattr(widget, 'vbar', None)
+        self._set_scroll = scrollbar.set if scrollbar is not None else None
+        widget.configure(yscrollcommand=self._on_yscroll)
+
+    @property
+    def spilled(self):
+        return len(self.store) if self.store is not None else 0
+
+    def insert(self, index, text: str, *tags):
+        self.widget.insert(index, text, *tags)
+        self._chars += len(text)
+
+    def trim(self):
+        """Once the widget holds a chunk more than `max_chars`, spill the oldest text.
+
+        Does nothing unless the end of the text is in view.
+        """
+        if not self.max_chars or self._chars <= self.max_chars + self.chunk_chars:
+            return
+        if self.widget.yview()[1] < 0.99:
+            return
+        self._chars = self._count()
+        while self._chars > self.max_chars:
+            cut = self._boundary(self.chunk_chars)
+            text = self.widget.get('1.0', cut)
+            if not text:
+                break
+            if self.store is None:
+                self.store = SpillStore(self.spill_path)
+            self.store.push(text)
+            self.widget.delete('1.0', cut)
+            self._chars -= len(text)
+            self.spills += 1
+        self.widget.see('end')
+
+    def load_older(self) -> bool:
+        """Move the most recently spilled chunk back to the top of the widget."""
+        self._load_pending = False
+        if not self.spilled:
+            return False
+        text = self.store.pop()
+        w = self.widget
+        # the mark moves down with the text it sits on, so the view can be put back
+        w.mark_set('vd_top', '@0,0')
+        w.insert('1.0', text)
+        w.yview('vd_top')
+        w.mark_unset('vd_top')
+        self._chars += len(text)
+        self.loads += 1
+        return True
+
+    def get_all(self) -> str:
+        """The whole transcript: spilled text followed by what the widget shows."""
+        spilled = self.store.text() if self.store is not None else ''
+        return spilled + self.widget.get('1.0', 'end-1c')
+
+    def clear(self):
+        """Empty the widget and drop everything spilled."""
+        self.widget.delete('1.0', 'end')
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        self._chars = 0
+
+    def _count(self) -> int:
+        n = self.widget.count('1.0', 'end-1c', 'chars')
+        if isinstance(n, tuple):
+            n = n[0]
+        return n or 0
+
+    def _boundary(self, n):
+        idx = self.widget.index(f'1.0 + {n} chars')
+        ws = self.widget.search(r'\s', idx, stopindex='end', regexp=True)
+        return f'{ws} + 1 chars' if ws else idx
+
+    def _on_yscroll(self, first, last):
+        if self._set_scroll is not None:
+            self._set_scroll(first, last)
+        if float(first) <= 0.0 and self.spilled and not self._load_pending:
+            self._load_pending = True
+            self.widget.after_idle(self.load_older)
@@ -1,18 +1,72 @@
+import startup_profile
+if startup_profile.requested():
+    # before the other imports, so they are timed too
+    startup_profile.start()
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 from datetime import datetime
 import os
 import sys
 from app_meta import load as load_meta
-try:
-    from live_caption_reader import LiveCaptionReader
-except Exception:
-    LiveCaptionReader = None
+from live_dedup import LiveDeduper
+from caption_pipeline import CaptionPipeline, UpdateQueue
+import text_cleaner
+from transcript_writer import TranscriptWriter, write_atomic
+from threading import Thread
+from caption_view import VirtualizedDisplay
+from stage_stats import StageStats, stats_path
+import time
 import re
 import ctypes
-import time
+
+# The capture backend (live_caption_reader, and pywinauto/comtypes with it) is imported
+# on the first Start Captioning so the window appears sooner; see _load_backend. The
+# session journal, subtitles, tracing (tracemalloc) and the search index (sqlite3) are
+# likewise imported where they are first used.
+LiveCaptionReader = None
+PollPolicy = None
+
+
+def _load_backend() -> bool:
+    global LiveCaptionReader, PollPolicy
+    if LiveCaptionReader is None:
+        try:
+            from live_caption_reader import LiveCaptionReader, PollPolicy
+        except Exception:
+            return False
+    return True
+
 
 class CaptionerApp:
+    # shown words remembered for live de-dup; must exceed the words in one snapshot
+    live_lookback_words = 1024
+    # debounce window for live updates (seconds); the latest snapshot inside it is
+    # processed when it ends, so lowering it cuts latency without losing text
+    live_debounce = 0.5
+    # share of a sentence's words seen in an earlier one for clean_text to drop it
+    near_dup_threshold = text_cleaner.NEAR_DUP_THRESHOLD
+    # reader polling: 'low_latency', 'balanced' or 'low_cpu' (see PollPolicy)
+    poll_policy = 'balanced'
+    # autosave commits: 'none', 'flush' or 'fsync' every autosave_commit_delay seconds
+    autosave_sync = 'flush'
+    autosave_commit_delay = 0.5
+    # seconds between live-dedup checkpoints in the session journal
+    journal_checkpoint_interval = 30.0
+    # characters kept in the caption widget; older text is spilled and loaded back on
+    # scroll-back (0 keeps the whole session in the widget)
+    display_max_chars = 200_000
+    display_spill_chunk = 50_000
+    # times per second new segments are inserted; a burst becomes one insert
+    ui_frame_hz = 25
+    # with --trace / OCAPTION_TRACE: seconds between tracemalloc snapshots
+    # (session_trace.DEFAULT_SNAPSHOT_INTERVAL)
+    trace_snapshot_interval = 300.0
+    # localhost port streaming de-duplicated segments as Server-Sent Events to other
+    # tools (see caption_server); None turns the server off
+    serve_port = None
+    # subtitle files written next to the transcript as segments arrive: 'srt', 'vtt'
+    subtitle_formats = ()
+
     def __init__(self, root):
         self.root = root
         # Determine base directory (supports PyInstaller one-file exe)
@@ -44,9 +98,40 @@ class CaptionerApp:
         self.caption_text = ""
         self.autosave_enabled = False
         self.autosave_path = None
+        # background writer for autosave_path while recording
+        self._autosave_writer = None
+        # crash-safe journal of the session (see session_journal); recovered on launch
+        self._journal = None
+        # sanitize/dedup state for live caption snapshots (see on_live_text)
+        self._live_dedup = LiveDeduper(window=self.live_lookback_words,
+                                       min_interval=self.live_debounce)
+        # runs _live_dedup on a worker thread while captioning
+        self._pipeline = None
+        # segments from the pipeline waiting for the next UI frame
+        self._updates = None
+        # cleans the transcript as it is displayed so stopping only flushes the tail
+        self._stream_cleaner = None
+        # per-stage timings of the current (or last) session, see stage_stats
+        self._stats = None
+        # Chrome trace + tracemalloc snapshots of each session (opt-in, see session_trace)
+        self._trace = None
+        # SSE caption stream; started with the first session, kept until the window closes
+        self._server = None
+        # subtitle_export.SubtitleWriters of the current session
+        self._subtitles = []
 
         # Setup UI
         self.setup_ui()
+        # make sure the autosave is committed when the window is closed mid-session
+        try:
+            self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        except Exception:
+            pass
+        # finish sessions left unfinished by a crash
+        try:
+            self.root.after(200, self.recover_unfinished_sessions)
+        except Exception:
+            pass
         
     def setup_ui(self):
         """Setup the GUI components"""
@@ -112,6 +197,9 @@ class CaptionerApp:
             bg="#f0f0f0"
         )
         self.caption_display.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        # bounds the widget so inserts and scrolling stay fast in long sessions
+        self._display = VirtualizedDisplay(self.caption_display, max_chars=self.display_max_chars,
+                                           chunk_chars=self.display_spill_chunk)
 
         # autosave widgets are shown in the control button frame
 
@@ -130,10 +218,127 @@ class CaptionerApp:
         self.autoscroll_chk = ttk.Checkbutton(action_frame, text="Auto-scroll", variable=self.autoscroll_var)
         self.autoscroll_chk.pack(side=tk.LEFT, padx=5)
 
+        # Search across saved transcripts
+        self.search_btn = ttk.Button(action_frame, text="Search Transcripts...", command=self.open_search)
+        self.search_btn.pack(side=tk.LEFT, padx=5)
+
+        # Per-stage latency of the capture path
+        self.stats_btn = ttk.Button(action_frame, text="Stats...", command=self.open_stats)
+        self.stats_btn.pack(side=tk.LEFT, padx=5)
+
         # Export buttons removed by request
         
     # device enumeration removed; Live Captions is the only input source
 
+    def open_search(self):
+        """Open the transcript search window (see transcript_index)."""
+        import transcript_index  # sqlite3 is only loaded once it is needed
+        win = tk.Toplevel(self.root)
+        win.title("Search Transcripts")
+        win.geometry("640x400")
+
+        bar = ttk.Frame(win)
+        bar.pack(fill=tk.X, padx=8, pady=8)
+        query_var = tk.StringVar()
+        entry = ttk.Entry(bar, textvariable=query_var)
+        entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        status_var = tk.StringVar(value="Updating index...")
+        ttk.Label(win, textvariable=status_var).pack(anchor=tk.W, padx=8)
+
+        results = tk.Listbox(win, font=("Courier", 9))
+        results.pack(fill=tk.BOTH, expand=True, padx=8, pady=(4, 8))
+        hits = []
+        # the index is opened and synced on a background thread; the Tk thread only
+        # queries it, through a read-only connection opened once that is done
+        reader = []
+        waiting = []    # a search asked for before the index was ready
+
+        def run_search(event=None):
+            if not reader:
+                waiting[:] = [True]
+                status_var.set("Updating index... (searching when done)")
+                return
+            try:
+                found = reader[0].search(query_var.get(), limit=100)
+            except Exception as e:
+                status_var.set(f"Search failed: {e}")
+                return
+            hits[:] = found
+            results.delete(0, tk.END)
+            for h in found:
+                results.insert(tk.END, f"{h.timestamp}  {h.snippet}")
+            status_var.set(f"{len(found)} result(s)")
+
+        def open_hit(event=None):
+            sel = results.curselection()
+            if sel:
+                try:
+                    os.startfile(hits[sel[0]].path)
+                except Exception:
+                    pass
+
+        def ready(msg, ok):
+            status_var.set(msg)
+            if not ok or not win.winfo_exists():
+                return
+            try:
+                reader.append(transcript_index.TranscriptIndex(self._transcript_dir, readonly=True))
+            except Exception as e:
+                status_var.set(f"Index unavailable: {e}")
+                return
+            if waiting:
+                run_search()
+
+        def closed(event):
+            if event.widget is win and reader:
+                reader.pop().close()
+
+        ttk.Button(bar, text="Search", command=run_search).pack(side=tk.LEFT, padx=(6, 0))
+        entry.bind('<Return>', run_search)
+        results.bind('<Double-Button-1>', open_hit)
+        win.bind('<Destroy>', closed)
+        entry.focus_set()
+
+        # bring the index up to date with files changed since it was last used
+        def sync():
+            try:
+                with transcript_index.TranscriptIndex(self._transcript_dir) as index:
+                    indexed, removed, unchanged = index.sync()
+                msg, ok = f"Index up to date ({indexed + unchanged} transcripts)", True
+            except Exception as e:
+                msg, ok = f"Index unavailable: {e}", False
+            try:
+                self.root.after(0, ready, msg, ok)
+            except Exception:
+                pass
+
+        Thread(target=sync, name='transcript-index', daemon=True).start()
+
+    def open_stats(self):
+        """Open a window showing the session's per-stage latencies, refreshed every second."""
+        win = tk.Toplevel(self.root)
+        win.title("Capture Stats")
+        win.geometry("560x360")
+        view = tk.Text(win, font=("Courier", 9), wrap=tk.NONE)
+        view.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+
+        def refresh():
+            try:
+                if not win.winfo_exists():
+                    return
+                stats = self._stats
+                updates = self._updates
+                if stats is not None and updates is not None:
+                    stats.set('ui_queue_max_depth', updates.max_depth)
+                    stats.set('ui_merge_ratio', round(updates.merge_ratio, 2))
+                view.delete('1.0', tk.END)
+                view.insert('1.0', stats.report() if stats is not None else "No session yet.")
+                win.after(1000, refresh)
+            except Exception:
+                pass
+
+        refresh()
+
     def start_windows_live_captions(self):
         """Attempt to trigger Windows Live Captions via Win+Ctrl+L keypress.
 
@@ -242,7 +447,7 @@ class CaptionerApp:
     
     def start_recording(self):
         """Start reading Windows Live Captions (only input)."""
-        if LiveCaptionReader is None:
+        if not _load_backend():
             messagebox.showerror("Error", "Live Captions reader not available (pywinauto missing)")
             return
 
@@ -262,28 +467,43 @@ class CaptionerApp:
         # Clear transcript window and live-state for a fresh session
         try:
             try:
-                self.caption_display.delete(1.0, tk.END)
+                self._display.clear()
             except Exception:
                 pass
             self.caption_text = ""
+            self._stream_cleaner = text_cleaner.StreamingCleaner(self.near_dup_threshold)
             try:
-                self._live_shown_text = ''
-            except Exception:
-                pass
-            try:
-                self._last_live_update = 0
+                self._live_dedup.reset()
             except Exception:
                 pass
         except Exception:
             pass
 
         try:
-            self.lc_reader = LiveCaptionReader()
-            self.lc_reader.on_change = lambda t: self.root.after(0, self.on_live_text, t)
+            # Snapshots are sanitized on the pipeline's worker thread; finished segments
+            # are queued and inserted once per UI frame. The worker starts once the
+            # initial text below has been seeded, so early snapshots wait in its queue.
+            stats = self._stats = StageStats()
+            updates = UpdateQueue()
+            self._caption_server()
+
+            def on_segment(seg, put=updates.put):
+                put(seg)
+                self._segment_committed(seg)
+            pipeline = CaptionPipeline(on_segment=on_segment, dedup=self._live_dedup, stats=stats)
+            self._pipeline = pipeline
+            self._updates = updates
+            self.lc_reader = LiveCaptionReader(policy=PollPolicy.preset(self.poll_policy),
+                                               stats=stats)
+            self.lc_reader.on_delta = pipeline.submit
             self._live_active = True
             if not self.caption_display.get(1.0, tk.END).strip():
                 self.caption_display.insert(tk.END, "\n")
 
+            # open the autosave file, journal and subtitles before the reader can queue
+            # snapshots, so the worker never finishes a segment with nowhere to write it
+            self._open_session_files()
+
             # Start the reader thread so it can detect the control if opened shortly after.
             try:
                 self.lc_reader.start()
@@ -321,13 +541,34 @@ class CaptionerApp:
                         self.append_caption(caption_line, replace_last=False)
                         self.caption_text += caption_line
                         try:
-                            self._live_shown_text = initial_text
+                            self._live_dedup.seed(initial_text)
                         except Exception:
-                            self._live_shown_text = ''
-                        self._last_live_update = time.time()
+                            self._live_dedup.reset()
+                        # journaled after the seed, so a checkpoint's dedup state includes
+                        # it; the worker hasn't started yet, so nothing comes before it
+                        now = time.time()
+                        if self._journal is not None:
+                            self._journal.append_text(caption_line, t=now)
+                        # the first cue, as export_journal makes it from the journaled line
+                        for subs in self._subtitles:
+                            subs.add(initial_text, now)
             except Exception:
                 pass
+
+            pipeline.start()
+            self.root.after(self._frame_ms(), self._drain_updates, updates)
         except Exception as e:
+            self._close_autosave_writer()
+            journal, self._journal = self._journal, None
+            if journal is not None:
+                journal.close()
+            subtitles, self._subtitles = self._subtitles, []
+            for subs in subtitles:
+                try:
+                    subs.close()
+                except Exception:
+                    pass
+            self.autosave_enabled = False
             messagebox.showerror("Error", f"Failed to start Live Captions reader:\n{e}")
             return
 
@@ -335,17 +576,58 @@ class CaptionerApp:
         self.stop_btn.config(state=tk.NORMAL)
         self.status_var.set("Reading Windows Live Captions...")
 
-        # Setup autosave file in transcript folder
         try:
-            ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+            import session_trace  # tracemalloc is only loaded once a session starts
+            if session_trace.requested() and self.autosave_path:
+                trace = session_trace.SessionTrace(os.path.splitext(self.autosave_path)[0],
+                                                   snapshot_interval=self.trace_snapshot_interval)
+                trace.start()
+                self._trace = trace
+                self._stats.tracer = trace
+                self.status_var.set("Reading Windows Live Captions... (tracing)")
+        except Exception:
+            self._trace = None
+    
+    def _open_session_files(self):
+        """Open the new session's autosave file (in the transcript folder), journal and
+        subtitle files."""
+        ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+        try:
             self.autosave_path = os.path.join(self._transcript_dir, f"{ts}.txt")
-            with open(self.autosave_path, 'a', encoding='utf-8') as f:
-                f.write(f"[Recording started {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]\n")
+            self._autosave_writer = TranscriptWriter(
+                self.autosave_path, max_delay=self.autosave_commit_delay, sync=self.autosave_sync,
+                stats=self._stats)
+            self._autosave_writer.write(f"[Recording started {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]\n")
             self.autosave_enabled = True
         except Exception:
             self.autosave_enabled = False
             self.autosave_path = None
-    
+        # spilled display text goes in the journal directory, or in memory without one
+        self._display.spill_path = None
+        try:
+            if self.autosave_enabled:
+                import session_journal
+                self._journal = session_journal.SessionJournal.create(
+                    self._transcript_dir, ts, state_fn=self._live_dedup.state,
+                    checkpoint_interval=self.journal_checkpoint_interval,
+                    sync=self.autosave_sync, max_delay=self.autosave_commit_delay,
+                    # cleaned as it goes, so recovery only cleans the text after a checkpoint
+                    cleaner=text_cleaner.StreamingCleaner(self.near_dup_threshold))
+                self._display.spill_path = os.path.join(self._journal.directory, 'display.spill')
+        except Exception:
+            self._journal = None
+        try:
+            if self.autosave_path and self.subtitle_formats:
+                from subtitle_export import SubtitleWriter
+                root = os.path.splitext(self.autosave_path)[0]
+                origin = self._journal.started if self._journal is not None else None
+                self._subtitles = [SubtitleWriter(f"{root}.{fmt}", fmt, origin=origin,
+                                                  sync=self.autosave_sync,
+                                                  commit_delay=self.autosave_commit_delay)
+                                   for fmt in self.subtitle_formats]
+        except Exception:
+            self._subtitles = []
+
     def append_caption(self, text, replace_last=False):
         """Append or replace the last live-caption block.
 
@@ -372,7 +654,7 @@ class CaptionerApp:
 
                 if last_line_start is None:
                     # just insert
-                    self.caption_display.insert(tk.END, text)
+                    self._display.insert(tk.END, text)
                 else:
                     try:
                         # delete the last line
@@ -380,7 +662,7 @@ class CaptionerApp:
                     except Exception:
                         pass
                     # insert new live text followed by newline
-                    self.caption_display.insert(tk.END, text)
+                    self._display.insert(tk.END, text)
             else:
                 # Normal append — if live is active, insert the permanent text above the live line
                 try:
@@ -391,31 +673,48 @@ class CaptionerApp:
                             insert_pos = tk.END
                         # insert the permanent caption before the live line
                         try:
-                            self.caption_display.insert(insert_pos, text)
+                            self._display.insert(insert_pos, text)
                         except Exception:
-                            self.caption_display.insert(tk.END, text)
+                            self._display.insert(tk.END, text)
                     else:
-                        self.caption_display.insert(tk.END, text)
+                        self._display.insert(tk.END, text)
                 except Exception:
-                    self.caption_display.insert(tk.END, text)
+                    self._display.insert(tk.END, text)
 
             if was_at_bottom:
                 try:
                     self.caption_display.see(tk.END)
                 except Exception:
                     pass
+            # spill the oldest text once the widget is over its size budget
+            try:
+                self._display.trim()
+            except Exception:
+                pass
+
+            # Keep the incremental cleaner in step with the display. A replaced line
+            # can't be taken back out of it, so fall back to batch cleaning on stop.
+            try:
+                if self._stream_cleaner is not None:
+                    if replace_last:
+                        self._stream_cleaner = None
+                    else:
+                        self._stream_cleaner.feed(text)
+            except Exception:
+                self._stream_cleaner = None
 
             # Autosave: append new content to transcript file
             try:
-                if self.autosave_enabled and self.autosave_path and not replace_last:
-                    with open(self.autosave_path, 'a', encoding='utf-8') as f:
-                        f.write(text)
+                if self.autosave_enabled and self._autosave_writer and not replace_last:
+                    # queued; the writer thread commits in groups
+                    self._autosave_writer.write(text)
             except Exception:
                 pass
         except Exception:
-            # best-effort append
+            # best-effort append; the display may now differ from what was cleaned
+            self._stream_cleaner = None
             try:
-                self.caption_display.insert(tk.END, text)
+                self._display.insert(tk.END, text)
                 try:
                     if getattr(self, 'autoscroll_var', tk.BooleanVar(value=True)).get():
                         self.caption_display.see(tk.END)
@@ -436,10 +735,45 @@ class CaptionerApp:
                     self.lc_reader.stop()
                 except Exception:
                     pass
+                if self._stats is not None:
+                    self._stats.set('reader_polls', self.lc_reader.polls)
+                    self._stats.set('reader_changes', self.lc_reader.changes)
                 self.lc_reader = None
         except Exception:
             pass
 
+        # stop the sanitize/dedup worker once it has processed the queued snapshots;
+        # finished segments still waiting for a frame are inserted now
+        stopped = True
+        try:
+            if self._pipeline is not None:
+                stopped = self._pipeline.stop()
+        except Exception:
+            stopped = False
+        self._pipeline = None
+        updates, self._updates = self._updates, None
+        if updates is not None:
+            try:
+                # a snapshot still inside the debounce window holds the last words; a
+                # worker that is still running owns the deduper, so it is left alone
+                seg = self._live_dedup.flush() if stopped else None
+                if seg:
+                    updates.put(seg)
+                    self._segment_committed(seg)
+            except Exception:
+                pass
+            self._insert_segments(updates.drain())
+            if self._stats is not None:
+                self._stats.set('ui_queue_max_depth', updates.max_depth)
+                self._stats.set('ui_merge_ratio', round(updates.merge_ratio, 2))
+        # the pipeline has stopped: write the last subtitle cue
+        subtitles, self._subtitles = self._subtitles, []
+        for subs in subtitles:
+            try:
+                subs.close()
+            except Exception:
+                pass
+
         self.start_btn.config(state=tk.NORMAL)
         self.stop_btn.config(state=tk.DISABLED)
         # no device controls to re-enable (Live Captions only)
@@ -449,31 +783,44 @@ class CaptionerApp:
         # finalize autosave
         try:
             if self.autosave_enabled and self.autosave_path:
-                # append stopped marker
+                # append stopped marker and commit everything before the file is rewritten
                 try:
-                    with open(self.autosave_path, 'a', encoding='utf-8') as f:
-                        f.write(f"\n[Recording stopped {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]\n")
+                    self._autosave_writer.write(f"\n[Recording stopped {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]\n")
                 except Exception:
                     pass
+                self._close_autosave_writer()
 
                 # Use the same cleaning logic as Export Cleaned but write silently to the autosave file
                 try:
-                    display_text = self.caption_display.get(1.0, tk.END).strip()
-                    cleaned = self.clean_text(display_text)
+                    cleaner = self._stream_cleaner
+                    self._stream_cleaner = None
+                    if cleaner is not None:
+                        # everything but the last partial sentence is already cleaned
+                        cleaned = cleaner.finish()
+                    else:
+                        display_text = self._display.get_all().strip()
+                        cleaned = self.clean_text(display_text)
 
-                    # If cleaning the display produced nothing, fallback to cleaning the raw autosave content
-                    if not cleaned:
+                        # If cleaning the display produced nothing, fallback to cleaning the raw autosave content
+                        if not cleaned:
+                            try:
+                                with open(self.autosave_path, 'r', encoding='utf-8') as f:
+                                    raw = f.read()
+                                cleaned = self.clean_text(raw)
+                            except Exception:
+                                cleaned = ''
+
+                    if cleaned:
                         try:
-                            with open(self.autosave_path, 'r', encoding='utf-8') as f:
-                                raw = f.read()
-                            cleaned = self.clean_text(raw)
+                            # temp file + rename: a crash mid-write leaves the raw autosave
+                            write_atomic(self.autosave_path, cleaned)
                         except Exception:
-                            cleaned = ''
+                            pass
 
-                    if cleaned:
                         try:
-                            with open(self.autosave_path, 'w', encoding='utf-8') as f:
-                                f.write(cleaned)
+                            import transcript_index
+                            transcript_index.index_in_background(self._transcript_dir,
+                                                                 [self.autosave_path])
                         except Exception:
                             pass
 
@@ -493,104 +840,158 @@ class CaptionerApp:
         except Exception:
             pass
         finally:
+            self._close_autosave_writer()
+            journal, self._journal = self._journal, None
+            if journal is not None:
+                try:
+                    journal.finish(self.autosave_path)
+                except Exception:
+                    pass
+            # per-stage timings of the session, next to its transcript
+            try:
+                if self._stats is not None and self.autosave_path:
+                    self._stats.dump(stats_path(self.autosave_path))
+            except Exception:
+                pass
+            trace, self._trace = self._trace, None
+            if trace is not None:
+                try:
+                    self._stats.tracer = None
+                    trace.stop()
+                except Exception:
+                    pass
             self.autosave_enabled = False
             self.autosave_path = None
+            self._stream_cleaner = None
+            # text spilled from now on must not go into this session's journal directory
+            # (a store already open keeps its file until the display is cleared)
+            self._display.spill_path = None
+
+    def _close_autosave_writer(self):
+        writer, self._autosave_writer = self._autosave_writer, None
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
 
-    def on_live_text(self, raw_text):
-        """Sanitize live caption updates - accumulative append strategy.
+    def recover_unfinished_sessions(self):
+        """Write the cleaned transcript of sessions a crash left unfinished.
 
-        Live Captions sends full transcript repeatedly. Strategy:
-        - Track all text we've already shown
-        - Extract only words that haven't been displayed yet
-        - Append new content (don't replace)
-        - Rate limit to prevent spam (max 2 updates/sec)
+        Runs in the background; each session's text is read back from its journal.
         """
+        def run():
+            import session_journal
+            import transcript_index
+            journal = self._journal
+            skip = (journal.directory,) if journal is not None else ()
+            recovered = session_journal.finalize_unfinished(
+                self._transcript_dir, self.near_dup_threshold, skip=skip)
+            if recovered:
+                transcript_index.index_in_background(self._transcript_dir, recovered)
+                try:
+                    self.root.after(0, self.status_var.set,
+                                    f"Recovered {len(recovered)} unfinished session(s): "
+                                    f"{os.path.basename(recovered[-1])}")
+                except Exception:
+                    pass
+
+        Thread(target=run, name='session-recovery', daemon=True).start()
+
+    def on_close(self):
+        """Window close: finish a running session (committing the autosave) and exit."""
         try:
-            import time
-            
-            if not raw_text or len(raw_text.strip()) < 5:
-                return
+            if self.autosave_enabled or getattr(self, 'lc_reader', None):
+                self.stop_recording()
+        except Exception:
+            pass
+        try:
+            if self._server is not None:
+                self._server.stop()
+                self._server = None
+        except Exception:
+            pass
+        try:
+            self.root.destroy()
+        except Exception:
+            pass
 
-            # Rate limiting: skip if updated too recently (within 500ms)
-            now = time.time()
-            last_update = getattr(self, '_last_live_update', 0)
-            if now - last_update < 0.5:
-                return
+    def _segment_committed(self, seg):
+        """Pipeline worker: journal a finished segment and hand it to the caption server
+        and subtitles.
 
-            s = raw_text.strip()
+        The journal is written here rather than when the Tk thread inserts the text, so
+        its checkpoints read the dedup state on the thread that changes it, right after
+        the text that state includes.
+        """
+        captured = self._live_dedup.captured_at
+        journal = self._journal
+        if journal is not None:
+            try:
+                journal.append_text(seg + " ", t=captured)
+            except Exception:
+                pass
+        if self._server is not None:
+            self._server.publish(seg)
+        for subs in self._subtitles:
+            try:
+                subs.add(seg, captured)
+            except Exception:
+                pass
 
-            # remove control tokens and normalize
-            s = re.sub(r"\binstructions\[LiveCaptions\]\s*\d+\b", "", s, flags=re.IGNORECASE)
-            s = re.sub(r"\s+", " ", s).strip()
+    def _caption_server(self):
+        """The running caption server if `serve_port` is set, started on first use."""
+        if self._server is None and self.serve_port is not None:
+            try:
+                import caption_server  # asyncio is only loaded when serving
+                server = caption_server.CaptionServer(port=self.serve_port)
+                server.start()
+                self._server = server
+            except Exception as e:
+                self.status_var.set(f"Caption server not started: {e}")
+        return self._server
 
-            # collapse repeated consecutive words
-            s = re.sub(r"\b(\w+)(?:\s+\1\b){2,}", r"\1", s, flags=re.IGNORECASE)
+    def on_live_text(self, raw_text):
+        """Sanitize live caption updates - accumulative append strategy.
 
-            if len(s) < 8:
-                return
+        Only words not displayed yet are appended (see live_dedup.LiveDeduper). While
+        captioning this runs on the CaptionPipeline worker instead; this synchronous
+        path is kept for callers that feed snapshots directly.
+        """
+        try:
+            seg = self._live_dedup.process(raw_text)
+            if seg:
+                self._segment_committed(seg)
+            self.on_live_segment(seg)
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
 
-            # Track cumulative shown text (all words we've displayed)
-            shown_text = getattr(self, '_live_shown_text', '')
-            
-            if shown_text:
-                # Compare word-by-word to find where shown text ends and new begins
-                shown_words = shown_text.split()
-                curr_words = s.split()
-                
-                # Find where current text matches end of shown text
-                # (Live Captions might edit, so check if shown is a subsequence)
-                match_idx = 0
-                if len(shown_words) > 0:
-                    # Find where shown_words appear in curr_words
-                    for i in range(len(curr_words)):
-                        # Check if remaining curr_words start with a suffix of shown_words
-                        for j in range(len(shown_words)):
-                            tail_shown = shown_words[j:]
-                            if i + len(tail_shown) <= len(curr_words):
-                                matches = all(
-                                    tail_shown[k].lower().rstrip('.,!?;:') == 
-                                    curr_words[i+k].lower().rstrip('.,!?;:')
-                                    for k in range(len(tail_shown))
-                                )
-                                if matches:
-                                    match_idx = i + len(tail_shown)
-                                    break
-                        if match_idx > 0:
-                            break
-                
-                # Extract new words
-                if match_idx < len(curr_words):
-                    new_words = curr_words[match_idx:]
-                else:
-                    # No new content found
-                    return
-                
-                new_text = ' '.join(new_words).strip()
-                
-                # Only append if substantial (3+ words)
-                if len(new_words) < 3:
-                    return
-                
-                display_text = new_text
-                
-                # Update cumulative shown text
-                self._live_shown_text = shown_text + ' ' + new_text
-            else:
-                # First update - show last ~10 words
-                words = s.split()
-                if len(words) > 10:
-                    display_text = ' '.join(words[-10:])
-                else:
-                    display_text = s
-                
-                self._live_shown_text = display_text
+    def _frame_ms(self):
+        return max(1, int(1000 / max(1, self.ui_frame_hz)))
 
-            # Update timestamp
-            self._last_live_update = now
-            
+    def _drain_updates(self, updates):
+        """Frame tick: insert every segment queued since the last one, then reschedule."""
+        if updates is not self._updates:
+            return  # session stopped
+        try:
+            self._insert_segments(updates.drain())
+        finally:
+            self.root.after(self._frame_ms(), self._drain_updates, updates)
+
+    def _insert_segments(self, segments):
+        # one insert, one autoscroll decision and one writer hand-off per frame
+        if segments:
+            t0 = time.perf_counter()
+            self.on_live_segment(' '.join(segments))
+            if self._stats is not None:
+                self._stats.record('ui_insert', time.perf_counter() - t0)
+
+    def on_live_segment(self, display_text):
+        """Append a sanitized, de-duplicated segment to the transcript."""
+        try:
             # Append new text (not replace - we're building a transcript)
-            display_text = display_text.strip()
-            if display_text and len(display_text) > 5:
+            if display_text:
                 # Remove the _live_active flag so we append normally
                 was_live = getattr(self, '_live_active', False)
                 self._live_active = False
@@ -603,71 +1004,34 @@ class CaptionerApp:
     
     def clear_captions(self):
         """Clear all captions"""
-        self.caption_display.delete(1.0, tk.END)
+        self._display.clear()
         self.caption_text = ""
+        if self._stream_cleaner is not None:
+            self._stream_cleaner = text_cleaner.StreamingCleaner(self.near_dup_threshold)
 
     def clean_text(self, raw_text: str) -> str:
         """Remove repeated words and near-duplicate sentences from text.
 
-        - Collapses repeated words (e.g., "in in", "the the")
-        - Deduplicates sentences by normalized form
-        - Skips near-duplicates with high token overlap
+        See text_cleaner.clean_text; StreamingCleaner is the incremental equivalent.
         """
-        if not raw_text:
-            return ""
-
-        # Remove known Live Captions default/placeholder messages that appear when
-        # there's no audio. Keep this list conservative; match case-insensitively.
-        try:
-            noise_patterns = [
-                r"Ready to show live captions in [^\r\n]*",
-            ]
-            for pat in noise_patterns:
-                raw_text = re.sub(pat, "", raw_text, flags=re.IGNORECASE)
-        except Exception:
-            pass
-
-        s = re.sub(r"\s+", " ", raw_text).strip()
-        # collapse repeated consecutive words (case-insensitive)
-        s = re.sub(r"\b(\w+)(?:\s+\1\b)+", r"\1", s, flags=re.IGNORECASE)
-
-        # split into sentences (keep punctuation)
-        parts = re.split(r"(?<=[\.!?])\s+", s)
-        cleaned = []
-        seen = set()
-
-        def norm(sent: str) -> str:
-            return re.sub(r"[^a-z0-9 ]+", "", sent.lower()).strip()
-
-        for sent in parts:
-            t = sent.strip()
-            if not t:
-                continue
-            k = norm(t)
-            if not k or len(k) < 3:
-                continue
-            if k in seen:
-                continue
-
-            # near-duplicate check vs previous kept sentence
-            if cleaned:
-                prev_k = norm(cleaned[-1])
-                A = set(prev_k.split())
-                B = set(k.split())
-                if B:
-                    overlap = len(A & B) / len(B)
-                    if overlap > 0.85:
-                        # too similar to previous, skip
-                        continue
-
-            seen.add(k)
-            cleaned.append(t)
-
-        return " ".join(cleaned).strip()
+        return text_cleaner.clean_text(raw_text, self.near_dup_threshold)
 
 def main():
+    profile = startup_profile.active()
+    if profile:
+        profile.mark('imports')
     root = tk.Tk()
+    if profile:
+        profile.mark('tk root')
     app = CaptionerApp(root)
+    if profile:
+        profile.mark('app built')
+        root.update()
+        profile.mark('first window')
+        try:
+            profile.finish(os.path.join(app._transcript_dir, 'startup_profile.json'))
+        except Exception:
+            pass
     try:
         root.mainloop()
     except KeyboardInterrupt:
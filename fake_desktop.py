@@ -0,0 +1,195 @@
+"""
+An in-memory stand-in for the pywinauto UIA desktop, so LiveCaptionReader can be run,
+tested and benchmarked without Windows.
+
+It models just what the reader uses: top-level windows with a title, visibility and
+Text descendants, `window(title_re=...)` lookups and `windows()` enumeration. Each Text
+control plays back a scripted sequence of `window_text()` values (one per call, or a
+timeline of (seconds, text) pairs following the desktop clock), windows can appear
+after a delay, and every call can be given an artificial latency. Calls are counted
+in `FakeDesktop.calls`.
+
+`replay_desktop()` builds a desktop whose caption control plays back a recorded stream
+(see `live_caption_reader.py --record`), optionally faster than real time.
+
+Usage:
+    desktop = FakeDesktop(latency={'descendants': 0.005})
+    desktop.add_window('Live captions', texts=[['hello', 'hello there']])
+    reader = LiveCaptionReader(source=FakeSource(desktop))
+"""
+from bisect import bisect_right
+from collections import Counter
+import itertools
+import re
+import time
+
+
+class _Info:
+    def __init__(self, handle, runtime_id, process_id):
+        self.handle = handle
+        self.runtime_id = runtime_id
+        self.process_id = process_id
+
+
+class FakeText:
+    """A Text control whose `window_text()` plays back `script`.
+
+    Each call returns the next entry; the last one repeats once the script runs out
+    (or the script restarts if `loop` is set). If the entries are (seconds, text)
+    pairs, each call instead returns the latest entry whose time has passed on the
+    desktop clock (empty before the first one). Setting `alive` to False makes every
+    call raise, like a control whose window has been closed.
+    """
+
+    def __init__(self, desktop, script, runtime_id, process_id, loop=False):
+        self.desktop = desktop
+        self.loop = loop
+        self.alive = True
+        self.element_info = _Info(None, runtime_id, process_id)
+        self.set_script(script)
+
+    def set_script(self, script):
+        script = [script] if isinstance(script, str) else (list(script) or [''])
+        if isinstance(script[0], tuple):
+            self._times = [float(t) for t, _text in script]
+            self._script = [text for _t, text in script]
+        else:
+            self._times = None
+            self._script = script
+        self._pos = 0
+
+    def window_text(self):
+        self.desktop._call('window_text')
+        if not self.alive:
+            raise RuntimeError('element not available')
+        if self._times is not None:
+            i = bisect_right(self._times, self.desktop.elapsed())
+            return self._script[i - 1] if i else ''
+        text = self._script[self._pos]
+        if self._pos + 1 < len(self._script):
+            self._pos += 1
+        elif self.loop:
+            self._pos = 0
+        return text
+
+    def is_visible(self):
+        return self.alive
+
+
+class FakeWindow:
+    def __init__(self, desktop, title, texts, handle, visible, appear_at):
+        self.desktop = desktop
+        self.title = title
+        self.visible = visible
+        self.appear_at = appear_at
+        self.element_info = _Info(handle, (handle,), handle * 4)
+        self.texts = [FakeText(desktop, script, (handle, i), handle * 4)
+                      for i, script in enumerate(texts)]
+
+    def close(self):
+        """Remove the window; its controls start raising like stale UIA elements."""
+        for t in self.texts:
+            t.alive = False
+        if self in self.desktop.win_list:
+            self.desktop.win_list.remove(self)
+
+    def window_text(self):
+        self.desktop._call('window_text')
+        return self.title
+
+    def is_visible(self):
+        return self.visible
+
+    def descendants(self, control_type=None):
+        self.desktop._call('descendants')
+        if control_type not in (None, 'Text'):
+            return []
+        return list(self.texts)
+
+
+class _Spec:
+    def __init__(self, matches):
+        self._matches = matches
+
+    def exists(self):
+        return bool(self._matches)
+
+    def wrapper_object(self):
+        if len(self._matches) != 1:
+            raise LookupError(f'{len(self._matches)} windows match')
+        return self._matches[0]
+
+    def descendants(self, control_type=None):
+        return self.wrapper_object().descendants(control_type=control_type)
+
+
+class FakeDesktop:
+    """A scripted desktop. `latency` maps call names ('window', 'windows',
+    'descendants', 'window_text') to seconds slept on each call."""
+
+    def __init__(self, latency=None, clock=time.monotonic):
+        self.latency = dict(latency or {})
+        self.calls = Counter()
+        self.win_list = []
+        self._clock = clock
+        self._started = clock()
+        self._handles = itertools.count(1)
+
+    def __call__(self, backend=None):
+        # lets the instance stand in for the pywinauto `Desktop` class
+        return self
+
+    def add_window(self, title, texts=(), visible=True, appear_after=0.0, loop=False):
+        """Add a top-level window; `texts` holds one script per Text control."""
+        w = FakeWindow(self, title, texts, next(self._handles), visible,
+                       self._started + appear_after)
+        for t in w.texts:
+            t.loop = loop
+        self.win_list.append(w)
+        return w
+
+    def elapsed(self):
+        """Seconds since the desktop was created, on its clock."""
+        return self._clock() - self._started
+
+    def _call(self, name):
+        self.calls[name] += 1
+        delay = self.latency.get(name)
+        if delay:
+            time.sleep(delay)
+
+    def _visible_windows(self):
+        now = self._clock()
+        return [w for w in self.win_list if w.appear_at <= now]
+
+    def window(self, title_re=None, **kwargs):
+        self._call('window')
+        return _Spec([w for w in self._visible_windows()
+                      if title_re is None or re.match(title_re, w.title)])
+
+    def windows(self):
+        self._call('windows')
+        return self._visible_windows()
+
+
+def replay_desktop(stream, speed=1.0, title='Live captions'):
+    """A desktop showing `title` whose Text control plays back `stream`, a list of
+    (seconds, text) pairs, `speed` times faster than real time."""
+    desktop = FakeDesktop(clock=lambda: time.monotonic() * speed)
+    desktop.add_window(title, texts=[[(t, text) for t, text in stream]])
+    return desktop
+
+
+class FakeSource:
+    """Caption source backed by a FakeDesktop (see live_caption_reader.CaptionSource)."""
+
+    name = 'fake'
+
+    def __init__(self, desktop=None):
+        self.desktop_obj = desktop if desktop is not None else FakeDesktop()
+
+    def available(self):
+        return True
+
+    def desktop(self):
+        return self.desktop_obj
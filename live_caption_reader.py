@@ -4,149 +4,532 @@ It periodically attempts to locate a window/control that contains the captions a
 its text content.
 
 Usage:
-    reader = LiveCaptionReader()
+    reader = LiveCaptionReader()          # or LiveCaptionReader(source=FakeSource(...))
     reader.start()
     # then poll reader.latest_text or subscribe to callback
     reader.stop()
 
+    # or structured changes: what is unchanged since the previous snapshot, what is new
+    reader.on_delta = lambda delta: print(delta.stable, delta.tail)
+
+    # or, from asyncio code (see caption_stream.py)
+    async for update in reader.stream():
+        print(update.tail)
+
 This is best-effort — depending on Windows version and Live Captions implementation the
-control names or structure may differ. If not found, the reader will keep trying.
+control names or structure may differ. If not found, the reader will keep trying, backing
+off between searches. Once found, the control is cached (see CaptionLocator).
+
+Polling is adaptive (see PollPolicy): fast while the captions are changing, slower when
+the room is quiet or Live Captions is closed.
+
+pywinauto (which loads comtypes and the UIA type library) is only imported when a
+PywinautoSource is first used, so importing this module stays cheap.
+
+Each changed text is compared with the previous one (see compute_delta): the length of
+the prefix that is unchanged - already final - and the tail after it that is new or still
+being revised go to `on_delta` as a CaptionDelta, so consumers only look at what changed.
+Lines that scrolled off the top of the control are recognized instead of making the
+whole text look new. The older `on_change` callback still gets the last line, cut to
+TAIL_LIMIT characters.
+
+Each poll records its total time, and the time spent locating the control, reading its
+text and computing the delta, in `reader.stats` (see stage_stats.py).
 """
-from threading import Thread, Event
+from threading import Thread, Event, Lock
 import time
 import re
 
-try:
-    from pywinauto import Desktop
-except Exception:
-    Desktop = None
+from stage_stats import StageStats
 
-class LiveCaptionReader:
-    def __init__(self, poll_interval=0.5):
-        self.poll_interval = poll_interval
-        self._stop_event = Event()
-        self._thread = None
-        self.latest_text = ""
-        self.on_change = None  # optional callback(text)
+_pywinauto_desktop = None  # pywinauto.Desktop once imported, False if unavailable
 
-    def _find_caption_control(self):
-        if Desktop is None:
-            return None
+# longest tail (in characters) handed to on_change
+TAIL_LIMIT = 200
+_LINE_SPLIT_RE = re.compile(r'\r?\n')
+# unchanged characters kept in front of a delta's change (CaptionDelta.region), enough
+# words for the live de-dup to line the change up with what it has already shown
+DELTA_CONTEXT = 120
 
-        try:
-            d = Desktop(backend="uia")
-            # Attempt a few heuristics to find the Live Captions window or text control
-            # 1) window with title containing 'Live captions' (English) - case insensitive
+
+def extract_tail(full_text: str, limit: int = TAIL_LIMIT) -> str:
+    """Return the most recent caption segment of the control text.
+
+    That is the last non-empty line, trimmed to the last ~`limit` chars at a word
+    boundary.
+    """
+    parts = [p.strip() for p in _LINE_SPLIT_RE.split(full_text) if p.strip()]
+    if parts:
+        tail = parts[-1]
+    else:
+        tail = full_text.strip()
+
+    # If tail is very long, trim to the last ~limit chars at a word boundary
+    if len(tail) > limit:
+        tail = tail[-limit:]
+        if ' ' in tail:
+            tail = tail[tail.find(' ')+1:]
+    return tail
+
+
+def common_prefix_len(a: str, b: str, start: int = 0) -> int:
+    """Length of the common prefix of `a[start:]` and `b`.
+
+    Compares whole slices (a C-level memcmp) in a binary search instead of walking
+    character by character; when one text just extends the other this is one compare.
+    """
+    n = min(len(a) - start, len(b))
+    if n <= 0:
+        return 0
+    if a.startswith(b if n == len(b) else b[:n], start):
+        return n
+    lo, hi = 0, n - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a.startswith(b[lo:mid], start + lo):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+class CaptionDelta:
+    """How the caption control text changed since the previous snapshot.
+
+    `text[:stable]` is unchanged since then, after the first `dropped` characters of the
+    previous text scrolled off the top: it equals `previous[dropped:dropped + stable]`.
+    `tail` (`text[stable:]`) is new or revised and may still change. A delta with
+    `stable == 0` carries no history and stands on its own.
+    """
+
+    __slots__ = ('text', 'stable', 'dropped')
+
+    def __init__(self, text: str, stable: int = 0, dropped: int = 0):
+        self.text = text
+        self.stable = stable
+        self.dropped = dropped
+
+    @property
+    def tail(self) -> str:
+        return self.text[self.stable:]
+
+    def merge(self, older):
+        """This delta and the `older` one before it as a single change (e.g. when
+        `older` was never processed)."""
+        return CaptionDelta(self.text, max(0, min(self.stable, older.stable - self.dropped)),
+                            self.dropped + older.dropped)
+
+    def region(self, context: int = DELTA_CONTEXT) -> str:
+        """The changed text plus up to `context` unchanged characters before it,
+        starting at a word boundary."""
+        start = self.stable - context
+        if start <= 0:
+            return self.text
+        text = self.text
+        start = max(text.rfind(' ', 0, start), text.rfind('\n', 0, start)) + 1
+        return text[start:]
+
+    def __repr__(self):
+        return f"CaptionDelta(stable={self.stable}, dropped={self.dropped}, tail={self.tail!r})"
+
+
+def compute_delta(previous: str, text: str) -> CaptionDelta:
+    """The CaptionDelta from control text `previous` to `text`.
+
+    When the texts already differ in their first line, lines may have scrolled off the
+    top: `text` is also matched against `previous` from each of its later line starts.
+    """
+    stable = common_prefix_len(previous, text)
+    dropped = 0
+    end = previous.find('\n')
+    if 0 <= end and stable <= end:
+        start = end + 1
+        while start:
+            n = common_prefix_len(previous, text, start)
+            if n > stable:
+                stable, dropped = n, start
+                if n == len(previous) - start:
+                    break   # no later line start can match more
+            start = previous.find('\n', start) + 1
+    return CaptionDelta(text, stable, dropped)
+
+
+class PollPolicy:
+    """How long the reader waits between polls.
+
+    While the caption text keeps changing the reader polls every `min_interval`
+    seconds. Each poll without a change stretches the wait by `backoff`, up to
+    `idle_interval`; while no caption control is found it waits `missing_interval`.
+    Lower intervals mean lower caption latency and more UIA calls.
+    """
+
+    def __init__(self, min_interval=0.1, idle_interval=1.0, missing_interval=2.0, backoff=1.5):
+        self.min_interval = float(min_interval)
+        self.idle_interval = max(self.min_interval, float(idle_interval))
+        self.missing_interval = float(missing_interval)
+        self.backoff = max(1.0, float(backoff))
+
+    @classmethod
+    def fixed(cls, interval):
+        """Poll at a constant interval (the reader's original behaviour)."""
+        return cls(interval, interval, interval, 1.0)
+
+    @classmethod
+    def preset(cls, name):
+        """One of 'low_latency', 'balanced' (the default) or 'low_cpu'."""
+        return cls(**PRESETS[name])
+
+    def next_interval(self, current, changed, found):
+        if not found:
+            return self.missing_interval
+        if changed:
+            return self.min_interval
+        return min(self.idle_interval, max(self.min_interval, current) * self.backoff)
+
+
+PRESETS = {
+    'low_latency': dict(min_interval=0.05, idle_interval=0.5, missing_interval=1.0, backoff=1.3),
+    'balanced': dict(min_interval=0.1, idle_interval=1.0, missing_interval=2.0, backoff=1.5),
+    'low_cpu': dict(min_interval=0.25, idle_interval=2.0, missing_interval=5.0, backoff=2.0),
+}
+
+
+class CaptionSource:
+    """Where the reader gets its UI Automation desktop from.
+
+    `desktop()` returns an object with the subset of the pywinauto `Desktop` API the
+    locator uses: `window(title_re=...)` (with `exists()` / `wrapper_object()`) and
+    `windows()`, whose elements offer `window_text()`, `is_visible()`,
+    `descendants(control_type=...)` and `element_info`. fake_desktop.FakeSource is an
+    in-memory implementation for tests and benchmarks.
+    """
+
+    name = ''
+
+    def available(self) -> bool:
+        return False
+
+    def desktop(self):
+        raise NotImplementedError
+
+
+class PywinautoSource(CaptionSource):
+    """The real Windows UI Automation tree, via pywinauto."""
+
+    name = 'pywinauto'
+
+    @staticmethod
+    def _desktop_class():
+        global _pywinauto_desktop
+        if _pywinauto_desktop is None:
             try:
-                win = d.window(title_re='(?i).*Live captions.*')
-                if win.exists():
-                    # find text descendant - usually the caption display control
-                    txt = win.descendants(control_type='Text')
-                    if txt:
-                        return txt[0]
+                from pywinauto import Desktop
             except Exception:
-                pass
+                Desktop = False
+            _pywinauto_desktop = Desktop
+        return _pywinauto_desktop or None
 
-            # 2) Try alternate window titles (localized versions)
-            for pattern in ['(?i).*caption.*', '(?i).*subtitle.*']:
-                try:
-                    win = d.window(title_re=pattern)
-                    if win.exists():
-                        # Check if this window has the typical Live Captions structure
-                        txt = win.descendants(control_type='Text')
-                        if txt and len(txt) > 0:
-                            # Verify it's likely the caption window (has single large text control)
-                            try:
-                                test_text = txt[0].window_text()
-                                if test_text or len(txt) == 1:  # Either has text or is the only text control
-                                    return txt[0]
-                            except Exception:
-                                pass
-                except Exception:
-                    pass
+    def available(self) -> bool:
+        return self._desktop_class() is not None
+
+    def desktop(self):
+        return self._desktop_class()(backend="uia")
+
+
+# window title patterns tried, in order, when looking for the Live Captions window
+_TITLE_PATTERNS = ['(?i).*Live captions.*', '(?i).*caption.*', '(?i).*subtitle.*']
+
+
+class CaptionLocator:
+    """Finds the Live Captions text control and keeps it between polls.
+
+    A found control is reused until it fails validation: at most every
+    `validate_interval` seconds its UIA runtime ID and process ID are compared with
+    the ones recorded when it was found and its visibility is checked; callers also
+    report failed reads through `invalidate()`. Rediscovery after a failed search
+    backs off exponentially from `min_backoff` up to `max_backoff` seconds.
+
+    A window whose title looks like a caption window but that has no caption control is
+    rejected: the last-resort walk over all windows skips it for `reject_ttl` seconds.
+    The title searches always look, so Live Captions opening (or a window being
+    retitled) is noticed on the next search.
+    """
+
+    def __init__(self, source=None, validate_interval=2.0, min_backoff=0.25, max_backoff=8.0,
+                 reject_ttl=30.0, clock=time.monotonic):
+        self.source = source or PywinautoSource()
+        self.validate_interval = validate_interval
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.reject_ttl = reject_ttl
+        self._clock = clock
+        self._lock = Lock()
+        self._desktop = None
+        self._ctrl = None
+        self._ident = None
+        self._fallback = False  # found by a title other than 'Live captions'
+        self._validated_at = 0.0
+        self._backoff = 0.0
+        self._next_search = 0.0
+        self._rejected = {}  # window key -> time the rejection expires
+        # counters, for diagnostics and tests
+        self.searches = 0
+        self.validations = 0
+
+    def locate(self, force=False):
+        """Return the caption control, searching only if the cached one is gone.
+
+        Unless `force` is set, a search is skipped while the backoff period after a
+        failed search is still running.
+        """
+        with self._lock:
+            now = self._clock()
+            ctrl = self._ctrl
+            if ctrl is not None:
+                if now - self._validated_at < self.validate_interval:
+                    return ctrl
+                self.validations += 1
+                if (self._identity(ctrl) == self._ident and self._visible(ctrl)
+                        and not (self._fallback and self._live_captions_opened())):
+                    self._validated_at = now
+                    return ctrl
+                self._ctrl = None
+
+            if not force and now < self._next_search:
+                return None
+            ctrl, self._fallback = self._search(now)
+            if ctrl is None:
+                self._backoff = min(self.max_backoff, max(self.min_backoff, self._backoff * 2))
+                self._next_search = now + self._backoff
+                return None
+            self._ctrl = ctrl
+            self._ident = self._identity(ctrl)
+            self._validated_at = now
+            self._backoff = 0.0
+            self._next_search = now
+            return ctrl
+
+    def invalidate(self):
+        """Drop the cached control (e.g. after a failed read) and allow an immediate search."""
+        with self._lock:
+            self._ctrl = None
+            self._backoff = 0.0
+            self._next_search = self._clock()
+
+    def _live_captions_opened(self):
+        # a fallback match is replaced as soon as the real Live Captions window appears
+        try:
+            return bool(self._desktop.window(title_re=_TITLE_PATTERNS[0]).exists())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _identity(ctrl):
+        try:
+            info = ctrl.element_info
+            return (getattr(info, 'runtime_id', None), getattr(info, 'process_id', None))
+        except Exception:
+            return None
+
+    @staticmethod
+    def _visible(ctrl):
+        try:
+            return bool(ctrl.is_visible())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _window_key(w):
+        try:
+            info = w.element_info
+            return (getattr(info, 'handle', None) or getattr(info, 'runtime_id', None),
+                    getattr(info, 'process_id', None))
+        except Exception:
+            return None
+
+    def _is_rejected(self, key, now):
+        expires = self._rejected.get(key)
+        if expires is None:
+            return False
+        if expires <= now:
+            del self._rejected[key]
+            return False
+        return True
+
+    def _reject(self, key, now):
+        if key is not None:
+            self._rejected[key] = now + self.reject_ttl
+
+    def _search(self, now):
+        """Run the window heuristics; returns (control or None, found-by-fallback)."""
+        if not self.source.available():
+            return None, False
+        self.searches += 1
+        try:
+            if self._desktop is None:
+                self._desktop = self.source.desktop()
+            d = self._desktop
+        except Exception:
+            return None, False
 
-            # 3) Last resort: search for windows with specific class name patterns (Win11 Live Captions)
+        # 1) window with title containing 'Live captions' (English), then
+        # 2) alternate window titles (localized versions)
+        for n, pattern in enumerate(_TITLE_PATTERNS):
             try:
-                all_windows = d.windows()
-                for w in all_windows:
+                spec = d.window(title_re=pattern)
+                if not spec.exists():
+                    continue
+                w = spec.wrapper_object()
+                key = self._window_key(w)
+                # find text descendant - usually the caption display control
+                txt = w.descendants(control_type='Text')
+                if txt:
+                    if n == 0:
+                        return txt[0], False
+                    # Verify it's likely the caption window (has single large text control)
                     try:
-                        if not w.is_visible():
-                            continue
-                        # Check window properties that indicate Live Captions
-                        try:
-                            win_title = w.window_text()
-                            if win_title and ('caption' in win_title.lower() or 'subtitle' in win_title.lower()):
-                                texts = w.descendants(control_type='Text')
-                                if texts:
-                                    return texts[0]
-                        except Exception:
-                            pass
+                        if txt[0].window_text() or len(txt) == 1:
+                            return txt[0], True
                     except Exception:
-                        continue
+                        pass
+                self._reject(key, now)
             except Exception:
                 pass
+
+        # 3) Last resort: any visible window whose title mentions captions/subtitles
+        try:
+            for w in d.windows():
+                try:
+                    key = self._window_key(w)
+                    if self._is_rejected(key, now):
+                        continue
+                    if not w.is_visible():
+                        continue
+                    win_title = w.window_text()
+                    if win_title and ('caption' in win_title.lower() or 'subtitle' in win_title.lower()):
+                        texts = w.descendants(control_type='Text')
+                        if texts:
+                            return texts[0], True
+                        self._reject(key, now)
+                except Exception:
+                    continue
         except Exception:
-            return None
+            pass
+        return None, False
+
+
+class LiveCaptionReader:
+    def __init__(self, poll_interval=None, source=None, locator=None, policy=None, stats=None):
+        # a plain poll_interval keeps the old fixed-rate polling
+        if policy is None:
+            policy = PollPolicy.fixed(poll_interval) if poll_interval is not None else PollPolicy()
+        self.policy = policy
+        self.poll_interval = policy.min_interval
+        self._stop_event = Event()
+        self._previous = ""  # the control text the last delta was computed against
+        # counters, for diagnostics
+        self.polls = 0
+        self.changes = 0
+        self._thread = None
+        self.latest_text = ""
+        self.on_delta = None   # optional callback(CaptionDelta)
+        self.on_change = None  # optional callback(text): the last line, see extract_tail
+        self._locator = locator or CaptionLocator(source)
+        self.source = self._locator.source
+        # per-stage timings and (re)discovery counts
+        self.stats = stats if stats is not None else StageStats()
+        self._ctrl = None  # the control last read, to count rediscoveries
+        self._broadcaster = None  # caption_stream.CaptionBroadcaster, once stream() is used
 
-        return None
+    def _find_caption_control(self):
+        """Return the caption control, reusing the cached one while it stays valid."""
+        return self._locator.locate(force=True)
 
     def _poll_loop(self):
-        ctrl = None
-        refresh_counter = 0
+        policy = self.policy
+        interval = policy.min_interval
         while not self._stop_event.is_set():
+            found, changed, _delta = self.poll_once()
+            interval = policy.next_interval(interval, changed, found)
+            self._stop_event.wait(interval)
+
+    def poll_once(self):
+        """Run one poll: locate the control, read it and emit what changed.
+
+        Blocks on UI Automation calls. Returns (found, changed, delta): whether the
+        control was read, whether its text changed, and the CaptionDelta handed to
+        `on_delta` (None if the text did not change).
+        """
+        found = changed = False
+        delta = None
+        stats = self.stats
+        clock = time.perf_counter
+        t0 = clock()
+        try:
+            # Cached between polls; only searched for again when it stops working
+            ctrl = self._locator.locate()
+            t1 = clock()
+            stats.record('find_control', t1 - t0)
+
+            if ctrl is not None:
+                found = True
+                self.polls += 1
+                if ctrl is not self._ctrl:
+                    stats.count('rediscoveries' if self._ctrl is not None else 'discoveries')
+                    self._ctrl = ctrl
+                try:
+                    text = ctrl.window_text()
+                except Exception:
+                    # control may have gone stale
+                    self._locator.invalidate()
+                    stats.count('read_errors')
+                    found = False
+                    text = ""
+                stats.record('window_text', clock() - t1)
+
+                if text and text != self._previous:
+                    self.latest_text = text
+                    changed = True
+                    self.changes += 1
+                    delta = self._emit(text)
+        except Exception:
+            pass
+        stats.record('poll', clock() - t0)
+        return found, changed, delta
+
+    def _emit(self, full_text):
+        t0 = time.perf_counter()
+        delta = compute_delta(self._previous, full_text)
+        self._previous = full_text
+        self.stats.record('delta', time.perf_counter() - t0)
+        if self.on_delta:
             try:
-                # Force refresh every 2 iterations to pick up newly opened Live Captions quickly
-                if ctrl is None or refresh_counter >= 2:
-                    ctrl = self._find_caption_control()
-                    refresh_counter = 0
-                
-                refresh_counter += 1
-                
-                if ctrl is not None:
-                    try:
-                        text = ctrl.window_text()
-                    except Exception:
-                        # control may have gone stale
-                        ctrl = None
-                        refresh_counter = 10  # Force immediate refresh
-                        text = ""
-
-                    if text and text != self.latest_text:
-                        # Keep the full text for change detection
-                        full_text = text
-                        self.latest_text = full_text
-
-                        # Extract the most recent segment (last non-empty line)
-                        parts = [p.strip() for p in re.split(r'\r?\n', full_text) if p.strip()]
-                        if parts:
-                            tail = parts[-1]
-                        else:
-                            tail = full_text.strip()
-
-                        # If tail is very long, trim to the last ~200 chars at a word boundary
-                        if len(tail) > 200:
-                            tail = tail[-200:]
-                            if ' ' in tail:
-                                tail = tail[tail.find(' ')+1:]
-
-                        # Avoid sending identical tail repeatedly
-                        last_sent = getattr(self, '_last_sent', None)
-                        if tail and tail != last_sent:
-                            self._last_sent = tail
-                            if self.on_change:
-                                try:
-                                    self.on_change(tail)
-                                except Exception:
-                                    pass
-                time.sleep(self.poll_interval)
+                self.on_delta(delta)
             except Exception:
-                time.sleep(self.poll_interval)
+                pass
+
+        if self.on_change:
+            # Extract the most recent segment (last non-empty line)
+            t0 = time.perf_counter()
+            tail = extract_tail(full_text)
+            self.stats.record('tail_split', time.perf_counter() - t0)
+            # Avoid sending identical tail repeatedly
+            last_sent = getattr(self, '_last_sent', None)
+            if tail and tail != last_sent:
+                self._last_sent = tail
+                try:
+                    self.on_change(tail)
+                except Exception:
+                    pass
+        return delta
 
     def start(self):
-        if Desktop is None:
-            raise RuntimeError('pywinauto is not available in the environment')
+        if not self.source.available():
+            raise RuntimeError(f'{self.source.name or "caption source"} is not available in the environment')
         if self._thread and self._thread.is_alive():
             return
+        if self._broadcaster is not None and self._broadcaster.running:
+            raise RuntimeError('reader is already polling for stream() subscribers')
         self._stop_event.clear()
         self._thread = Thread(target=self._poll_loop, daemon=True)
         self._thread.start()
@@ -158,37 +541,78 @@ class LiveCaptionReader:
         `timeout` seconds and returns the control text if found, otherwise
         an empty string.
         """
-        if Desktop is None:
+        if not self.source.available():
             return ""
 
         end = time.time() + max(0.0, float(timeout))
         while time.time() < end:
-            try:
-                ctrl = self._find_caption_control()
-                if ctrl is not None:
-                    try:
-                        text = ctrl.window_text()
-                        if text:
-                            return text
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+            text = self._read_control_text()
+            if text:
+                return text
             time.sleep(poll)
         return ""
 
+    def _read_control_text(self) -> str:
+        """Search for the control if needed and read its text once ('' on failure)."""
+        try:
+            ctrl = self._find_caption_control()
+            if ctrl is not None:
+                try:
+                    return ctrl.window_text() or ""
+                except Exception:
+                    self._locator.invalidate()
+        except Exception:
+            pass
+        return ""
+
+    def stream(self, maxsize=64, overflow='drop_oldest'):
+        """Async iterator of CaptionUpdates, polled on the running event loop.
+
+        All streams of a reader share one poller; UI Automation calls run on a
+        dedicated worker thread. Each subscriber has a queue of `maxsize` updates;
+        when it is full, 'drop_oldest' discards the oldest queued update and 'wait'
+        makes the poller wait for this subscriber. `stop()` ends every stream. See
+        caption_stream.py.
+        """
+        import caption_stream  # asyncio only loaded for async users
+        if self._broadcaster is None:
+            self._broadcaster = caption_stream.CaptionBroadcaster(self)
+        return self._broadcaster.subscribe(maxsize, overflow)
+
+    async def get_current_text_async(self, timeout: float = 2.0, poll: float = 0.15) -> str:
+        """`get_current_text` for asyncio code: waits on the loop, reads on the UIA thread."""
+        import caption_stream
+        if self._broadcaster is None:
+            self._broadcaster = caption_stream.CaptionBroadcaster(self)
+        return await self._broadcaster.current_text(timeout, poll)
+
     def stop(self):
         self._stop_event.set()
         if self._thread:
             self._thread.join(timeout=1)
             self._thread = None
+        if self._broadcaster is not None:
+            self._broadcaster.close()
 
 
 if __name__ == '__main__':
-    # Quick local test when run directly
+    # Quick local test when run directly. With --record FILE, every raw snapshot of
+    # the control text is also written as JSON lines ({"t": seconds, "text": ...}),
+    # the format of the benchmark corpus in benchmarks/corpus/.
+    import argparse
+    import json
+    ap = argparse.ArgumentParser(description='Print (and optionally record) Live Captions text')
+    ap.add_argument('--record', metavar='FILE', help='append raw snapshots to FILE as JSON lines')
+    args = ap.parse_args()
+
     r = LiveCaptionReader()
+    out = open(args.record, 'a', encoding='utf-8') if args.record else None
+    t0 = time.monotonic()
     def cb(t):
         print('Caption:', t)
+        if out:
+            out.write(json.dumps({'t': round(time.monotonic() - t0, 3), 'text': r.latest_text}) + '\n')
+            out.flush()
     r.on_change = cb
     try:
         r.start()
@@ -197,4 +621,6 @@ if __name__ == '__main__':
             time.sleep(1)
     except KeyboardInterrupt:
         r.stop()
+        if out:
+            out.close()
         print('Stopped')
@@ -0,0 +1,442 @@
+"""
+Live-caption de-duplication helpers.
+
+Windows Live Captions re-sends the whole visible line on every change, so the app has
+to work out which words of a new snapshot were already shown. `OverlapEngine` remembers
+the most recently shown words and finds, in time linear in the snapshot length, where
+the snapshot continues what is already on screen.
+
+Shown words live in a `TokenStore`: each distinct normalized word is interned to an
+integer ID once, and the IDs of the last `window` words are kept in an `array('I')`
+ring buffer, so memory and per-update work stay constant for multi-hour sessions.
+
+`LiveDeduper` is the whole sanitize/dedup stage used by `CaptionerApp.on_live_text`:
+it takes raw caption snapshots and returns the text to append, with no GUI dependency.
+Snapshots are split with the tokenizer shared with the cleaner (caption_tokens.py), so
+each word is normalized once per session rather than once per snapshot.
+Snapshots arriving less than `min_interval` after the last update are not dropped: the
+latest one is held and processed at the trailing edge of the window by `poll()`.
+
+Given CaptionDeltas (live_caption_reader.py) instead of full texts, the stage keeps the
+position in the caption text up to which it has shown everything. While the change
+starts after that position, the text beyond it is new and nothing needs matching; when
+shown words were revised, their new versions replace them one for one. Only the first
+delta (or one after `seed`/`restore`) is matched against the shown words, using the
+changed part and a little unchanged text before it (`CaptionDelta.region`). Held-back
+deltas are merged into the next one, so no change is skipped.
+
+Usage:
+    engine = OverlapEngine()
+    engine.extend("hello there how are".split())
+    words = "there how are you today".split()
+    new = words[engine.match(words):]   # ['you', 'today']
+    engine.extend(new)
+"""
+
+from array import array
+import re
+import time
+
+import caption_tokens
+from caption_tokens import normalize_key as normalize_token  # noqa: F401 (re-exported)
+
+# number of shown words remembered for matching; must exceed the snapshot length
+DEFAULT_WINDOW = 1024
+# distinct words interned before the ID table is compacted down to the window
+DEFAULT_MAX_VOCAB = 50000
+_WORD_RE = re.compile(r'\S+')
+# separates the two halves of the Z-function input; never equal to a token
+_SENTINEL = object()
+
+
+def _z_function(seq):
+    """Classic Z-array: z[i] is the length of the longest common prefix of seq and seq[i:]."""
+    n = len(seq)
+    z = [0] * n
+    if n:
+        z[0] = n
+    left = right = 0
+    for i in range(1, n):
+        if i < right:
+            z[i] = min(right - i, z[i - left])
+        while i + z[i] < n and seq[z[i]] == seq[i + z[i]]:
+            z[i] += 1
+        if i + z[i] > right:
+            left, right = i, i + z[i]
+    return z
+
+
+def find_overlap(shown_keys, curr_keys) -> int:
+    """Return the index in `curr_keys` where content not yet shown begins.
+
+    Finds the earliest position in the snapshot where a suffix of the shown words
+    starts, taking the longest such suffix, and returns the index just past it. This
+    is the same answer the original nested-loop matcher in `on_live_text` produced,
+    but computed with one Z-function pass over the reversed sequences.
+
+    Only the last len(curr_keys) shown words can take part in a match, so the cost is
+    O(len(curr_keys)) no matter how long the session has been running. Returns 0 when
+    nothing matches.
+    """
+    m = len(curr_keys)
+    if not m or not shown_keys:
+        return 0
+    tail = list(shown_keys[-m:])
+    tail.reverse()
+    rev_curr = list(curr_keys)
+    rev_curr.reverse()
+    z = _z_function(tail + [_SENTINEL] + rev_curr)
+
+    # common[e] = length of the longest common suffix of curr_keys[:e] and shown_keys
+    off = len(tail) + 1
+    start = None
+    for p in range(m):
+        common = z[off + p]
+        if common:
+            s = (m - p) - common
+            if start is None or s < start:
+                start = s
+    if start is None:
+        return 0
+
+    # longest shown suffix beginning at `start`
+    for p in range(m):
+        e = m - p
+        if z[off + p] >= e - start:
+            return e
+    return 0
+
+
+class TokenStore:
+    """Bounded look-back buffer of shown words, stored as interned integer IDs.
+
+    `window` is the number of most recent words kept. Each distinct raw word is
+    normalized once and cached; when more than `max_vocab` distinct words have been
+    seen the ID table is rebuilt from the words still in the window.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, max_vocab=DEFAULT_MAX_VOCAB):
+        self.window = max(1, int(window))
+        self.max_vocab = max(2 * self.window, int(max_vocab))
+        self._ids = array('I', [0]) * self.window
+        self._head = 0      # next slot to write
+        self._count = 0     # valid IDs in the ring
+        self._keys = []     # ID -> normalized key
+        self._key_ids = {}  # normalized key -> ID
+        self._word_ids = {}  # raw word -> ID (normalization cache)
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        """Drop all shown words and interned IDs."""
+        self._head = 0
+        self._count = 0
+        self._keys = []
+        self._key_ids = {}
+        self._word_ids = {}
+
+    def id_for(self, word: str, add: bool = True) -> int:
+        """Interned ID for `word`, or -1 if it is unknown and `add` is False."""
+        wid = self._word_ids.get(word)
+        if wid is not None:
+            return wid
+        wid = self.id_for_key(normalize_token(word), add)
+        if wid < 0:
+            return wid
+        if len(self._word_ids) >= 4 * self.max_vocab:
+            self._word_ids = {}
+        self._word_ids[word] = wid
+        return wid
+
+    def id_for_key(self, key: str, add: bool = True) -> int:
+        """Interned ID for an already normalized key (see `id_for`)."""
+        wid = self._key_ids.get(key)
+        if wid is None:
+            if not add:
+                return -1
+            if len(self._keys) >= self.max_vocab:
+                self._compact()
+            wid = len(self._keys)
+            self._keys.append(key)
+            self._key_ids[key] = wid
+        return wid
+
+    def ids_for_keys(self, keys) -> list:
+        """IDs of normalized keys, -1 for keys never shown."""
+        get = self._key_ids.get
+        return [get(k, -1) for k in keys]
+
+    def append(self, words, keys=False):
+        """Record `words` as shown, evicting the oldest once the window is full.
+
+        With `keys` the words are already normalized keys (e.g. `Token.key`).
+        """
+        intern = self.id_for_key if keys else self.id_for
+        for w in words:
+            wid = intern(w)  # may compact, which rewrites the ring
+            self._ids[self._head] = wid
+            self._head = (self._head + 1) % self.window
+            if self._count < self.window:
+                self._count += 1
+
+    def tail(self, n: int) -> list:
+        """IDs of the last `n` shown words, oldest first."""
+        n = min(max(0, n), self._count)
+        if not n:
+            return []
+        start = (self._head - n) % self.window
+        if start + n <= self.window:
+            return self._ids[start:start + n].tolist()
+        return self._ids[start:].tolist() + self._ids[:self._head].tolist()
+
+    def keys(self) -> list:
+        """Normalized keys of the words in the window, oldest first."""
+        keys = self._keys
+        return [keys[i] for i in self.tail(self._count)]
+
+    def _compact(self):
+        # re-number only the IDs still referenced by the window
+        live = self.tail(self._count)
+        keys, key_ids, remap = [], {}, {}
+        for old in live:
+            new = remap.get(old)
+            if new is None:
+                new = remap[old] = len(keys)
+                keys.append(self._keys[old])
+                key_ids[self._keys[old]] = new
+        self._keys = keys
+        self._key_ids = key_ids
+        self._word_ids = {}
+        self._ids[:len(live)] = array('I', [remap[old] for old in live])
+        self._head = len(live) % self.window
+
+
+class OverlapEngine:
+    """Remembers the words already displayed and matches new snapshots against them.
+
+    Only the last `window` shown words are kept; a snapshot can never overlap more
+    words than it contains, so the window just has to exceed the snapshot length.
+    """
+
+    def __init__(self, words=(), window=DEFAULT_WINDOW):
+        self._store = TokenStore(window)
+        self.extend(words)
+
+    def __len__(self):
+        return len(self._store)
+
+    def reset(self, words=(), keys=False):
+        """Forget everything shown so far, optionally seeding with `words`."""
+        self._store.clear()
+        self.extend(words, keys)
+
+    def extend(self, words, keys=False):
+        """Record `words` (normalized keys if `keys`) as shown."""
+        self._store.append(words, keys)
+
+    def keys(self) -> list:
+        """Normalized keys of the remembered words, oldest first."""
+        return self._store.keys()
+
+    def match(self, words, keys=False) -> int:
+        """Index in `words` (normalized keys if `keys`) where the not-yet-shown part begins."""
+        store = self._store
+        if keys:
+            curr = store.ids_for_keys(words)
+        else:
+            curr = [store.id_for(w, add=False) for w in words]
+        return find_overlap(store.tail(len(curr)), curr)
+
+
+def snapshot_tokens(raw_text: str, tokenizer=None) -> list:
+    """Tokens of a snapshot without control tokens and words repeated 3+ times in a row."""
+    tokenizer = tokenizer or caption_tokens.shared()
+    return tokenizer.tokens(raw_text, min_repeat=3, controls=True)
+
+
+def normalize_snapshot(raw_text: str) -> str:
+    """Strip control tokens, collapse whitespace and words repeated 3+ times in a row."""
+    return ' '.join([t.raw for t in snapshot_tokens(raw_text)])
+
+
+class LiveDeduper:
+    """Turns Live Captions snapshots into the new text to append - accumulative strategy.
+
+    Live Captions sends full transcript repeatedly. Strategy:
+    - Track all text we've already shown
+    - Extract only words that haven't been displayed yet
+    - Debounce: at most one update per `min_interval` seconds; the latest snapshot
+      that arrived too soon is kept and processed once the window ends (`poll`)
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, min_interval=0.5, clock=time.time, tokenizer=None):
+        self.overlap = OverlapEngine(window=window)
+        self.tokenizer = tokenizer or caption_tokens.shared()
+        self.min_interval = min_interval
+        self.last_update = 0.0
+        self._clock = clock
+        self._pending = None  # latest snapshot held back by the debounce window
+        self._pending_at = None
+        self._carry = None  # delta whose change has not been shown yet
+        self._text = None   # text of the last delta processed
+        self._shown = None  # ... and the position in it up to which all is shown
+        # capture time of the snapshot behind the last text returned (for subtitle timing)
+        self.captured_at = None
+        # counters, for diagnostics
+        self.superseded = 0  # held snapshots replaced by a newer one (deltas merge instead)
+
+    def reset(self):
+        """Start a new session."""
+        self.overlap.reset()
+        self.last_update = 0.0
+        self._pending = self._carry = self._shown = None
+
+    def seed(self, text: str, now=None):
+        """Mark `text` as already shown (e.g. the initial caption line)."""
+        self.overlap.reset(text.split())
+        self.last_update = self._clock() if now is None else now
+        self._pending = self._carry = self._shown = None
+
+    def state(self) -> dict:
+        """JSON-serializable snapshot of the dedup state (see `restore`)."""
+        return {'words': self.overlap.keys(), 'last_update': self.last_update}
+
+    def restore(self, state: dict):
+        """Resume from a `state()` snapshot, e.g. a session journal checkpoint."""
+        self.overlap.reset(state.get('words') or (), keys=True)
+        self.last_update = float(state.get('last_update') or 0.0)
+        self._pending = self._carry = self._shown = None
+
+    @property
+    def pending(self) -> bool:
+        """True while a snapshot is waiting for the end of the debounce window."""
+        return self._pending is not None
+
+    def next_due(self):
+        """Clock time at which `poll()` will process the held snapshot, or None."""
+        if self._pending is None:
+            return None
+        return self.last_update + self.min_interval
+
+    def process(self, raw_text, now=None):
+        """Return the text to append for snapshot `raw_text`, or None if nothing is new.
+
+        `raw_text` is the control text or a CaptionDelta. A snapshot arriving within the
+        debounce window is held (replacing any older held one, which it supersedes) and
+        None is returned; see `poll`.
+        """
+        text = raw_text if isinstance(raw_text, str) else raw_text.text
+        if not text or len(text.strip()) < 5:
+            return None
+
+        if now is None:
+            now = self._clock()
+        if now - self.last_update < self.min_interval:
+            # trailing edge: keep the newest snapshot for poll()
+            held = self._pending
+            if held is not None and not isinstance(held, str) and not isinstance(raw_text, str):
+                raw_text = raw_text.merge(held)
+            elif held is not None:
+                self.superseded += 1
+            self._pending = raw_text
+            self._pending_at = now
+            return None
+        self._pending = None
+        return self._update(raw_text, now)
+
+    def poll(self, now=None):
+        """Process the held snapshot once its window has passed; returns the text or None."""
+        if self._pending is None:
+            return None
+        if now is None:
+            now = self._clock()
+        if now < self.last_update + self.min_interval:
+            return None
+        return self.flush(now)
+
+    def flush(self, now=None):
+        """Process the held snapshot right away (e.g. when capture stops)."""
+        raw_text, self._pending = self._pending, None
+        if raw_text is None:
+            return None
+        return self._update(raw_text, self._clock() if now is None else now, self._pending_at)
+
+    def _update(self, raw_text, now, captured=None):
+        self.captured_at = now if captured is None else captured
+        if isinstance(raw_text, str):
+            self._shown = None
+        elif self._shown is not None:
+            return self._follow(raw_text, now)
+        else:
+            delta = raw_text
+            if self._carry is not None:
+                delta = delta.merge(self._carry)
+            self._carry = delta  # until its words are shown
+            raw_text = delta.region()
+        toks = snapshot_tokens(raw_text, self.tokenizer)
+        # too little text to be worth showing (under 8 characters)
+        if sum([len(t.raw) for t in toks]) + len(toks) < 9:
+            return None
+
+        # Words already displayed this session, kept in normalized form
+        overlap = self.overlap
+        keys = [t.key for t in toks]
+
+        if len(overlap):
+            # Find where the snapshot continues the shown text
+            # (Live Captions might edit, so the match may start mid-snapshot)
+            match_idx = overlap.match(keys, keys=True)
+
+            # Only append if substantial (3+ new words)
+            if len(toks) - match_idx < 3:
+                return None
+            display_text = ' '.join([t.raw for t in toks[match_idx:]])
+
+            # Update cumulative shown words
+            overlap.extend(keys[match_idx:], keys=True)
+        else:
+            # First update - show last ~10 words
+            display_text = ' '.join([t.raw for t in toks[-10:]])
+            overlap.reset(keys[-10:], keys=True)
+
+        self.last_update = now
+        if self._carry is not None:
+            self._text, self._shown = self._carry.text, len(self._carry.text)
+            self._carry = None
+
+        if len(display_text) > 5:
+            return display_text
+        return None
+
+    def _follow(self, delta, now):
+        # _update for a delta whose previous text is shown up to self._shown
+        text, stable, dropped = delta.text, delta.stable, delta.dropped
+        shown = self._shown - dropped
+        if 0 <= shown <= stable and (shown in (0, len(text)) or text[shown].isspace()
+                                     or text[shown - 1].isspace()):
+            start = shown  # only appended to
+        else:
+            # shown words were revised, extended or scrolled off: the words now in their
+            # place count as shown, one for one
+            start = min(max(shown, 0), stable)
+            start = max(text.rfind(' ', 0, start), text.rfind('\n', 0, start)) + 1
+            revised = len(self._text[start + dropped:self._shown].split())
+            for m in _WORD_RE.finditer(text, start):
+                if not revised:
+                    break
+                start = m.end()
+                revised -= 1
+        self._text, self._shown = text, start
+
+        toks = snapshot_tokens(text[start:], self.tokenizer)
+        # Only append if substantial (3+ new words, 8+ characters)
+        if len(toks) < 3 or sum([len(t.raw) for t in toks]) + len(toks) < 9:
+            return None
+        self.overlap.extend([t.key for t in toks], keys=True)
+        self._shown = len(text)
+        self.last_update = now
+        display_text = ' '.join([t.raw for t in toks])
+        if len(display_text) > 5:
+            return display_text
+        return None
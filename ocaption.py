@@ -0,0 +1,402 @@
+"""
+Headless capture: the caption pipeline without the Tk GUI.
+
+`HeadlessCapture` runs the same stages as `CaptionerApp` - LiveCaptionReader, the
+LiveDeduper worker pipeline, the autosave writer, the session journal and the final
+streaming clean - but never imports tkinter, so it suits unattended machines. Segments
+are handled on the pipeline worker, as there is no UI thread to hand them to.
+
+    python -m ocaption capture [--out DIR] [--duration SECONDS] [--echo]
+    python -m ocaption capture --replay benchmarks/corpus/sanitizer_sample.jsonl --speed 10
+    python -m ocaption capture --resume            # continue the last unfinished session
+    python -m ocaption recover [--out DIR]         # clean sessions a crash left unfinished
+    python -m ocaption search "budget sign off"    # search saved transcripts
+    python -m ocaption index [--rebuild]           # update the search index
+    python -m ocaption reclean [--workers N]       # re-run the cleaner over saved transcripts
+    python -m ocaption subtitles 20240105_093000 --format vtt   # subtitles from a journal
+
+Per-stage timings (see stage_stats.py) are written next to the transcript on stop, as
+`<session>.stats.json`. `--trace` (or OCAPTION_TRACE=1) also records a Chrome trace and
+periodic tracemalloc snapshots of the session (see session_trace.py). `--serve PORT`
+streams each de-duplicated segment to local subscribers as Server-Sent Events (see
+caption_server.py). `--subtitles srt vtt` writes subtitle cues next to the transcript as
+segments arrive, timed by when they were captured (see subtitle_export.py).
+
+`--replay` plays a recorded snapshot stream through a fake UIA desktop (see
+fake_desktop.py), so capture can be run and tested without Windows. Live Captions
+itself has to be open already in live mode. Capture stops on Ctrl+C, SIGTERM, after
+`--duration` or when a replay ends.
+
+Usage:
+    capture = HeadlessCapture('transcript')
+    capture.start()
+    ...
+    path = capture.stop()   # cleaned transcript
+"""
+import argparse
+from datetime import datetime
+import json
+import os
+import signal
+import sys
+from threading import Event, Lock
+import time
+
+from caption_pipeline import CaptionPipeline
+from live_caption_reader import PRESETS, LiveCaptionReader, PollPolicy
+from live_dedup import LiveDeduper
+import session_journal
+from stage_stats import StageStats, stats_path
+import text_cleaner
+from transcript_writer import TranscriptWriter, write_atomic
+
+DEFAULT_TRANSCRIPT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'transcript')
+DEFAULT_SERVE_PORT = 8765  # caption_server.DEFAULT_PORT, without importing asyncio
+DEFAULT_TRACE_INTERVAL = 300.0  # session_trace.DEFAULT_SNAPSHOT_INTERVAL
+SUBTITLE_FORMATS = ('srt', 'vtt')  # subtitle_export.FORMATS
+
+
+class HeadlessCapture:
+    """One capture session without a GUI. Settings mirror the CaptionerApp class attributes."""
+
+    def __init__(self, transcript_dir=DEFAULT_TRANSCRIPT_DIR, source=None, poll_policy='balanced',
+                 debounce=0.5, lookback_words=1024, near_dup_threshold=text_cleaner.NEAR_DUP_THRESHOLD,
+                 sync='flush', commit_delay=0.5, checkpoint_interval=30.0, resume=None,
+                 on_segment=None, trace=False,
+                 trace_interval=DEFAULT_TRACE_INTERVAL, serve_port=None,
+                 subtitles=()):
+        self.transcript_dir = transcript_dir
+        self.source = source
+        self.poll_policy = poll_policy
+        self.debounce = debounce
+        self.lookback_words = lookback_words
+        self.near_dup_threshold = near_dup_threshold
+        self.sync = sync
+        self.commit_delay = commit_delay
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume            # journal directory of a session to continue
+        self.on_segment = on_segment    # optional callback(text), e.g. to echo captions
+        self.trace = trace              # write a Chrome trace and tracemalloc snapshots
+        self.trace_interval = trace_interval
+        self.serve_port = serve_port    # localhost port for the SSE caption stream, None = off
+        self.subtitles = subtitles      # subtitle formats to write, e.g. ('srt', 'vtt')
+        self.autosave_path = None
+        self.reader = None
+        self.pipeline = None
+        self.dedup = None
+        self.stats = None
+        self._trace = None
+        self.server = None
+        self._subtitles = []
+        self._writer = None
+        self._journal = None
+        self._cleaner = None
+        self._lock = Lock()
+        # counters, for diagnostics
+        self.segments = 0
+
+    def start(self):
+        os.makedirs(self.transcript_dir, exist_ok=True)
+        if self.serve_port is not None:
+            import caption_server  # asyncio is only loaded when serving
+            self.server = caption_server.CaptionServer(port=self.serve_port)
+            self.server.start()
+        self.stats = StageStats()
+        if self.resume:
+            session = session_journal.recover(self.resume)
+            name = session.name
+            self.dedup = session.deduper(window=self.lookback_words, min_interval=self.debounce)
+            # the final clean covers the whole session: continue from the last checkpoint
+            self._cleaner = session.cleaner(self.near_dup_threshold)
+            journal_dir = self.resume
+        else:
+            name = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.dedup = LiveDeduper(window=self.lookback_words, min_interval=self.debounce)
+            self._cleaner = text_cleaner.StreamingCleaner(self.near_dup_threshold)
+            journal_dir = session_journal.journal_path(self.transcript_dir, name)
+
+        self.autosave_path = os.path.join(self.transcript_dir, f"{name}.txt")
+        self._writer = TranscriptWriter(self.autosave_path, max_delay=self.commit_delay,
+                                        sync=self.sync, stats=self.stats)
+        self._writer.write(f"[Recording started {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]\n")
+        self._journal = session_journal.SessionJournal(
+            journal_dir, state_fn=self.dedup.state, checkpoint_interval=self.checkpoint_interval,
+            sync=self.sync, max_delay=self.commit_delay, cleaner=self._cleaner)
+        # cue times count from the session start, also when it is resumed
+        root = os.path.splitext(self.autosave_path)[0]
+        if self.subtitles:
+            import subtitle_export  # only loaded when subtitles are written
+            self._subtitles = [subtitle_export.SubtitleWriter(f"{root}.{fmt}", fmt,
+                                                              origin=self._journal.started,
+                                                              sync=self.sync,
+                                                              commit_delay=self.commit_delay)
+                               for fmt in self.subtitles]
+
+        if self.trace:
+            import session_trace  # tracemalloc is only loaded when tracing
+            self._trace = session_trace.SessionTrace(os.path.splitext(self.autosave_path)[0],
+                                                     snapshot_interval=self.trace_interval)
+            self._trace.start()
+            self.stats.tracer = self._trace
+
+        self.pipeline = CaptionPipeline(on_segment=self._append, dedup=self.dedup,
+                                        stats=self.stats)
+        self.reader = LiveCaptionReader(source=self.source, stats=self.stats,
+                                        policy=PollPolicy.preset(self.poll_policy))
+        self.reader.on_delta = self.pipeline.submit
+        self.pipeline.start()
+        self.reader.start()
+
+    def stop(self):
+        """Stop capturing, write the cleaned transcript and return its path."""
+        if self.reader is not None:
+            self.reader.stop()
+            self.stats.set('reader_polls', self.reader.polls)
+            self.stats.set('reader_changes', self.reader.changes)
+        if self.pipeline is not None:
+            # a worker still running after the timeout owns the deduper: no flush then
+            if self.pipeline.stop():
+                seg = self.dedup.flush()
+                if seg:
+                    self._append(seg)
+        self.reader = self.pipeline = None
+        if self._writer is None:
+            return self.autosave_path
+        self._writer.write(f"\n[Recording stopped {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}]\n")
+        self._writer.close()
+        self._writer = None
+        for subs in self._subtitles:
+            subs.close()
+        self._subtitles = []
+        cleaned = self._cleaner.finish()
+        if cleaned:
+            write_atomic(self.autosave_path, cleaned)
+        self._journal.finish(self.autosave_path)
+        if self.server is not None:
+            self.stats.set('server_clients', self.server.clients)
+            self.stats.set('server_dropped_clients', self.server.dropped_clients)
+            self.server.stop()
+            self.server = None
+        try:
+            self.stats.dump(stats_path(self.autosave_path))
+        except OSError:
+            pass
+        if self._trace is not None:
+            self.stats.tracer = None
+            self._trace.stop()
+            self._trace = None
+        try:
+            import transcript_index  # sqlite3 is only loaded once a session is saved
+            with transcript_index.TranscriptIndex(self.transcript_dir) as index:
+                index.index_files([self.autosave_path])
+        except Exception:
+            pass
+        return self.autosave_path
+
+    def _append(self, seg):
+        text = seg + " "
+        captured = self.dedup.captured_at
+        with self._lock:
+            if self._writer is None:
+                return
+            self.segments += 1
+            self._writer.write(text)
+            # also feeds the cleaner
+            self._journal.append_text(text, t=captured)
+            for subs in self._subtitles:
+                subs.add(seg, captured)
+        if self.server is not None:
+            self.server.publish(seg)
+        if self.on_segment:
+            self.on_segment(seg)
+
+
+def _load_stream(path):
+    # the recording format of `live_caption_reader.py --record`
+    with open(path, 'r', encoding='utf-8') as f:
+        return [(float(rec['t']), rec['text']) for rec in map(json.loads, filter(str.strip, f))]
+
+
+def capture(args):
+    source = None
+    until = args.duration
+    if args.replay:
+        from fake_desktop import FakeSource, replay_desktop
+        stream = _load_stream(args.replay)
+        source = FakeSource(replay_desktop(stream, speed=args.speed))
+        end = (stream[-1][0] if stream else 0.0) / args.speed + 1.0
+        until = end if until is None else min(until, end)
+
+    resume = None
+    if args.resume:
+        unfinished = session_journal.unfinished_sessions(args.out)
+        if not unfinished:
+            print('No unfinished session to resume.', file=sys.stderr)
+            return 1
+        resume = unfinished[-1]
+
+    import session_trace  # tracemalloc is only loaded once a capture starts
+    cap = HeadlessCapture(args.out, source=source, poll_policy=args.poll_policy,
+                          debounce=args.debounce, sync=args.sync, resume=resume,
+                          trace=args.trace or session_trace.requested(argv=[]),
+                          trace_interval=args.trace_interval, serve_port=args.serve,
+                          subtitles=args.subtitles,
+                          on_segment=(lambda seg: print(seg, flush=True)) if args.echo else None)
+    done = Event()
+    signal.signal(signal.SIGINT, lambda *_: done.set())
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, lambda *_: done.set())
+    try:
+        cap.start()
+    except (RuntimeError, OSError) as e:
+        print(f'Cannot start capture: {e}', file=sys.stderr)
+        return 1
+    print(f'Capturing to {cap.autosave_path} (Ctrl+C to stop)', file=sys.stderr, flush=True)
+    if cap.server is not None:
+        print(f'Streaming captions at http://127.0.0.1:{cap.server.port}/events',
+              file=sys.stderr, flush=True)
+    deadline = None if until is None else time.monotonic() + until
+    # short waits so signals are handled promptly on Windows
+    while not done.wait(0.2):
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+    path = cap.stop()
+    print(f'Saved {path} ({cap.segments} segments)', file=sys.stderr)
+    return 0
+
+
+def recover(args):
+    paths = session_journal.finalize_unfinished(args.out)
+    for path in paths:
+        print(f'Recovered {path}')
+    if paths:
+        import transcript_index
+        with transcript_index.TranscriptIndex(args.out) as index:
+            index.index_files(paths)
+    return 0
+
+
+def index(args):
+    import transcript_index
+    if args.rebuild:
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(os.path.join(args.out, transcript_index.INDEX_NAME) + suffix)
+            except OSError:
+                pass
+    t0 = time.perf_counter()
+    with transcript_index.TranscriptIndex(args.out) as idx:
+        indexed, removed, unchanged = idx.sync()
+    print(f'Indexed {indexed}, removed {removed}, unchanged {unchanged} '
+          f'in {time.perf_counter() - t0:.2f}s')
+    return 0
+
+
+def search(args):
+    import transcript_index
+    with transcript_index.TranscriptIndex(args.out) as idx:
+        idx.sync()
+        t0 = time.perf_counter()
+        hits = idx.search(' '.join(args.query), limit=args.limit)
+        took = time.perf_counter() - t0
+    for h in hits:
+        print(f'{h.session}  {h.timestamp}  {h.snippet}')
+    print(f'{len(hits)} result(s) in {took * 1e3:.1f} ms', file=sys.stderr)
+    return 0
+
+
+def reclean(args):
+    import batch_clean  # pulls in multiprocessing, which capture doesn't need
+    def progress(done, total):
+        if done % 100 == 0 or done == total:
+            print(f'\r{done}/{total}', end='', file=sys.stderr, flush=True)
+
+    stats = batch_clean.reclean(args.out, dest=args.dest, workers=args.workers, force=args.force,
+                                dry_run=args.dry_run, progress=progress)
+    if stats.processed:
+        print(file=sys.stderr)
+    if args.dry_run:
+        print(f'{stats.cleaned} of {stats.scanned} files would be re-cleaned')
+        return 0
+    for path, msg in stats.errors:
+        print(f'Failed {path}: {msg}', file=sys.stderr)
+    print(stats.summary())
+    return 1 if stats.errors else 0
+
+
+def subtitles(args):
+    directory = session_journal.journal_path(args.out, args.session)
+    if not session_journal.segment_paths(directory):
+        print(f'No journal for session {args.session} in {args.out}', file=sys.stderr)
+        return 1
+    dest = args.dest or os.path.join(args.out, f'{args.session}.{args.format}')
+    import subtitle_export
+    cues = subtitle_export.export_journal(directory, dest, args.format)
+    print(f'Wrote {cues} cues to {dest}')
+    return 0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='ocaption', description='OCaption without the GUI')
+    sub = ap.add_subparsers(dest='command', required=True)
+
+    cap = sub.add_parser('capture', help='capture Live Captions into a transcript')
+    cap.add_argument('--out', default=DEFAULT_TRANSCRIPT_DIR, help='transcript folder')
+    cap.add_argument('--duration', type=float, help='stop after this many seconds')
+    cap.add_argument('--poll-policy', default='balanced', choices=sorted(PRESETS))
+    cap.add_argument('--debounce', type=float, default=0.5, help='live update window (seconds)')
+    cap.add_argument('--sync', default='flush', choices=('none', 'flush', 'fsync'))
+    cap.add_argument('--echo', action='store_true', help='print segments as they are captured')
+    cap.add_argument('--resume', action='store_true', help='continue the last unfinished session')
+    cap.add_argument('--replay', metavar='FILE', help='play back a recorded snapshot stream')
+    cap.add_argument('--speed', type=float, default=1.0, help='replay speed-up factor')
+    cap.add_argument('--serve', type=int, metavar='PORT', nargs='?', const=DEFAULT_SERVE_PORT,
+                     help='stream segments as Server-Sent Events on localhost (default port 8765)')
+    cap.add_argument('--subtitles', nargs='+', choices=SUBTITLE_FORMATS, default=(),
+                     help='also write subtitles next to the transcript as captions arrive')
+    cap.add_argument('--trace', action='store_true',
+                     help='write a Chrome trace and tracemalloc snapshots next to the transcript')
+    cap.add_argument('--trace-interval', type=float, default=DEFAULT_TRACE_INTERVAL,
+                     help='seconds between tracemalloc snapshots')
+    cap.set_defaults(func=capture)
+
+    rec = sub.add_parser('recover', help='clean sessions left unfinished by a crash')
+    rec.add_argument('--out', default=DEFAULT_TRANSCRIPT_DIR, help='transcript folder')
+    rec.set_defaults(func=recover)
+
+    idx = sub.add_parser('index', help='update the transcript search index')
+    idx.add_argument('--out', default=DEFAULT_TRANSCRIPT_DIR, help='transcript folder')
+    idx.add_argument('--rebuild', action='store_true', help='rebuild it from scratch')
+    idx.set_defaults(func=index)
+
+    find = sub.add_parser('search', help='search saved transcripts')
+    find.add_argument('query', nargs='+')
+    find.add_argument('--out', default=DEFAULT_TRANSCRIPT_DIR, help='transcript folder')
+    find.add_argument('--limit', type=int, default=20)
+    find.set_defaults(func=search)
+
+    cln = sub.add_parser('reclean', help='re-run the cleaner over saved transcripts')
+    cln.add_argument('--out', default=DEFAULT_TRANSCRIPT_DIR, help='transcript folder')
+    cln.add_argument('--dest', help='write cleaned copies here instead of in place')
+    cln.add_argument('--workers', type=int, help='worker processes (default: CPU count)')
+    cln.add_argument('--force', action='store_true', help='ignore the manifest, clean everything')
+    cln.add_argument('--dry-run', action='store_true', help='only count files to re-clean')
+    cln.set_defaults(func=reclean)
+
+    subs = sub.add_parser('subtitles', help='write subtitles for a journaled session')
+    subs.add_argument('session', help='session name, e.g. 20240105_093000')
+    subs.add_argument('--out', default=DEFAULT_TRANSCRIPT_DIR, help='transcript folder')
+    subs.add_argument('--format', default='srt', choices=SUBTITLE_FORMATS)
+    subs.add_argument('--dest', help='subtitle file (default: next to the transcript)')
+    subs.set_defaults(func=subtitles)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # reclean's worker processes re-run the frozen EXE
+        import multiprocessing
+        multiprocessing.freeze_support()
+    sys.exit(main())
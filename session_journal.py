@@ -0,0 +1,430 @@
+"""
+Crash-safe, append-only journal of a captioning session.
+
+Each session gets a directory `transcript/.journal/<session>/` of numbered segment files
+(000001.seg, 000002.seg, ...). A segment is a run of length-prefixed records:
+
+    <payload length:u32> <type:u8> <timestamp:f64> <crc32 of payload:u32> <payload>
+
+TEXT records hold transcript text as it was appended, CHECKPOINT records the live-dedup
+state as JSON, and an END record marks a session whose cleaned transcript was written.
+Records are committed by a background TranscriptWriter, so appending never waits on disk.
+
+Every segment opens with a checkpoint and one is repeated every `checkpoint_interval`
+seconds, so `recover()` only reads the newest segment: it takes the last checkpoint and
+replays the text recorded after it. A record cut short by a crash (bad length or CRC)
+ends its segment.
+
+Given a StreamingCleaner, the journal feeds it the appended text and cleans as it goes:
+each checkpoint appends the sentences kept since the last one to `cleaned.txt` (one per
+line) and records the cleaner's unfinished input and the size of that file. Finishing
+a crashed session then reads the cleaned sentences back and only cleans the text after
+the last checkpoint.
+
+Once a session's cleaned transcript is written, a small `finished` file is put next to
+its segments, so looking for unfinished sessions at launch does not read old journals.
+Finished journals are kept: subtitles can be rebuilt from them.
+
+Usage:
+    cleaner = text_cleaner.StreamingCleaner()
+    journal = SessionJournal.create(transcript_dir, '20240101_120000', state_fn=dedup.state,
+                                    cleaner=cleaner)
+    journal.append_text('hello there ')
+    journal.finish(output_path)
+
+    for directory in unfinished_sessions(transcript_dir):
+        session = recover(directory)
+        dedup = session.deduper()          # continues where the session stopped
+        cleaner = session.cleaner()        # holds the session's cleaned text so far
+        text = ''.join(t for _, t in iter_text(directory))
+
+    finalize_unfinished(transcript_dir)    # what the app does on launch
+"""
+import json
+import os
+import struct
+import time
+import zlib
+
+from live_dedup import LiveDeduper
+import text_cleaner
+from transcript_writer import TranscriptWriter, write_atomic
+
+JOURNAL_DIR = '.journal'
+SEGMENT_SUFFIX = '.seg'
+CLEANED_NAME = 'cleaned.txt'
+FINISHED_NAME = 'finished'
+
+TEXT = 1
+CHECKPOINT = 2
+END = 3
+
+_HEADER = struct.Struct('<IBdI')
+# anything larger is treated as a corrupt length prefix
+MAX_RECORD_BYTES = 16 << 20
+DEFAULT_SEGMENT_BYTES = 1 << 20
+DEFAULT_CHECKPOINT_INTERVAL = 30.0
+
+
+def journal_path(transcript_dir, name):
+    return os.path.join(transcript_dir, JOURNAL_DIR, name)
+
+
+def encode_record(kind: int, payload: bytes, t: float) -> bytes:
+    return _HEADER.pack(len(payload), kind, t, zlib.crc32(payload)) + payload
+
+
+def scan_segment(path):
+    """Return ([(kind, t, payload), ...], end offset of the last intact record)."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return [], 0
+    records = []
+    pos = 0
+    size = _HEADER.size
+    while pos + size <= len(data):
+        length, kind, t, crc = _HEADER.unpack_from(data, pos)
+        end = pos + size + length
+        if length > MAX_RECORD_BYTES or end > len(data):
+            break
+        payload = data[pos + size:end]
+        if zlib.crc32(payload) != crc:
+            break
+        records.append((kind, t, payload))
+        pos = end
+    return records, pos
+
+
+def segment_paths(directory):
+    """Segment files of a journal, oldest first."""
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(SEGMENT_SUFFIX))
+    except OSError:
+        return []
+    return [os.path.join(directory, n) for n in names]
+
+
+class SessionJournal:
+    """Writes one session's journal. `state_fn()` supplies the checkpoint state.
+
+    Opening an existing journal continues it in a new segment; pass it the cleaner from
+    `recover(directory).cleaner()` to keep cleaning where the session stopped.
+    """
+
+    def __init__(self, directory, state_fn=None, segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL, sync='flush',
+                 max_delay=0.5, clock=time.time, cleaner=None):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.name = os.path.basename(os.path.normpath(directory))
+        self.state_fn = state_fn
+        self.segment_bytes = segment_bytes
+        self.checkpoint_interval = checkpoint_interval
+        self.sync = sync
+        self.max_delay = max_delay
+        self._clock = clock
+        existing = segment_paths(directory)
+        self._index = int(os.path.basename(existing[-1])[:-len(SEGMENT_SUFFIX)]) if existing else 0
+        now = self._clock()
+        # time of the session's first record, also when a journal is continued
+        self.started = (started_at(directory) if existing else None) or now
+        self._writer = None
+        self._segment_size = 0
+        self._last_checkpoint = 0.0
+        self._closed = False
+        self.cleaner = cleaner
+        self._cleaned_writer = None
+        self._cleaned = self._cleaned_bytes = 0   # sentences and bytes in cleaned.txt
+        if cleaner is not None:
+            self._open_cleaned(existing)
+        # counters, for diagnostics
+        self.records = 0
+        self.checkpoints = 0
+        self.segments = 0
+        self._roll(now)
+
+    @classmethod
+    def create(cls, transcript_dir, name, **kwargs):
+        return cls(journal_path(transcript_dir, name), **kwargs)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def append_text(self, text: str, t=None):
+        """Record `text` as appended to the transcript at time `t`."""
+        if not text or self._closed:
+            return
+        now = self._clock() if t is None else t
+        self._append(TEXT, text.encode('utf-8'), now)
+        if self.cleaner is not None:
+            self.cleaner.feed(text)
+        # the dedup and cleaner state already include `text`, so checkpoints go after it
+        if self._segment_size >= self.segment_bytes:
+            self._roll(now)
+        elif (self.checkpoint_interval is not None
+              and now - self._last_checkpoint >= self.checkpoint_interval):
+            self.checkpoint(now)
+
+    def checkpoint(self, t=None):
+        """Record the current dedup state (and the cleaner's, writing out its new sentences)."""
+        if self._closed:
+            return
+        now = self._clock() if t is None else t
+        try:
+            state = self.state_fn() if self.state_fn is not None else {}
+        except Exception:
+            # a missed checkpoint only makes recovery replay a little more
+            return
+        if self.cleaner is not None:
+            state = dict(state, cleaner=self._cleaner_state())
+        self._append(CHECKPOINT, json.dumps(state).encode('utf-8'), now)
+        self._last_checkpoint = now
+        self.checkpoints += 1
+
+    def finish(self, output=None):
+        """Mark the session complete (its cleaned transcript is `output`) and close."""
+        if self._closed:
+            return
+        self._append(END, json.dumps({'output': output}).encode('utf-8'), self._clock())
+        self.close()
+        if self._writer is None or self._writer.error is None:
+            _write_finished(self.directory, output)
+
+    def close(self, timeout=5.0):
+        """Commit what is queued and close, leaving the session recoverable."""
+        self._closed = True
+        if self._writer is not None:
+            self._writer.close(timeout)
+        if self._cleaned_writer is not None:
+            self._cleaned_writer.close(timeout)
+
+    def flush(self, timeout=None) -> bool:
+        return self._writer.flush(timeout) if self._writer is not None else True
+
+    def _append(self, kind, payload, t):
+        record = encode_record(kind, payload, t)
+        self._writer.write(record)
+        self._segment_size += len(record)
+        self.records += 1
+
+    def _roll(self, now):
+        # the old segment finishes committing in the background
+        if self._writer is not None:
+            self._writer.close(wait=False)
+        self._index += 1
+        path = os.path.join(self.directory, f"{self._index:06d}{SEGMENT_SUFFIX}")
+        self._writer = TranscriptWriter(path, max_delay=self.max_delay, sync=self.sync,
+                                        binary=True)
+        self._segment_size = 0
+        self.segments += 1
+        self.checkpoint(now)
+
+    def _open_cleaned(self, existing):
+        path = os.path.join(self.directory, CLEANED_NAME)
+        if existing:
+            # cleaned.txt may run past the checkpoint the cleaner was restored from
+            session = recover(self.directory)
+            if session.cleaned() is not None:
+                self._cleaned = session.cleaner_state['cleaned']
+                self._cleaned_bytes = session.cleaner_state['cleaned_bytes']
+        try:
+            with open(path, 'ab') as f:
+                f.truncate(self._cleaned_bytes)
+        except OSError:
+            pass
+        self._cleaned_writer = TranscriptWriter(path, max_delay=self.max_delay,
+                                                sync=self.sync, binary=True)
+
+    def _cleaner_state(self):
+        new = self.cleaner.kept(self._cleaned)
+        if new:
+            data = ''.join(sentence + '\n' for sentence in new).encode('utf-8')
+            self._cleaned_writer.write(data)
+            self._cleaned += len(new)
+            self._cleaned_bytes += len(data)
+        return dict(self.cleaner.state(), cleaned=self._cleaned,
+                    cleaned_bytes=self._cleaned_bytes)
+
+
+class RecoveredSession:
+    """What `recover()` found: the last checkpoint state and the text recorded after it."""
+
+    def __init__(self, directory, state, tail, finished, segments_read):
+        self.directory = directory
+        self.name = os.path.basename(os.path.normpath(directory))
+        # cleaner state from the last checkpoint (None if the journal had no cleaner)
+        self.cleaner_state = state.pop('cleaner', None)
+        self.state = state          # dedup state from the last checkpoint ({} if none)
+        self.tail = tail            # [(t, text), ...] recorded after that checkpoint
+        self.finished = finished
+        self.segments_read = segments_read
+
+    def cleaned(self):
+        """Sentences the cleaner had kept at the last checkpoint, read from cleaned.txt.
+
+        None if there is no cleaner state or cleaned.txt is shorter than it says (the
+        crash came before the file was committed).
+        """
+        state = self.cleaner_state
+        if not state:
+            return None
+        size = state.get('cleaned_bytes', 0)
+        try:
+            with open(os.path.join(self.directory, CLEANED_NAME), 'rb') as f:
+                data = f.read(size)
+        except OSError:
+            data = b''
+        if len(data) != size:
+            return None
+        kept = data.decode('utf-8', 'replace').splitlines()
+        return kept if len(kept) == state.get('cleaned') else None
+
+    def cleaner(self, threshold=text_cleaner.NEAR_DUP_THRESHOLD, **kwargs):
+        """A StreamingCleaner that has cleaned everything the session recorded.
+
+        It continues from the last checkpoint and cleans only the text after it; a
+        journal without a usable cleaner checkpoint is cleaned from the start.
+        """
+        cleaner = text_cleaner.StreamingCleaner(threshold, **kwargs)
+        kept = self.cleaned()
+        if kept is None:
+            for _t, text in iter_text(self.directory):
+                cleaner.feed(text)
+            return cleaner
+        cleaner.restore(self.cleaner_state, kept)
+        for _t, text in self.tail:
+            cleaner.feed(text)
+        return cleaner
+
+    def deduper(self, **kwargs) -> LiveDeduper:
+        """A LiveDeduper in the state the session left it in."""
+        dedup = LiveDeduper(**kwargs)
+        dedup.restore(self.state)
+        for t, text in self.tail:
+            dedup.overlap.extend(text.split())
+            dedup.last_update = max(dedup.last_update, t)
+        return dedup
+
+
+def recover(directory) -> RecoveredSession:
+    """Read a journal back from its last checkpoint; cost is proportional to the tail."""
+    paths = segment_paths(directory)
+    state = None
+    records = []
+    read = 0
+    for path in reversed(paths):
+        recs, _end = scan_segment(path)
+        read += 1
+        for i in range(len(recs) - 1, -1, -1):
+            if recs[i][0] == CHECKPOINT:
+                state = json.loads(recs[i][2].decode('utf-8'))
+                records = recs[i + 1:] + records
+                break
+        else:
+            records = recs + records
+            continue
+        break
+    finished = bool(records) and records[-1][0] == END
+    tail = [(t, payload.decode('utf-8', 'replace')) for kind, t, payload in records
+            if kind == TEXT]
+    return RecoveredSession(directory, state or {}, tail, finished, read)
+
+
+def started_at(directory):
+    """Time of a journal's first record (the session start), or None if it has none."""
+    paths = segment_paths(directory)
+    records = scan_segment(paths[0])[0] if paths else []
+    return records[0][1] if records else None
+
+
+def iter_text(directory):
+    """Yield (t, text) for every TEXT record of a journal, in order."""
+    for path in segment_paths(directory):
+        for kind, t, payload in scan_segment(path)[0]:
+            if kind == TEXT:
+                yield t, payload.decode('utf-8', 'replace')
+
+
+def _write_finished(directory, output):
+    try:
+        write_atomic(os.path.join(directory, FINISHED_NAME), json.dumps({'output': output}))
+    except OSError:
+        pass
+
+
+def is_finished(directory) -> bool:
+    """True if a journal's session was finished, without reading its segments."""
+    return os.path.exists(os.path.join(directory, FINISHED_NAME))
+
+
+def unfinished_sessions(transcript_dir):
+    """Journal directories of sessions that never recorded an END (e.g. after a crash).
+
+    Journals written before the `finished` file existed are read once and then marked.
+    """
+    root = os.path.join(transcript_dir, JOURNAL_DIR)
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return []
+    found = []
+    for name in names:
+        directory = os.path.join(root, name)
+        if not os.path.isdir(directory) or is_finished(directory) or not segment_paths(directory):
+            continue
+        session = recover(directory)
+        if session.finished:
+            _write_finished(directory, None)
+        else:
+            found.append(directory)
+    return found
+
+
+def mark_finished(directory, output=None):
+    """Append an END record to a journal that is not open for writing."""
+    paths = segment_paths(directory)
+    if not paths:
+        return
+    path = paths[-1]
+    _records, end = scan_segment(path)
+    with open(path, 'r+b') as f:
+        # drop a torn record so the END marker stays readable
+        f.truncate(end)
+        f.seek(end)
+        f.write(encode_record(END, json.dumps({'output': output}).encode('utf-8'), time.time()))
+        f.flush()
+        os.fsync(f.fileno())
+    _write_finished(directory, output)
+
+
+def finalize(directory, output, threshold=text_cleaner.NEAR_DUP_THRESHOLD):
+    """Clean a journal's text into `output` (atomically) and mark the session finished.
+
+    Only the text after the last checkpoint is cleaned if the journal had a cleaner.
+    """
+    cleaned = recover(directory).cleaner(threshold).finish()
+    if cleaned:
+        write_atomic(output, cleaned)
+    mark_finished(directory, output)
+
+
+def finalize_unfinished(transcript_dir, threshold=text_cleaner.NEAR_DUP_THRESHOLD, skip=()):
+    """Finalize every unfinished session into `<transcript_dir>/<session>.txt`.
+
+    Journals in `skip` (e.g. the session being recorded) are left alone. Returns the
+    paths written.
+    """
+    written = []
+    for directory in unfinished_sessions(transcript_dir):
+        if directory in skip:
+            continue
+        output = os.path.join(transcript_dir, f"{os.path.basename(directory)}.txt")
+        try:
+            finalize(directory, output, threshold)
+        except Exception:
+            continue
+        written.append(output)
+    return written
@@ -0,0 +1,158 @@
+"""
+Opt-in profiling of long capture sessions: a Chrome trace of every stage plus periodic
+tracemalloc snapshots.
+
+Enabled with `python captioner.py --trace`, `python -m ocaption capture --trace` or
+OCAPTION_TRACE=1. A `SessionTrace` is attached to the session's StageStats
+(stage_stats.py), so every stage that is timed there - each reader poll, each
+`on_live_text` (live_match) call, each widget insert, each autosave write - also becomes
+a span, on the thread that ran it. Next to the session's transcript it writes:
+
+    <session>.trace.json        Chrome trace-event JSON (chrome://tracing, Perfetto)
+    <session>.tracemalloc.txt   every `snapshot_interval` seconds: traced memory and the
+                                top allocation changes since the previous snapshot
+
+Trace events are streamed to disk by a TranscriptWriter, so the trace doesn't grow in
+memory; a trace cut short by a crash still loads (the viewers accept a JSON array
+missing its closing bracket). tracemalloc slows allocation-heavy code noticeably, so
+this is for chasing a problem, not for everyday use.
+
+Usage:
+    trace = SessionTrace('transcript/20240105_093000')
+    trace.start()
+    stats.tracer = trace          # StageStats now also emits spans
+    ...
+    trace.stop()
+"""
+import json
+import os
+import sys
+from threading import Event, Thread, current_thread, get_ident
+import time
+import tracemalloc
+
+from transcript_writer import TranscriptWriter
+
+ENV_VAR = 'OCAPTION_TRACE'
+FLAG = '--trace'
+DEFAULT_SNAPSHOT_INTERVAL = 300.0
+
+
+def requested(argv=None, environ=None) -> bool:
+    """True if tracing was asked for on the command line or in the environment."""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    return FLAG in argv or environ.get(ENV_VAR, '') not in ('', '0')
+
+
+class SessionTrace:
+    def __init__(self, base_path, snapshot_interval=DEFAULT_SNAPSHOT_INTERVAL, top=15, frames=1):
+        self.trace_path = base_path + '.trace.json'
+        self.memory_path = base_path + '.tracemalloc.txt'
+        self.snapshot_interval = snapshot_interval
+        self.top = top
+        self.frames = frames
+        self._pid = os.getpid()
+        self._t0 = time.perf_counter()
+        self._threads = set()   # thread IDs whose name has been written
+        self._writer = None
+        self._stop = Event()
+        self._thread = None
+        self._started_tracemalloc = False
+        self._snapshot = None
+        # counters, for diagnostics
+        self.events = 0
+        self.snapshots = 0
+
+    def start(self):
+        self._writer = TranscriptWriter(self.trace_path, max_delay=1.0)
+        self._writer.write('[' + json.dumps({'name': 'process_name', 'ph': 'M', 'pid': self._pid,
+                                              'args': {'name': 'OCaption'}}))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracemalloc = True
+        self._snapshot = self._take_snapshot()
+        self._stop.clear()
+        self._thread = Thread(target=self._run, name='tracemalloc-snapshots', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Take a last memory snapshot, close the trace and stop tracemalloc."""
+        if self._writer is None:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        try:
+            self.snapshot()
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+            writer, self._writer = self._writer, None
+            writer.write('\n]\n')
+            writer.close()
+
+    def complete(self, name, seconds, args=None):
+        """A span of `seconds` that ended just now, on the calling thread."""
+        end = time.perf_counter()
+        event = {'name': name, 'cat': 'stage', 'ph': 'X', 'pid': self._pid,
+                 'tid': self._tid(), 'ts': round((end - seconds - self._t0) * 1e6, 1),
+                 'dur': round(seconds * 1e6, 1)}
+        if args:
+            event['args'] = args
+        self._emit(event)
+
+    def counter(self, name, values: dict):
+        self._emit({'name': name, 'ph': 'C', 'pid': self._pid, 'tid': self._tid(),
+                    'ts': round((time.perf_counter() - self._t0) * 1e6, 1), 'args': values})
+
+    def snapshot(self):
+        """Append traced memory and the top allocation changes to the tracemalloc file."""
+        if not tracemalloc.is_tracing():
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        snap = self._take_snapshot()
+        lines = [f"=== {time.strftime('%Y-%m-%d %H:%M:%S')}  +{time.perf_counter() - self._t0:.0f}s  "
+                 f"traced {current / 2**20:.1f} MiB (peak {peak / 2**20:.1f} MiB) ==="]
+        if self._snapshot is not None:
+            lines.append(f"top {self.top} allocation changes since the previous snapshot:")
+            for stat in snap.compare_to(self._snapshot, 'lineno')[:self.top]:
+                lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} blocks  "
+                             f"{stat.size / 1024:10.1f} KiB  {stat.traceback[0]}")
+        self._snapshot = snap
+        with open(self.memory_path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n\n')
+        self.counter('memory', {'traced_mib': round(current / 2**20, 2),
+                                'peak_mib': round(peak / 2**20, 2)})
+        self.snapshots += 1
+
+    def _take_snapshot(self):
+        # leave out the profiler's own allocations
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+
+    def _run(self):
+        while not self._stop.wait(self.snapshot_interval):
+            try:
+                self.snapshot()
+            except Exception:
+                pass
+
+    def _tid(self):
+        tid = get_ident()
+        if tid not in self._threads:
+            self._threads.add(tid)
+            self._emit({'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                        'args': {'name': current_thread().name}})
+        return tid
+
+    def _emit(self, event):
+        writer = self._writer
+        if writer is not None:
+            writer.write(',\n' + json.dumps(event))
+            self.events += 1
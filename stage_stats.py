@@ -0,0 +1,145 @@
+"""
+Always-on per-stage latency histograms and counters for a capture session.
+
+Each stage of the capture path times itself with `time.perf_counter()` and calls
+`record(stage, seconds)`. Histograms have fixed, log-spaced buckets (1 us to 10 s), so
+recording is a bisect and a few additions - no allocation and no lock, cheap enough to
+leave on in production. Stages record from the reader, pipeline, writer and Tk threads;
+without a lock an increment can very rarely be lost to a thread switch, which is fine
+for diagnostics.
+
+Stages recorded while capturing:
+
+    poll            one whole reader poll iteration (the next three and the hand-off)
+    find_control    CaptionLocator.locate (cached check, validation or full search)
+    window_text     reading the caption control's text
+    delta           compute_delta against the previous text, on a changed text
+    live_match      LiveDeduper on the pipeline worker (normalize + overlap match)
+    ui_insert       inserting one frame's segments into the caption widget (GUI only)
+    autosave_write  one TranscriptWriter commit (write + flush/fsync)
+
+and counters such as `discoveries`, `rediscoveries` (the caption control had to be found
+again), `dropped_updates` (held snapshots replaced by a newer one inside the debounce
+window) and `bytes_written`.
+
+With a `tracer` set (session_trace.SessionTrace), every recorded stage is also written
+out as a trace span.
+
+Usage:
+    stats = StageStats()
+    t0 = time.perf_counter()
+    text = ctrl.window_text()
+    stats.record('window_text', time.perf_counter() - t0)
+    stats.count('rediscoveries')
+    print(stats.report())
+    stats.dump('transcript/20240105_093000.stats.json')
+"""
+from bisect import bisect_left
+import json
+import os
+import time
+
+from transcript_writer import write_atomic
+
+# upper bucket bounds in seconds: 1, 2, 5 us ... 5 s, 10 s; one more bucket above
+BUCKETS = tuple(m * 10.0 ** e for e in range(-6, 1) for m in (1, 2, 5)) + (10.0,)
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (capped at the max)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def as_dict(self) -> dict:
+        ms = 1e3
+        return {
+            'count': self.count,
+            'total_ms': round(self.total * ms, 3),
+            'mean_ms': round(self.total / self.count * ms, 4) if self.count else 0.0,
+            'p50_ms': round(self.percentile(50) * ms, 4),
+            'p95_ms': round(self.percentile(95) * ms, 4),
+            'p99_ms': round(self.percentile(99) * ms, 4),
+            'max_ms': round(self.max * ms, 4),
+            # bucket upper bound in ms ('inf' for the last) -> count, empty buckets left out
+            'buckets': {('inf' if i == len(BUCKETS) else f'{BUCKETS[i] * ms:g}'): n
+                        for i, n in enumerate(self.counts) if n},
+        }
+
+
+class StageStats:
+    def __init__(self, clock=time.time):
+        self.started = clock()
+        self._clock = clock
+        self.stages = {}     # stage -> Histogram
+        self.counters = {}   # name -> number
+        self.tracer = None   # optional SessionTrace, gets every record as a span
+
+    def record(self, stage: str, seconds: float):
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages.setdefault(stage, Histogram())
+        h.add(seconds)
+        if self.tracer is not None:
+            self.tracer.complete(stage, seconds)
+
+    def count(self, name: str, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name: str, value):
+        """Record a value read from elsewhere, e.g. a component's own counter."""
+        self.counters[name] = value
+
+    def as_dict(self) -> dict:
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'elapsed_s': round(self._clock() - self.started, 3),
+            # copy() is atomic, other threads may be adding stages meanwhile
+            'stages': {name: h.as_dict() for name, h in sorted(self.stages.copy().items())},
+            'counters': dict(sorted(self.counters.copy().items())),
+        }
+
+    def report(self) -> str:
+        """Plain-text table for the stats panel."""
+        lines = [f"{'stage':<15} {'count':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+        for name, h in sorted(self.stages.copy().items()):
+            lines.append(f"{name:<15} {h.count:>8} {h.percentile(50) * 1e3:>8.3f} "
+                         f"{h.percentile(95) * 1e3:>8.3f} {h.percentile(99) * 1e3:>8.3f} "
+                         f"{h.max * 1e3:>8.3f}")
+        counters = self.counters.copy()
+        if counters:
+            lines.append('')
+            lines += [f"{name:<24} {value}" for name, value in sorted(counters.items())]
+        return '\n'.join(lines)
+
+    def dump(self, path):
+        """Write `as_dict()` to `path` as JSON (atomically)."""
+        write_atomic(path, json.dumps(self.as_dict(), indent=2))
+
+
+def stats_path(transcript_path) -> str:
+    """Where a session's stats are dumped: next to its transcript."""
+    root, _ext = os.path.splitext(transcript_path)
+    return root + '.stats.json'
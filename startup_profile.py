@@ -0,0 +1,117 @@
+"""
+Startup profiling: per-module import times and named startup phases.
+
+Enabled with `python captioner.py --profile-startup` or OCAPTION_PROFILE_STARTUP=1 (both
+work for the frozen EXE, where `python -X importtime` is not available). `start()` wraps
+`__import__` and records, for the first import of each module on the main thread, its
+cumulative time and its self time (excluding the modules it imported in turn). `mark()`
+records named phases such as 'tk root' or 'first window'. `finish()` prints the report
+to stderr and writes it as JSON.
+
+Usage:
+    import startup_profile
+    profile = startup_profile.start()
+    import heavy_module
+    profile.mark('imports')
+    ...
+    profile.finish('startup_profile.json')
+"""
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+
+ENV_VAR = 'OCAPTION_PROFILE_STARTUP'
+FLAG = '--profile-startup'
+
+_active = None
+
+
+def requested(argv=None, environ=None) -> bool:
+    """True if profiling was asked for on the command line or in the environment."""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    return FLAG in argv or environ.get(ENV_VAR, '') not in ('', '0')
+
+
+class StartupProfile:
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self.t0 = clock()
+        self.imports = []   # (module, cumulative s, self s, depth), in completion order
+        self.phases = []    # (name, seconds since t0)
+        self._stack = []    # time spent in nested imports, per open import
+        self._thread = threading.get_ident()
+        self._orig_import = None
+
+    def install(self):
+        if self._orig_import is None:
+            self._orig_import = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    def mark(self, name):
+        self.phases.append((name, self._clock() - self.t0))
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        orig = self._orig_import
+        if level or name in sys.modules or threading.get_ident() != self._thread:
+            return orig(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start = self._clock()
+        try:
+            return orig(name, globals, locals, fromlist, level)
+        finally:
+            took = self._clock() - start
+            nested = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += took
+            self.imports.append((name, took, took - nested, len(self._stack)))
+
+    def as_dict(self, top=None):
+        imports = sorted(self.imports, key=lambda r: r[2], reverse=True)[:top]
+        return {
+            'phases': [{'name': n, 'ms': round(t * 1e3, 2)} for n, t in self.phases],
+            'imports': [{'module': m, 'cumulative_ms': round(c * 1e3, 2),
+                         'self_ms': round(s * 1e3, 2), 'depth': d} for m, c, s, d in imports],
+        }
+
+    def report(self, top=25) -> str:
+        lines = ['startup phases (ms since start):']
+        lines += [f'  {t * 1e3:9.1f}  {n}' for n, t in self.phases]
+        lines.append(f'slowest imports by self time (top {top}):')
+        lines.append(f"  {'self ms':>9} {'cumul ms':>9}  module")
+        for m, c, s, d in sorted(self.imports, key=lambda r: r[2], reverse=True)[:top]:
+            lines.append(f'  {s * 1e3:9.1f} {c * 1e3:9.1f}  {"  " * d}{m}')
+        return '\n'.join(lines)
+
+    def finish(self, path=None, top=25):
+        """Stop recording imports, print the report and write it to `path` as JSON."""
+        self.uninstall()
+        try:
+            print(self.report(top), file=sys.stderr)
+        except Exception:
+            pass  # no console (windowed EXE)
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.as_dict(), f, indent=2)
+
+
+def start() -> StartupProfile:
+    """Begin profiling (once per process) and return the active profile."""
+    global _active
+    if _active is None:
+        _active = StartupProfile()
+        _active.install()
+    return _active
+
+
+def active():
+    """The profile started by `start()`, or None when not profiling."""
+    return _active
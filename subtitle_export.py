@@ -0,0 +1,169 @@
+"""
+Streaming SRT / WebVTT export of a captioning session.
+
+`SubtitleWriter` turns de-duplicated segments into subtitle cues while the session is
+running. Each cue starts when its words were captured from Live Captions (relative to
+`origin`, the session start) and ends when the next one starts, capped at
+`max_duration`. A segment that arrives less than `min_duration` after the previous one
+is merged into its cue while they fit on `max_lines` lines of `line_chars`; a segment
+too long for one cue is split and its time shared out by length.
+
+Only the cue waiting for its end time is kept in memory; finished cues are appended
+through a TranscriptWriter and never rewritten, so a cue costs the same at hour four as
+at minute one. Opening an existing file (a resumed session) continues its numbering
+after the last cue, found by reading only the end of the file.
+
+`export_journal()` writes the same subtitles after the fact from a session journal
+(see session_journal.py), whose TEXT records carry their capture time.
+
+Usage:
+    subs = SubtitleWriter('transcript/20240105_093000.srt', origin=session_start)
+    subs.add('so the plan for next week', t=captured_at)
+    ...
+    subs.close()
+
+    export_journal('transcript/.journal/20240105_093000', 'meeting.vtt')
+"""
+import os
+import re
+import time
+
+import session_journal
+from transcript_writer import TranscriptWriter
+
+FORMATS = ('srt', 'vtt')
+# reading speed used to time the last cue, which has no next cue to end it
+CHARS_PER_SECOND = 15.0
+_CUE_RE = re.compile(r'(?m)^(\d+)\r?\n[\d:.,]+ --> (\d+):(\d\d):(\d\d)[.,](\d{3})')
+_TAIL_BYTES = 4096
+# the "[HH:MM:SS] " the GUI puts before the caption text found on start
+_STAMP_RE = re.compile(r'^\[\d\d:\d\d:\d\d\]\s*')
+
+
+def format_timestamp(seconds: float, fmt='srt') -> str:
+    """00:01:02,345 (SRT) or 00:01:02.345 (WebVTT)."""
+    ms = max(0, int(round(seconds * 1000)))
+    h, ms = divmod(ms, 3_600_000)
+    m, ms = divmod(ms, 60_000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{',' if fmt == 'srt' else '.'}{ms:03d}"
+
+
+def wrap(text: str, width: int) -> list:
+    """Greedy word wrap; a word longer than `width` gets a line of its own."""
+    lines, line = [], ''
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def format_cue(index, start, end, lines, fmt='srt') -> str:
+    return (f"{index}\n{format_timestamp(start, fmt)} --> {format_timestamp(end, fmt)}\n"
+            + '\n'.join(lines) + '\n\n')
+
+
+def last_cue(path):
+    """(index, end seconds) of the last cue in a subtitle file; (0, 0.0) if there is none."""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(max(0, f.seek(0, os.SEEK_END) - _TAIL_BYTES))
+            tail = f.read().decode('utf-8', 'replace')
+    except OSError:
+        return 0, 0.0
+    found = None
+    for found in _CUE_RE.finditer(tail):
+        pass
+    if found is None:
+        return 0, 0.0
+    index, h, m, s, ms = map(int, found.groups())
+    return index, h * 3600 + m * 60 + s + ms / 1000
+
+
+class SubtitleWriter:
+    def __init__(self, path, fmt=None, origin=None, min_duration=1.0, max_duration=6.0,
+                 line_chars=42, max_lines=2, sync='flush', commit_delay=0.5):
+        fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+        if fmt not in FORMATS:
+            raise ValueError(f'subtitle format must be one of {FORMATS}, not {fmt!r}')
+        self.path = path
+        self.fmt = fmt
+        self.origin = time.time() if origin is None else origin
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.line_chars = line_chars
+        self.max_lines = max_lines
+        # a resumed session continues after the cues already written
+        self.index, self._floor = last_cue(path)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._writer = TranscriptWriter(path, max_delay=commit_delay, sync=sync)
+        if new and fmt == 'vtt':
+            self._writer.write('WEBVTT\n\n')
+        self._text = None    # the cue waiting for its end time
+        self._start = 0.0
+        # counters, for diagnostics
+        self.cues = 0
+
+    def add(self, text: str, t=None):
+        """Add a segment captured at time `t` (time.time() seconds)."""
+        text = ' '.join(text.split())
+        if not text or self._writer is None:
+            return
+        start = max((time.time() if t is None else t) - self.origin, self._floor)
+        if self._text is not None:
+            if (start - self._start < self.min_duration
+                    and len(self._text) + 1 + len(text) <= self.line_chars * self.max_lines):
+                # too soon to be read on its own
+                self._text = f"{self._text} {text}"
+                return
+            self._emit(min(start, self._start + self.max_duration))
+        self._text, self._start = text, start
+
+    def close(self):
+        """Write the last cue and close the file."""
+        if self._writer is None:
+            return
+        if self._text is not None:
+            reading = len(self._text) / CHARS_PER_SECOND
+            self._emit(self._start + min(self.max_duration, max(self.min_duration, reading)))
+        writer, self._writer = self._writer, None
+        writer.close()
+
+    def _emit(self, end):
+        text, start = self._text, self._start
+        self._text = None
+        end = max(end, start + 0.001)
+        lines = wrap(text, self.line_chars)
+        chunks = [lines[i:i + self.max_lines] for i in range(0, len(lines), self.max_lines)]
+        per_char = (end - start) / sum(len(line) for line in lines)
+        out = []
+        for chunk in chunks:
+            self.index += 1
+            cue_end = end if chunk is chunks[-1] else start + per_char * sum(len(line) for line in chunk)
+            out.append(format_cue(self.index, start, cue_end, chunk, self.fmt))
+            start = cue_end
+        self._writer.write(''.join(out))
+        self._floor = end
+        self.cues += len(chunks)
+
+
+def export_journal(directory, path, fmt=None, **kwargs) -> int:
+    """Write subtitles for a journaled session to `path`; returns the number of cues.
+
+    Times are relative to the journal's first record (the session start). Reads one
+    journal segment at a time.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    subs = SubtitleWriter(path, fmt, origin=session_journal.started_at(directory), **kwargs)
+    try:
+        for t, text in session_journal.iter_text(directory):
+            subs.add(_STAMP_RE.sub('', text), t)
+    finally:
+        subs.close()
+    return subs.cues
@@ -0,0 +1,60 @@
+"""Tests for batch re-cleaning."""
+import os
+
+import batch_clean
+import session_journal
+from text_cleaner import clean_text
+
+DIRTY = "the the plan is is set. The plan is set. Ready to show live captions in English\nok then."
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_reclean_in_place_with_pool_then_skips_unchanged(tmp_path):
+    root = str(tmp_path)
+    paths = [os.path.join(root, '2024', f'{i:02d}.txt') for i in range(6)]
+    for i, p in enumerate(paths):
+        _write(p, f"file {i} {DIRTY}")
+    _write(os.path.join(root, '.journal', 'x.txt'), DIRTY)
+
+    stats = batch_clean.reclean(root, workers=2)
+    assert (stats.scanned, stats.cleaned, stats.errors) == (6, 6, [])
+    assert stats.bytes_read > 0 and stats.files_per_second() > 0
+    assert _read(paths[0]) == clean_text(f"file 0 {DIRTY}")
+    assert _read(os.path.join(root, '.journal', 'x.txt')) == DIRTY
+
+    again = batch_clean.reclean(root, workers=2)
+    assert (again.skipped, again.cleaned) == (6, 0)
+
+    _write(paths[3], "new new text.")
+    os.utime(paths[4], (0, 0))  # touched, same content
+    third = batch_clean.reclean(root, workers=1)
+    assert (third.cleaned, third.unchanged, third.skipped) == (1, 1, 4)
+    assert _read(paths[3]) == "new text."
+
+
+def test_reclean_to_dest_and_skips_sessions_still_recording(tmp_path):
+    src, dest = str(tmp_path / 'src'), str(tmp_path / 'dest')
+    _write(os.path.join(src, 'a.txt'), DIRTY)
+    _write(os.path.join(src, 'live.txt'), DIRTY)
+    journal = session_journal.SessionJournal.create(src, 'live')
+    journal.append_text(DIRTY)
+    journal.flush()
+    try:
+        stats = batch_clean.reclean(src, dest=dest, workers=1)
+    finally:
+        journal.close()
+    assert (stats.cleaned, stats.busy) == (1, 1)
+    assert _read(os.path.join(src, 'a.txt')) == DIRTY
+    assert _read(os.path.join(dest, 'a.txt')) == clean_text(DIRTY)
+    assert not os.path.exists(os.path.join(dest, 'live.txt'))
+    assert batch_clean.reclean(src, dest=dest, workers=1, dry_run=True).cleaned == 0
@@ -0,0 +1,87 @@
+"""Tests for the threaded sanitize/dedup pipeline."""
+import threading
+import time
+
+from caption_pipeline import CaptionPipeline, UpdateQueue
+from live_dedup import LiveDeduper
+
+
+def test_pipeline_emits_segments_in_order_on_worker():
+    got = []
+    done = threading.Event()
+    main = threading.current_thread()
+
+    def on_segment(seg):
+        got.append((seg, threading.current_thread() is main))
+        if len(got) == 2:
+            done.set()
+
+    pipeline = CaptionPipeline(on_segment=on_segment, dedup=LiveDeduper(min_interval=0))
+    # submitted before start: processed once the worker runs
+    pipeline.submit("alpha beta gamma delta")
+    pipeline.submit("gamma delta epsilon zeta eta")
+    pipeline.start()
+    assert done.wait(2)
+    pipeline.stop()
+    assert got == [("alpha beta gamma delta", False), ("epsilon zeta eta", False)]
+    assert pipeline.submitted == 2 and pipeline.emitted == 2
+
+
+def test_stop_processes_queued_snapshots():
+    got = []
+    pipeline = CaptionPipeline(on_segment=got.append, dedup=LiveDeduper(min_interval=0))
+    for snap in ["alpha beta gamma delta", "gamma delta epsilon zeta eta",
+                 "zeta eta theta iota kappa"]:
+        pipeline.submit(snap)
+    pipeline.start()
+    pipeline.stop()
+    pipeline.submit("never processed at all")
+    assert got == ["alpha beta gamma delta", "epsilon zeta eta", "theta iota kappa"]
+
+
+def test_update_queue_merges_a_burst_into_one_drain():
+    updates = UpdateQueue()
+    pipeline = CaptionPipeline(on_segment=updates.put, dedup=LiveDeduper(min_interval=0))
+    for snap in ["alpha beta gamma delta", "gamma delta epsilon zeta eta",
+                 "zeta eta theta iota kappa"]:
+        pipeline.submit(snap)
+    pipeline.start()
+    deadline = time.time() + 2
+    while updates.depth < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    pipeline.stop()
+    assert updates.max_depth == 3
+    assert updates.drain() == ["alpha beta gamma delta", "epsilon zeta eta", "theta iota kappa"]
+    assert updates.drain() == []
+    assert updates.merge_ratio == 3.0
+
+
+def test_worker_emits_held_snapshot_when_window_ends():
+    got = []
+    done = threading.Event()
+
+    def on_segment(seg):
+        got.append(seg)
+        if len(got) == 2:
+            done.set()
+
+    pipeline = CaptionPipeline(on_segment=on_segment, dedup=LiveDeduper(min_interval=0.1))
+    pipeline.start()
+    pipeline.submit("alpha beta gamma delta")
+    pipeline.submit("gamma delta epsilon zeta eta")  # inside the window, then silence
+    assert done.wait(2)
+    pipeline.stop()
+    assert got == ["alpha beta gamma delta", "epsilon zeta eta"]
+
+
+def test_stop_reports_a_worker_that_is_still_busy():
+    release = threading.Event()
+    pipeline = CaptionPipeline(on_segment=lambda seg: release.wait(2),
+                               dedup=LiveDeduper(min_interval=0))
+    pipeline.submit("alpha beta gamma delta")
+    pipeline.start()
+    # the worker is stuck in on_segment: stop gives up, and the worker keeps its thread
+    assert not pipeline.stop(timeout=0.05)
+    release.set()
+    assert pipeline.stop()
+    assert pipeline.stop()
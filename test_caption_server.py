@@ -0,0 +1,105 @@
+"""Tests for the local SSE caption server, over real localhost sockets."""
+import json
+import socket
+import time
+
+import pytest
+
+from caption_server import CaptionServer
+
+
+@pytest.fixture
+def server():
+    srv = CaptionServer(port=0, history=5, buffer=4)
+    srv.start()
+    yield srv
+    srv.stop()
+
+
+def _get(server, target, headers=''):
+    sock = socket.create_connection(('127.0.0.1', server.port), timeout=5)
+    sock.sendall(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode())
+    return sock
+
+
+class EventReader:
+    def __init__(self, sock):
+        self.sock = sock
+        self.buf = b''
+
+    def events(self, n):
+        out = []
+        while len(out) < n:
+            while b'\n\n' not in self.buf:
+                chunk = self.sock.recv(65536)
+                if not chunk:
+                    return out
+                self.buf += chunk
+            block, self.buf = self.buf.split(b'\n\n', 1)
+            fields = dict(line.split(': ', 1) for line in block.decode().split('\n')
+                          if ': ' in line and not line.startswith((':', 'HTTP')))
+            if 'data' in fields:
+                out.append((fields.get('event', 'message'), json.loads(fields['data'])))
+        return out
+
+
+def _wait_for(pred, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not pred():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_streams_segments_with_sequence_numbers(server):
+    reader = EventReader(_get(server, '/events'))
+    _wait_for(lambda: server.clients == 1)
+    server.publish('hello there', t=1000.0)
+    server.publish('général kenobi')
+    events = reader.events(2)
+    assert events[0] == ('message', {'seq': 1, 'time': 1000.0, 'text': 'hello there'})
+    assert events[1][1]['seq'] == 2 and events[1][1]['text'] == 'général kenobi'
+    reader.sock.close()
+    _wait_for(lambda: server.clients == 0)
+
+
+def test_resume_replays_retained_segments(server):
+    for i in range(1, 9):
+        server.publish(f'segment {i}')
+    _wait_for(lambda: server.status()['published'] == 8)
+    # history=5 keeps 4..8
+    events = EventReader(_get(server, '/events?since=6')).events(2)
+    assert [e[1]['seq'] for e in events] == [7, 8]
+    events = EventReader(_get(server, '/events', 'Last-Event-ID: 1\r\n')).events(6)
+    assert events[0] == ('gap', {'first': 2, 'last': 3})
+    assert [e[1]['seq'] for e in events[1:]] == [4, 5, 6, 7, 8]
+    assert server.resumed == 2
+
+
+def test_slow_client_is_dropped_without_holding_up_others(server):
+    slow = _get(server, '/events')       # never reads
+    fast = EventReader(_get(server, '/events'))
+    _wait_for(lambda: server.clients == 2)
+    big = 'word ' * 50_000
+    got = []
+    for i in range(40):
+        server.publish(big)
+        got += fast.events(1)
+    assert [e[1]['seq'] for e in got] == list(range(1, 41))
+    assert server.dropped_clients == 1 and server.clients == 1
+    slow.close()
+
+
+def test_status_and_errors(server):
+    server.publish('x')
+    sock = _get(server, '/status')
+    body = sock.makefile('rb').read().split(b'\r\n\r\n', 1)[1]
+    assert json.loads(body)['seq'] == 1
+    assert _get(server, '/nope').recv(100).startswith(b'HTTP/1.1 404')
+    sock = socket.create_connection(('127.0.0.1', server.port), timeout=5)
+    sock.sendall(b"POST /events HTTP/1.1\r\n\r\n")
+    assert sock.recv(100).startswith(b'HTTP/1.1 405')
+
+
+def test_port_in_use_raises(server):
+    with pytest.raises(OSError):
+        CaptionServer(port=server.port).start()
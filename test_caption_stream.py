@@ -0,0 +1,132 @@
+"""Tests for the asyncio streaming interface of LiveCaptionReader."""
+import asyncio
+import threading
+
+import pytest
+
+from fake_desktop import FakeDesktop, FakeSource
+from live_caption_reader import LiveCaptionReader
+
+SCRIPT = ['one', 'one two', 'one two three', 'one two three four', 'one two three four five']
+
+
+def _reader(script=SCRIPT):
+    desktop = FakeDesktop()
+    desktop.add_window('Live captions', [script])
+    return LiveCaptionReader(poll_interval=0.001, source=FakeSource(desktop))
+
+
+async def _take(stream, n):
+    out = []
+    async for update in stream:
+        out.append(update)
+        if len(out) == n:
+            break
+    await stream.aclose()
+    return out
+
+
+def test_subscribers_share_one_poller():
+    reader = _reader()
+
+    async def main():
+        a, b = await asyncio.gather(_take(reader.stream(), 5), _take(reader.stream(), 5))
+        await asyncio.sleep(0)
+        return a, b, reader._broadcaster
+
+    a, b, broadcaster = asyncio.run(main())
+    assert [u.text for u in a] == SCRIPT
+    assert [u.tail for u in a] == ['one', ' two', ' three', ' four', ' five']
+    assert [u.seq for u in a] == [u.seq for u in b] == [1, 2, 3, 4, 5]
+    assert reader.changes == 5
+    assert broadcaster.subscribers == 0 and not broadcaster.running
+
+
+def test_polls_run_off_the_event_loop_thread():
+    reader = _reader()
+    threads = set()
+    reader.on_change = lambda tail: threads.add(threading.current_thread().name)
+
+    async def main():
+        await _take(reader.stream(), 2)
+        return threading.current_thread().name
+
+    loop_thread = asyncio.run(main())
+    assert threads and loop_thread not in threads
+    assert all(name.startswith('caption-uia') for name in threads)
+
+
+def test_slow_subscriber_drops_oldest_without_stalling_others():
+    reader = _reader()
+
+    async def main():
+        slow = reader.stream(maxsize=2)
+        first = await slow.__anext__()           # subscribed, then stops reading
+        fast = await _take(reader.stream(), 4)   # joins after the first update
+        await asyncio.sleep(0.05)
+        rest = [await slow.__anext__(), await slow.__anext__()]
+        await slow.aclose()
+        return first, fast, rest
+
+    first, fast, rest = asyncio.run(main())
+    assert first.tail == 'one'
+    assert [u.text for u in fast] == SCRIPT[1:]
+    assert fast[0].stable == 0 and fast[1].stable == len(SCRIPT[1])
+    # only the two newest updates were kept for the slow subscriber; after the gap the
+    # first one stands on its own
+    assert [u.text for u in rest] == SCRIPT[3:]
+    assert [u.tail for u in rest] == [SCRIPT[3], ' five']
+    assert reader.stats.counters['stream_dropped'] == 2
+
+
+def test_wait_overflow_applies_backpressure():
+    reader = _reader()
+
+    async def main():
+        stream = reader.stream(maxsize=1, overflow='wait')
+        await stream.__anext__()
+        await asyncio.sleep(0.05)
+        polls = reader.polls
+        await asyncio.sleep(0.05)
+        stalled = reader.polls == polls
+        rest = [u.text for u in await _take(stream, 4)]
+        return stalled, rest
+
+    stalled, rest = asyncio.run(main())
+    assert stalled
+    assert rest == SCRIPT[1:]
+
+
+def test_cancelling_a_consumer_unsubscribes_it():
+    reader = _reader([str(i) for i in range(1000)])
+
+    async def main():
+        task = asyncio.create_task(_take(reader.stream(), 10**6))
+        await asyncio.sleep(0.02)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return reader._broadcaster
+
+    broadcaster = asyncio.run(main())
+    assert broadcaster.subscribers == 0 and not broadcaster.running
+
+
+def test_stop_ends_streams_and_excludes_thread_polling():
+    reader = _reader()
+
+    async def main():
+        stream = reader.stream()
+        await stream.__anext__()
+        with pytest.raises(RuntimeError):
+            reader.start()
+        reader.stop()
+        return [u async for u in stream]
+
+    rest = asyncio.run(main())
+    assert len(rest) <= 4
+
+
+def test_current_text_async():
+    reader = _reader(['', '', 'hello there'])
+    assert asyncio.run(reader.get_current_text_async(timeout=1.0, poll=0.001)) == 'hello there'
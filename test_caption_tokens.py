@@ -0,0 +1,39 @@
+"""Tests for the shared caption tokenizer."""
+import random
+import re
+
+from caption_tokens import Tokenizer, tokenize
+
+_WS_RE = re.compile(r"\s+")
+_CONTROL_TOKEN_RE = re.compile(r"\binstructions\[LiveCaptions\]\s*\d+\b", re.IGNORECASE)
+
+
+def _regex_chain(text, min_repeat, controls):
+    # what the live stage and the cleaner computed before the tokenizer
+    repeat = re.compile(r"\b(\w+)(?:\s+\1\b){%d,}" % (min_repeat - 1), re.IGNORECASE)
+    s = text.strip()
+    if controls:
+        s = _CONTROL_TOKEN_RE.sub("", s)
+    return repeat.sub(r"\1", _WS_RE.sub(" ", s).strip())
+
+
+def test_token_fields():
+    [a, b, c] = tokenize("It's  Friday!\nok")
+    assert (a.raw, a.key, a.word, a.ends) == ("It's", "it's", "its", False)
+    assert (b.raw, b.key, b.word, b.ends) == ("Friday!", "friday", "friday", True)
+    assert c.raw == "ok" and not c.ends
+    assert tokenize("go go")[0] is tokenize("go")[0]  # cached
+
+
+def test_collapse_matches_regex_chain():
+    rnd = random.Random(5)
+    pieces = ["go", "Go", "go.", "GO!", "go's", "s", "'s", "the", "the,", "a-b", "b", "x_y",
+              "y", "é", "É", "12", "-", "...", "instructions[LiveCaptions]", "3", "["]
+    tokenizer = Tokenizer()
+    for _ in range(20000):
+        text = "".join(rnd.choice(pieces) + rnd.choice([" ", "  ", "\n", ""])
+                       for _ in range(rnd.randint(0, 12)))
+        for min_repeat in (2, 3):
+            controls = rnd.random() < 0.5
+            got = " ".join(t.raw for t in tokenizer.tokens(text, min_repeat, controls))
+            assert got == _regex_chain(text, min_repeat, controls), text
@@ -0,0 +1,52 @@
+"""Tests for the bounded caption display."""
+import pytest
+
+from caption_view import SpillStore, VirtualizedDisplay
+
+
+@pytest.mark.parametrize("on_disk", [False, True])
+def test_spill_store_is_a_stack(tmp_path, on_disk):
+    store = SpillStore(str(tmp_path / "display.spill") if on_disk else None)
+    for chunk in ["one ", "twö ", "three "]:
+        store.push(chunk)
+    assert store.text() == "one twö three "
+    assert store.pop() == "three "
+    store.push("four ")
+    assert len(store) == 3
+    assert store.text() == "one twö four "
+    assert [store.pop() for _ in range(3)] == ["four ", "twö ", "one "]
+    store.close()
+    assert not (tmp_path / "display.spill").exists()
+
+
+@pytest.fixture
+def text_widget():
+    tk = pytest.importorskip("tkinter")
+    from tkinter import scrolledtext
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    widget = scrolledtext.ScrolledText(root, height=10, width=40)
+    widget.pack()
+    root.update()
+    yield widget
+    root.destroy()
+
+
+def test_display_spills_and_loads_back(text_widget):
+    display = VirtualizedDisplay(text_widget, max_chars=2000, chunk_chars=500)
+    words = [f"w{i}" for i in range(3000)]
+    for i in range(0, len(words), 10):
+        display.insert('end', ' '.join(words[i:i + 10]) + ' ')
+        text_widget.see('end')
+        display.trim()
+    assert display.spills > 0
+    assert display._count() <= 2000 + 500
+    full = ' '.join(words) + ' '
+    assert display.get_all() == full
+
+    while display.load_older():
+        pass
+    assert display.spilled == 0
+    assert text_widget.get('1.0', 'end-1c') == full
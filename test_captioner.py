@@ -0,0 +1,83 @@
+"""Tests for the GUI's session start (need a display; skipped without one)."""
+import time
+
+import pytest
+
+import live_caption_reader
+from live_caption_reader import compute_delta
+import session_journal
+
+SEED = "Hello everyone and welcome to the meeting."
+MORE = "Today we review the budget for next year."
+
+
+class FakeReader:
+    """Stands in for LiveCaptionReader: the captions move on while the app waits."""
+
+    def __init__(self, policy=None, stats=None):
+        self.on_delta = None
+        self.latest_text = ''
+        self.polls = self.changes = 0
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def get_current_text(self, timeout=0.0, poll=0.0):
+        # submitted before the pipeline's worker starts
+        self.on_delta(compute_delta('', f"{SEED} {MORE}"))
+        return SEED
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    tk = pytest.importorskip("tkinter")
+    import captioner
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    monkeypatch.setattr(captioner, 'LiveCaptionReader', FakeReader)
+    monkeypatch.setattr(captioner, 'PollPolicy', live_caption_reader.PollPolicy)
+    app = captioner.CaptionerApp(root)
+    app._transcript_dir = str(tmp_path)
+    yield app
+    root.destroy()
+
+
+def test_recovered_session_matches_a_normal_stop(app, tmp_path):
+    app.start_recording()
+    deadline = time.monotonic() + 2
+    while not len(app._updates) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    app._pipeline.stop()
+    app._insert_segments(app._updates.drain())
+    expected = app._stream_cleaner.finish()   # what stop_recording would write
+
+    # crash: nothing is finished
+    app._close_autosave_writer()
+    app._journal.close()
+    [path] = session_journal.finalize_unfinished(str(tmp_path))
+    with open(path, encoding='utf-8') as f:
+        recovered = f.read()
+    assert SEED in recovered and MORE in recovered
+    assert recovered == expected
+
+
+def test_live_subtitles_match_the_journal_export(app, tmp_path):
+    import subtitle_export
+    app.subtitle_formats = ('srt',)
+    app.start_recording()
+    deadline = time.monotonic() + 2
+    while not len(app._updates) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    journal = app._journal.directory
+    app.stop_recording()
+    [live] = [p for p in tmp_path.iterdir() if p.suffix == '.srt']
+    exported = tmp_path / "exported.srt"
+    subtitle_export.export_journal(journal, str(exported), 'srt')
+    # the seed line is the first cue in both
+    assert SEED in live.read_text(encoding='utf-8').split('\n\n')[0]
+    assert live.read_text(encoding='utf-8') == exported.read_text(encoding='utf-8')
@@ -0,0 +1,191 @@
+"""Tests for locating and caching the Live Captions control, using a fake UIA tree."""
+import random
+import time
+
+import pytest
+
+from fake_desktop import FakeDesktop, FakeSource
+from live_caption_reader import (TAIL_LIMIT, CaptionLocator, LiveCaptionReader, PollPolicy,
+                                 common_prefix_len, compute_delta)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def desktop():
+    return FakeDesktop()
+
+
+def _locator(desktop, **kwargs):
+    return CaptionLocator(FakeSource(desktop), **kwargs)
+
+
+def test_control_is_cached_between_polls(desktop):
+    for i in range(20):
+        desktop.add_window(f'Editor {i}')
+    live = desktop.add_window('Live captions', ['hello world'])
+    clock = Clock()
+    loc = _locator(desktop, validate_interval=1.0, clock=clock)
+    for _ in range(100):
+        assert loc.locate() is live.texts[0]
+        clock.now += 0.1
+    assert loc.searches == 1
+    assert desktop.calls['descendants'] == 1
+    assert loc.validations <= 10
+
+
+def test_rediscovers_after_invalidate(desktop):
+    live = desktop.add_window('Live captions', ['first'])
+    loc = _locator(desktop, clock=Clock())
+    assert loc.locate() is live.texts[0]
+    live.close()
+    reopened = desktop.add_window('Live captions', ['second'])
+    loc.invalidate()
+    assert loc.locate() is reopened.texts[0]
+    assert loc.searches == 2
+
+
+def test_failed_search_backs_off_exponentially(desktop):
+    clock = Clock()
+    loc = _locator(desktop, min_backoff=1.0, max_backoff=4.0, clock=clock)
+    for _ in range(50):
+        loc.locate()
+        clock.now += 0.25
+    # 12.5s elapsed: searches at 0, 1, 3, 7, 11 (capped at 4s)
+    assert loc.searches == 5
+    assert loc.locate(force=True) is None
+    assert loc.searches == 6
+
+
+def test_rejected_windows_are_skipped(desktop):
+    for i in range(30):
+        desktop.add_window(f'Closed captions settings {i}')  # title matches, but no text control
+    clock = Clock()
+    loc = _locator(desktop, min_backoff=0.1, max_backoff=0.1, reject_ttl=60.0, clock=clock)
+    assert loc.locate() is None
+    first = desktop.calls['descendants']
+    clock.now += 1
+    assert loc.locate() is None
+    assert desktop.calls['descendants'] == first
+    clock.now += 60
+    loc.locate()
+    assert desktop.calls['descendants'] > first
+
+
+def test_only_caption_like_windows_are_rejected(desktop):
+    notes = desktop.add_window('Notes', ['hello world'])
+    desktop.add_window('Caption settings')  # title matches, but no text control
+    clock = Clock()
+    loc = _locator(desktop, min_backoff=0.1, max_backoff=0.1, reject_ttl=60.0, clock=clock)
+    assert loc.locate() is None
+    assert list(loc._rejected) == [loc._window_key(desktop.win_list[1])]
+    # retitled within the rejection period: the title search still finds it
+    notes.title = 'Live captions'
+    clock.now += 1
+    assert loc.locate() is notes.texts[0]
+
+
+def test_fallback_match_replaced_when_live_captions_opens(desktop):
+    other = desktop.add_window('Subtitle editor', ['draft'])
+    clock = Clock()
+    loc = _locator(desktop, validate_interval=1.0, clock=clock)
+    assert loc.locate() is other.texts[0]
+    live = desktop.add_window('Live captions', ['real'])
+    clock.now += 2
+    assert loc.locate() is live.texts[0]
+
+
+def test_reader_streams_scripted_snapshots():
+    desktop = FakeDesktop()
+    desktop.add_window('Live captions', [['hello', 'hello there', 'hello there friend']])
+    reader = LiveCaptionReader(poll_interval=0.01, source=FakeSource(desktop))
+    seen = []
+    reader.on_change = seen.append
+    reader.start()
+    try:
+        deadline = time.time() + 2
+        while len(seen) < 3 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        reader.stop()
+    assert seen == ['hello', 'hello there', 'hello there friend']
+
+
+def test_reader_emits_untruncated_deltas():
+    long_line = ' '.join(f'word{i}' for i in range(60))
+    assert len(long_line) > TAIL_LIMIT
+    script = ['hello', 'hello there', long_line, long_line + ' more']
+    desktop = FakeDesktop()
+    desktop.add_window('Live captions', [script])
+    reader = LiveCaptionReader(poll_interval=0.01, source=FakeSource(desktop))
+    seen = []
+    reader.on_delta = seen.append
+    reader.start()
+    try:
+        deadline = time.time() + 2
+        while len(seen) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        reader.stop()
+    assert [(d.stable, d.tail) for d in seen] == [
+        (0, 'hello'), (5, ' there'), (0, long_line), (len(long_line), ' more')]
+
+
+def test_common_prefix_len_matches_brute_force():
+    rnd = random.Random(1)
+    for _ in range(2000):
+        a = ''.join(rnd.choice('ab') for _ in range(rnd.randint(0, 12)))
+        b = ''.join(rnd.choice('ab') for _ in range(rnd.randint(0, 12)))
+        start = rnd.randint(0, 4)
+        n = 0
+        while start + n < len(a) and n < len(b) and a[start + n] == b[n]:
+            n += 1
+        assert common_prefix_len(a, b, start) == n
+
+
+def test_compute_delta_follows_appends_revisions_and_scrolling():
+    d = compute_delta('so the plan', 'so the plan for next')
+    assert (d.stable, d.dropped, d.tail) == (11, 0, ' for next')
+    d = compute_delta('so the plan for next', 'so the plan for nest week')
+    assert d.tail == 'st week'
+    # the first line scrolled off the top
+    prev = 'Ready to show live captions\nso the plan for next week\nis to'
+    d = compute_delta(prev, 'so the plan for next week\nis to finish')
+    assert (d.dropped, d.tail) == (28, ' finish')
+    assert d.text[:d.stable] == prev[d.dropped:d.dropped + d.stable]
+    # two updates as one change since the text before the first
+    first = compute_delta('a b\nc d e', 'c d e f')
+    second = compute_delta('c d e f', 'c d e g h')
+    merged = second.merge(first)
+    assert (merged.stable, merged.dropped, merged.tail) == (5, 4, ' g h')
+    assert merged.region(context=2) == 'd e g h'   # from a word start
+
+
+def test_reader_without_backend_refuses_to_start():
+    class Missing(FakeSource):
+        name = 'pywinauto'
+
+        def available(self):
+            return False
+
+    reader = LiveCaptionReader(source=Missing())
+    with pytest.raises(RuntimeError):
+        reader.start()
+    assert reader.get_current_text(timeout=0.1) == ''
+
+
+def test_poll_policy_speeds_up_on_change_and_backs_off_when_idle():
+    policy = PollPolicy(min_interval=0.1, idle_interval=0.4, missing_interval=2.0, backoff=2.0)
+    assert policy.next_interval(0.4, changed=True, found=True) == 0.1
+    intervals = [0.1]
+    for _ in range(4):
+        intervals.append(policy.next_interval(intervals[-1], changed=False, found=True))
+    assert intervals == [0.1, 0.2, 0.4, 0.4, 0.4]
+    assert policy.next_interval(0.1, changed=False, found=False) == 2.0
+    assert PollPolicy.fixed(0.5).next_interval(0.5, False, True) == 0.5
@@ -0,0 +1,141 @@
+"""Tests for the live-caption overlap engine."""
+import random
+
+import pytest
+
+from benchmarks.streams import recorded_streams, synthetic_meeting
+from live_caption_reader import compute_delta
+from live_dedup import (LiveDeduper, OverlapEngine, TokenStore, find_overlap, normalize_snapshot,
+                        normalize_token)
+
+
+def brute_force_overlap(shown, curr):
+    # reference: the nested-loop matcher on_live_text used originally
+    for i in range(len(curr)):
+        for j in range(len(shown)):
+            tail = shown[j:]
+            if i + len(tail) <= len(curr) and curr[i:i + len(tail)] == tail:
+                return i + len(tail)
+    return 0
+
+
+def test_normalize_token():
+    assert normalize_token("Hello,") == "hello"
+    assert normalize_token("WHY?!") == "why"
+    assert normalize_token("it's") == "it's"
+
+
+def test_find_overlap_matches_brute_force():
+    rnd = random.Random(0)
+    for _ in range(5000):
+        shown = [rnd.choice("abc") for _ in range(rnd.randint(0, 10))]
+        curr = [rnd.choice("abcd") for _ in range(rnd.randint(0, 10))]
+        assert find_overlap(shown, curr) == brute_force_overlap(shown, curr), (shown, curr)
+
+
+def test_engine_returns_new_words_only():
+    engine = OverlapEngine("so the budget review is".split())
+    words = "The budget review is next week, right?".split()
+    idx = engine.match(words)
+    assert words[idx:] == ["next", "week,", "right?"]
+
+
+def test_engine_no_overlap():
+    engine = OverlapEngine("alpha beta".split())
+    assert engine.match("gamma delta".split()) == 0
+
+
+def test_engine_only_looks_at_recent_words():
+    # a long history must not change the answer for a snapshot that continues the tail
+    engine = OverlapEngine(["filler"] * 50000 + "we ship on friday".split())
+    words = "we ship on friday after lunch".split()
+    assert words[engine.match(words):] == ["after", "lunch"]
+
+
+def test_token_store_ring_keeps_last_window():
+    store = TokenStore(window=4)
+    store.append("one two three four five six".split())
+    assert len(store) == 4
+    assert store.keys() == ["three", "four", "five", "six"]
+    assert store.id_for("Three,") == store.id_for("three")
+
+
+def test_token_store_compacts_vocabulary():
+    store = TokenStore(window=3, max_vocab=6)
+    store.append([f"w{i}" for i in range(100)])
+    assert store.keys() == ["w97", "w98", "w99"]
+    assert len(store._keys) <= store.max_vocab
+    assert store.id_for("unseen", add=False) == -1
+
+
+def test_engine_window_bounds_memory():
+    engine = OverlapEngine(window=8)
+    engine.extend(f"w{i}" for i in range(1000))
+    words = "w998 w999 fresh words".split()
+    assert words[engine.match(words):] == ["fresh", "words"]
+
+
+def test_deduper_appends_only_new_words():
+    dedup = LiveDeduper(min_interval=0.5)
+    first = dedup.process("one two three four five six seven eight nine ten eleven twelve", now=1.0)
+    assert first == "three four five six seven eight nine ten eleven twelve"
+    # too soon: rate limited
+    assert dedup.process("eleven twelve thirteen fourteen fifteen", now=1.2) is None
+    assert dedup.process("eleven twelve thirteen fourteen fifteen", now=1.6) == "thirteen fourteen fifteen"
+    # fewer than three new words are held back
+    assert dedup.process("fourteen fifteen sixteen", now=2.5) is None
+
+
+def test_deduper_normalizes_snapshot():
+    dedup = LiveDeduper(min_interval=0)
+    out = dedup.process("instructions[LiveCaptions] 3  we  we we we  ship   on friday", now=0)
+    assert out == "we ship on friday"
+
+
+def test_deduper_processes_held_snapshot_at_trailing_edge():
+    dedup = LiveDeduper(min_interval=0.5)
+    assert dedup.process("alpha beta gamma delta epsilon", now=1.0) == "alpha beta gamma delta epsilon"
+    assert dedup.process("delta epsilon zeta eta", now=1.1) is None
+    assert dedup.process("delta epsilon zeta eta theta", now=1.2) is None  # supersedes
+    assert dedup.next_due() == 1.5
+    assert dedup.poll(now=1.4) is None
+    assert dedup.poll(now=1.5) == "zeta eta theta"
+    assert dedup.captured_at == 1.2   # when the held snapshot was read, not the poll
+    assert not dedup.pending and dedup.poll(now=3.0) is None
+
+
+def test_deduper_follows_deltas_without_rematching():
+    dedup = LiveDeduper(min_interval=0)
+    texts = ["so the plan for next week",
+             "so the plan for next week is to finish",
+             "so the plan for next weak is to finish the review",    # revised shown word
+             "so the plan for next weak is to finish the review. And ship it",
+             "so the plan for next weak is to finish the review.\nAnd ship it but we still"]
+    out, prev = [], ''
+    for n, text in enumerate(texts):
+        delta = compute_delta(prev, text)
+        prev = text
+        out.append(dedup.process(delta, now=n))
+    # "weak" replaces the shown "week" instead of repeating the line; "the review." is
+    # too short to append on its own and comes with the next words
+    assert out == ["so the plan for next week", "is to finish", None, "the review. And ship it",
+                   "but we still"]
+
+
+@pytest.mark.parametrize("feed", ['text', 'delta'])
+@pytest.mark.parametrize("window", [0.1, 0.5, 1.0])
+def test_debounce_loses_no_words_on_replayed_streams(window, feed):
+    streams = dict(recorded_streams())
+    streams['synthetic'] = synthetic_meeting(minutes=3)
+    for name, stream in streams.items():
+        dedup = LiveDeduper(min_interval=window)
+        prev = ''
+        for t, text in stream:
+            dedup.poll(now=t)
+            if feed == 'delta':
+                text, prev = compute_delta(prev, text), text
+            dedup.process(text, now=t)
+        dedup.flush(now=stream[-1][0] + window)
+        # everything of the final snapshot is shown, except a tail too short to append
+        final = normalize_snapshot(stream[-1][1]).split()
+        assert dedup.overlap.match(final) >= len(final) - 2, name
@@ -0,0 +1,80 @@
+"""Tests for headless capture."""
+import os
+import subprocess
+import sys
+import time
+
+from fake_desktop import FakeSource, replay_desktop
+import ocaption
+import session_journal
+
+STREAM = [
+    (0.0, "so the plan for next week"),
+    (0.1, "so the plan for next week is to finish the review"),
+    (0.2, "so the plan for next week is to finish the review and ship it."),
+]
+
+
+def _run(tmp_path, **kwargs):
+    cap = ocaption.HeadlessCapture(str(tmp_path), debounce=0,
+                                   source=FakeSource(replay_desktop(STREAM, speed=4)), **kwargs)
+    cap.start()
+    deadline = time.monotonic() + 3
+    while cap.segments < 2 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return cap, cap.stop()
+
+
+def test_capture_writes_cleaned_transcript_and_finishes_journal(tmp_path):
+    cap, path = _run(tmp_path)
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    assert "Recording started" not in text
+    assert text.endswith("and ship it.")
+    assert session_journal.unfinished_sessions(str(tmp_path)) == []
+
+
+def test_headless_never_imports_tkinter():
+    out = subprocess.run([sys.executable, '-c', "import sys, ocaption; print('tkinter' in sys.modules)"],
+                         cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    assert out.stdout.strip() == "False"
+
+
+def test_optional_stages_are_imported_lazily():
+    code = ("import sys, ocaption; print(*(m in sys.modules for m in "
+            "('session_trace', 'tracemalloc', 'subtitle_export', 'transcript_index', 'sqlite3')))")
+    out = subprocess.run([sys.executable, '-c', code],
+                         cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    assert out.stdout.split() == ["False"] * 5
+    # the defaults ocaption keeps so it needn't import them
+    import session_trace, subtitle_export
+    assert ocaption.DEFAULT_TRACE_INTERVAL == session_trace.DEFAULT_SNAPSHOT_INTERVAL
+    assert ocaption.SUBTITLE_FORMATS == subtitle_export.FORMATS
+
+
+def test_cli_replay(tmp_path):
+    replay = tmp_path / "stream.jsonl"
+    replay.write_text(''.join('{"t": %s, "text": "%s"}\n' % (t, text) for t, text in STREAM),
+                      encoding='utf-8')
+    out = tmp_path / "out"
+    assert ocaption.main(['capture', '--out', str(out), '--replay', str(replay),
+                          '--speed', '4', '--debounce', '0']) == 0
+    [txt] = [n for n in os.listdir(out) if n.endswith('.txt')]
+    assert (out / txt).read_text(encoding='utf-8').endswith("ship it.")
+
+
+def test_capture_serves_segments(tmp_path):
+    import socket
+    cap = ocaption.HeadlessCapture(str(tmp_path), debounce=0, serve_port=0,
+                                   source=FakeSource(replay_desktop(STREAM, speed=4)))
+    cap.start()
+    try:
+        sock = socket.create_connection(('127.0.0.1', cap.server.port), timeout=5)
+        sock.sendall(b"GET /events?since=0 HTTP/1.1\r\n\r\n")
+        data = b''
+        while data.count(b'\ndata: ') < 2:
+            data += sock.recv(65536)
+    finally:
+        cap.stop()
+    assert b'"seq": 1' in data and b'finish the review' in data
+    assert cap.server is None
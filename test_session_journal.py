@@ -0,0 +1,122 @@
+"""Tests for the crash-safe session journal."""
+import os
+
+from live_dedup import LiveDeduper
+import session_journal as sj
+from text_cleaner import StreamingCleaner, clean_text
+from transcript_writer import write_atomic
+
+
+def _fill(journal, dedup, chunks, t0=1000.0):
+    for i, chunk in enumerate(chunks):
+        dedup.overlap.extend(chunk.split())
+        journal.append_text(chunk, t=t0 + i)
+
+
+def test_recover_replays_from_last_checkpoint(tmp_path):
+    dedup = LiveDeduper()
+    journal = sj.SessionJournal.create(str(tmp_path), 's1', state_fn=dedup.state,
+                                       segment_bytes=400, checkpoint_interval=None)
+    chunks = [f"chunk {i} words here " for i in range(200)]
+    _fill(journal, dedup, chunks)
+    journal.close()  # no END: looks like a crash
+
+    directory = sj.journal_path(str(tmp_path), 's1')
+    assert sj.unfinished_sessions(str(tmp_path)) == [directory]
+    assert journal.segments > 5
+
+    session = sj.recover(directory)
+    assert not session.finished
+    assert session.segments_read == 1          # only the newest segment is read
+    assert len(session.tail) < len(chunks) // 10
+    assert session.deduper().overlap.keys() == dedup.overlap.keys()
+    assert ''.join(t for _, t in sj.iter_text(directory)) == ''.join(chunks)
+
+
+def test_torn_record_is_ignored_and_finish_marks_done(tmp_path):
+    journal = sj.SessionJournal.create(str(tmp_path), 's2', checkpoint_interval=None)
+    journal.append_text("first part ", t=1.0)
+    journal.append_text("second part ", t=2.0)
+    journal.close()
+    directory = sj.journal_path(str(tmp_path), 's2')
+    seg = sj.segment_paths(directory)[-1]
+    with open(seg, 'ab') as f:
+        f.write(sj.encode_record(sj.TEXT, b"torn record", 3.0)[:-4])
+
+    assert [text for _, text in sj.iter_text(directory)] == ["first part ", "second part "]
+    sj.mark_finished(directory, 'out.txt')
+    assert sj.recover(directory).finished
+    assert sj.unfinished_sessions(str(tmp_path)) == []
+
+
+def test_finish_and_atomic_write(tmp_path):
+    journal = sj.SessionJournal.create(str(tmp_path), 's3')
+    journal.append_text("hello there ")
+    journal.finish(str(tmp_path / 's3.txt'))
+    assert sj.recover(sj.journal_path(str(tmp_path), 's3')).finished
+
+    out = tmp_path / 's3.txt'
+    out.write_text("raw autosave", encoding='utf-8')
+    write_atomic(str(out), "cleaned")
+    assert out.read_text(encoding='utf-8') == "cleaned"
+    assert not os.path.exists(str(out) + '.tmp')
+
+
+def _sentences(n):
+    # every fourth sentence repeats an earlier one, so there is something to clean
+    return [f"Point {i % 50} of the plan is agreed. " if i % 4 == 3 else f"Sentence {i} is new here. "
+            for i in range(n)]
+
+
+def test_finalize_cleans_only_the_text_after_the_last_checkpoint(tmp_path, monkeypatch):
+    chunks = _sentences(400)
+    journal = sj.SessionJournal.create(str(tmp_path), 's4', segment_bytes=2000,
+                                       checkpoint_interval=None, cleaner=StreamingCleaner())
+    for i, chunk in enumerate(chunks):
+        journal.append_text(chunk, t=1000.0 + i)
+    journal.close()  # crash
+
+    directory = sj.journal_path(str(tmp_path), 's4')
+    fed = []
+    feed = StreamingCleaner.feed
+    monkeypatch.setattr(StreamingCleaner, 'feed', lambda self, text: fed.append(text) or feed(self, text))
+    out = tmp_path / 's4.txt'
+    sj.finalize(directory, str(out))
+    assert out.read_text(encoding='utf-8') == clean_text(''.join(chunks))
+    assert 0 < len(fed) < len(chunks) // 10
+
+
+def test_resumed_journal_keeps_cleaning(tmp_path):
+    chunks = _sentences(120)
+    journal = sj.SessionJournal.create(str(tmp_path), 's5', segment_bytes=800,
+                                       checkpoint_interval=None, cleaner=StreamingCleaner())
+    for chunk in chunks[:70]:
+        journal.append_text(chunk)
+    journal.close()
+
+    directory = sj.journal_path(str(tmp_path), 's5')
+    journal = sj.SessionJournal(directory, segment_bytes=800, checkpoint_interval=None,
+                                cleaner=sj.recover(directory).cleaner())
+    for chunk in chunks[70:]:
+        journal.append_text(chunk)
+    journal.close()
+
+    assert sj.recover(directory).cleaner().finish() == clean_text(''.join(chunks))
+
+
+def test_finished_journals_are_not_read_again(tmp_path, monkeypatch):
+    journal = sj.SessionJournal.create(str(tmp_path), 's6')
+    journal.append_text("hello there ")
+    journal.finish(str(tmp_path / 's6.txt'))
+    old = sj.SessionJournal.create(str(tmp_path), 's7')   # finished before the marker existed
+    old.finish()
+    os.remove(os.path.join(old.directory, sj.FINISHED_NAME))
+
+    assert sj.is_finished(journal.directory) and not sj.is_finished(old.directory)
+    assert sj.unfinished_sessions(str(tmp_path)) == []
+    assert sj.is_finished(old.directory)
+
+    def fail(directory):
+        raise AssertionError(f"read {directory}")
+    monkeypatch.setattr(sj, 'recover', fail)
+    assert sj.unfinished_sessions(str(tmp_path)) == []
@@ -0,0 +1,39 @@
+"""Tests for the opt-in session trace."""
+import json
+from threading import Thread
+
+from session_trace import SessionTrace, requested
+from stage_stats import StageStats
+
+
+def test_requested_by_flag_or_environment():
+    assert requested(['captioner.py', '--trace'], {})
+    assert requested([], {'OCAPTION_TRACE': '1'})
+    assert not requested([], {'OCAPTION_TRACE': '0'})
+
+
+def test_stage_records_become_chrome_trace_spans(tmp_path):
+    stats = StageStats()
+    trace = SessionTrace(str(tmp_path / '20240105_093000'), snapshot_interval=60)
+    trace.start()
+    stats.tracer = trace
+    stats.record('poll', 0.002)
+    worker = Thread(target=stats.record, args=('live_match', 0.0005), name='caption-pipeline')
+    worker.start()
+    worker.join()
+    junk = [bytearray(1024) for _ in range(200)]  # something for the memory diff
+    stats.tracer = None
+    trace.stop()
+
+    with open(trace.trace_path, encoding='utf-8') as f:
+        events = json.load(f)
+    spans = {e['name']: e for e in events if e['ph'] == 'X'}
+    assert spans['poll']['dur'] == 2000.0
+    assert spans['live_match']['tid'] != spans['poll']['tid']
+    names = {e['args']['name'] for e in events if e['name'] == 'thread_name'}
+    assert 'caption-pipeline' in names
+    assert any(e['ph'] == 'C' and e['name'] == 'memory' for e in events)
+    with open(trace.memory_path, encoding='utf-8') as f:
+        report = f.read()
+    assert 'allocation changes' in report and 'test_session_trace.py' in report
+    del junk
@@ -0,0 +1,60 @@
+"""Tests for per-stage latency stats."""
+import json
+import time
+
+from caption_pipeline import CaptionPipeline
+from fake_desktop import FakeSource, replay_desktop
+from live_caption_reader import LiveCaptionReader, PollPolicy, compute_delta
+from live_dedup import LiveDeduper
+from stage_stats import Histogram, StageStats, stats_path
+
+
+def test_histogram_buckets_and_percentiles():
+    h = Histogram()
+    for _ in range(90):
+        h.add(0.0004)   # 400 us -> the 500 us bucket
+    for _ in range(10):
+        h.add(0.03)     # 30 ms -> the 50 ms bucket
+    assert h.count == 100
+    assert h.percentile(50) == 0.0005
+    assert h.percentile(99) == 0.03  # capped at the max
+    d = h.as_dict()
+    assert d['buckets'] == {'0.5': 90, '50': 10}
+    assert d['max_ms'] == 30.0
+
+
+def test_capture_path_records_stages_and_drops(tmp_path):
+    stats = StageStats()
+    pipeline = CaptionPipeline(dedup=LiveDeduper(min_interval=0.5), stats=stats)
+    pipeline.process("alpha beta gamma delta epsilon", now=1.0)
+    pipeline.process("delta epsilon zeta eta", now=1.1)        # held
+    pipeline.process("delta epsilon zeta eta theta", now=1.2)  # supersedes the held one
+    assert stats.counters['dropped_updates'] == 1
+
+    reader = LiveCaptionReader(source=FakeSource(replay_desktop([(0.0, "hello there everyone")])),
+                               policy=PollPolicy.fixed(0.01), stats=stats)
+    reader.start()
+    deadline = time.monotonic() + 2
+    while 'delta' not in stats.stages and time.monotonic() < deadline:
+        time.sleep(0.01)
+    reader.stop()
+    assert {'find_control', 'window_text', 'delta', 'live_match'} <= set(stats.stages)
+    assert stats.counters['discoveries'] == 1
+
+    path = stats_path(str(tmp_path / '20240105_093000.txt'))
+    stats.dump(path)
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    assert data['stages']['live_match']['count'] == 3
+    assert 'live_match' in stats.report()
+
+
+def test_held_deltas_are_merged_not_dropped():
+    stats = StageStats()
+    pipeline = CaptionPipeline(dedup=LiveDeduper(min_interval=0.5), stats=stats)
+    prev = ""
+    for t, text in [(1.0, "Alpha beta gamma delta."), (1.1, " Zeta eta theta."), (1.2, " Iota kappa.")]:
+        pipeline.process(compute_delta(prev, prev + text), now=t)
+        prev += text
+    assert 'dropped_updates' not in stats.counters
+    assert pipeline.dedup.flush() == "Zeta eta theta. Iota kappa."
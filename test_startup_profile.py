@@ -0,0 +1,42 @@
+"""Tests for startup profiling and the lazy capture backend."""
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import check
+import startup_profile
+
+
+def test_profile_records_imports_and_phases(tmp_path):
+    (tmp_path / "sp_outer.py").write_text("import sp_inner\n", encoding="utf-8")
+    (tmp_path / "sp_inner.py").write_text("X = 1\n", encoding="utf-8")
+    sys.path.insert(0, str(tmp_path))
+    profile = startup_profile.StartupProfile()
+    profile.install()
+    try:
+        import sp_outer  # noqa: F401
+    finally:
+        profile.uninstall()
+        sys.path.remove(str(tmp_path))
+    profile.mark('imports')
+    by_name = {m: (c, s, d) for m, c, s, d in profile.imports}
+    assert by_name['sp_inner'][2] == 1 and by_name['sp_outer'][2] == 0
+    assert by_name['sp_outer'][0] >= by_name['sp_inner'][0]
+    assert [p['name'] for p in profile.as_dict()['phases']] == ['imports']
+    assert startup_profile.requested(argv=['x', '--profile-startup'], environ={})
+    assert not startup_profile.requested(argv=['x'], environ={'OCAPTION_PROFILE_STARTUP': '0'})
+
+
+def test_gui_import_does_not_load_capture_backend():
+    code = "import sys, captioner; print('live_caption_reader' in sys.modules, 'pywinauto' in sys.modules)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                         capture_output=True, text=True)
+    assert out.stdout.split() == ["False", "False"]
+
+
+def test_budget_check_flags_regressions():
+    budget = {'tolerance': 0.1, 'ready_ms': {'gui': 100}}
+    row = {'name': 'gui', 'ready_ms': 105.0, 'reader': False, 'pywinauto': False}
+    assert check([row], budget) == []
+    assert len(check([dict(row, ready_ms=120.0)], budget)) == 1
+    assert len(check([dict(row, reader=True)], budget)) == 1
@@ -0,0 +1,74 @@
+"""Tests for the streaming SRT/WebVTT exporter."""
+import session_journal
+from subtitle_export import SubtitleWriter, export_journal, format_timestamp, last_cue, wrap
+
+
+def _cues(path):
+    with open(path, encoding='utf-8') as f:
+        blocks = f.read().strip().split('\n\n')
+    return [b.split('\n') for b in blocks]
+
+
+def test_format_timestamp_and_wrap():
+    assert format_timestamp(3723.4567) == '01:02:03,457'
+    assert format_timestamp(0.5, 'vtt') == '00:00:00.500'
+    assert wrap('so the plan for next week is to finish', 12) == ['so the plan', 'for next', 'week is to', 'finish']
+
+
+def test_cues_are_timed_by_capture_time(tmp_path):
+    path = str(tmp_path / 's.srt')
+    subs = SubtitleWriter(path, origin=100.0, max_duration=4.0)
+    subs.add('so the plan for next week', t=101.0)
+    subs.add('is to finish', t=101.5)          # too soon: merged
+    subs.add('the review', t=103.0)
+    subs.add('and ship it.', t=110.0)           # the previous cue is capped at 4s
+    subs.close()
+    assert _cues(path) == [
+        ['1', '00:00:01,000 --> 00:00:03,000', 'so the plan for next week is to finish'],
+        ['2', '00:00:03,000 --> 00:00:07,000', 'the review'],
+        ['3', '00:00:10,000 --> 00:00:11,000', 'and ship it.'],
+    ]
+
+
+def test_long_segment_is_split_across_cues(tmp_path):
+    path = str(tmp_path / 's.vtt')
+    subs = SubtitleWriter(path, origin=0.0, line_chars=10, max_lines=1)
+    subs.add('aaaa bbbb cccc dddd', t=0.0)
+    subs.add('next', t=4.0)
+    subs.close()
+    cues = _cues(path)
+    assert cues[0] == ['WEBVTT']
+    assert cues[1] == ['1', '00:00:00.000 --> 00:00:02.000', 'aaaa bbbb']
+    assert cues[2] == ['2', '00:00:02.000 --> 00:00:04.000', 'cccc dddd']
+
+
+def test_cues_are_appended_and_resumed(tmp_path):
+    path = str(tmp_path / 's.vtt')
+    subs = SubtitleWriter(path, origin=0.0)
+    for i in range(5):
+        subs.add(f'segment number {i}', t=i * 2.0)
+    subs._writer.flush()
+    # earlier cues are on disk while the session runs, the newest waits for its end
+    assert [c[0] for c in _cues(path)[1:]] == ['1', '2', '3', '4']
+    subs.close()
+    assert last_cue(path) == (5, 9.067)
+
+    resumed = SubtitleWriter(path, origin=0.0)
+    resumed.add('after the restart', t=9.0)    # never before the last cue's end
+    resumed.close()
+    cues = _cues(path)
+    assert [c[0] for c in cues].count('WEBVTT') == 1
+    assert cues[-1] == ['6', '00:00:09.067 --> 00:00:10.200', 'after the restart']
+
+
+def test_export_journal(tmp_path):
+    clock = iter([50.0, 50.0, 51.0, 53.0, 60.0])
+    journal = session_journal.SessionJournal.create(str(tmp_path), 's1', checkpoint_interval=None,
+                                                    clock=lambda: next(clock))
+    journal.append_text('[12:00:51] hello everyone ', t=51.0)
+    journal.append_text('lets get started ', t=53.0)
+    journal.close()
+    out = str(tmp_path / 's1.srt')
+    assert export_journal(journal.directory, out) == 2
+    assert _cues(out) == [['1', '00:00:01,000 --> 00:00:03,000', 'hello everyone'],
+                          ['2', '00:00:03,000 --> 00:00:04,067', 'lets get started']]
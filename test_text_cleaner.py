@@ -0,0 +1,125 @@
+"""Tests for batch and streaming transcript cleaning."""
+import random
+
+from text_cleaner import SentenceIndex, StreamingCleaner, clean_text
+
+SAMPLE = (
+    "[10:02:11] So the the budget review is next week. So the budget review is next week. "
+    "Ready to show live captions in English (United States)\n"
+    "We need the design doc by Friday! Can you can you send it? "
+    "we need the design doc by friday. Thanks everyone.  Thanks everyone. Bye"
+)
+
+
+def _stream(text, sizes):
+    cleaner = StreamingCleaner()
+    pos = 0
+    for n in sizes:
+        cleaner.feed(text[pos:pos + n])
+        pos += n
+    cleaner.feed(text[pos:])
+    return cleaner.finish()
+
+
+def test_clean_text_removes_noise_and_duplicates():
+    assert clean_text(SAMPLE) == (
+        "[10:02:11] So the budget review is next week. "
+        "We need the design doc by Friday! Can you can you send it? Thanks everyone. Bye"
+    )
+
+
+def test_clean_text_empty():
+    assert clean_text("") == ""
+    assert StreamingCleaner().finish() == ""
+
+
+def test_streaming_matches_batch_for_any_chunking():
+    rnd = random.Random(3)
+    pieces = ["go", "Go.", "the", "hi!", " ", "\n", "?", "it's", "x y z.",
+              "Ready to show live captions in English", "ready to SHOW live captions in "]
+    texts = [SAMPLE]
+    for _ in range(300):
+        texts.append("".join(rnd.choice(pieces) + rnd.choice(["", " ", "\r\n"])
+                             for _ in range(rnd.randint(0, 30))))
+    for text in texts:
+        expected = clean_text(text)
+        for _ in range(5):
+            sizes = [rnd.randint(1, 12) for _ in range(len(text))]
+            assert _stream(text, sizes) == expected, text
+
+
+def test_restore_continues_where_the_snapshot_was_taken():
+    rnd = random.Random(5)
+    for _ in range(50):
+        cut = rnd.randint(0, len(SAMPLE))
+        first = StreamingCleaner(index_capacity=2)
+        first.feed(SAMPLE[:cut])
+        second = StreamingCleaner(index_capacity=2)
+        second.restore(first.state(), first.kept())
+        second.feed(SAMPLE[cut:])
+        assert second.finish() == clean_text(SAMPLE, index_capacity=2), cut
+
+
+def test_streaming_holds_back_open_placeholder_line():
+    cleaner = StreamingCleaner()
+    cleaner.feed("Hello there. Ready to show live")
+    cleaner.feed(" captions in English")
+    cleaner.feed(" (UK)\nGoodbye now.")
+    assert cleaner.finish() == "Hello there. Goodbye now."
+
+
+def test_revised_sentence_caught_later_in_session():
+    text = ("The quarterly budget review moves to next Thursday afternoon. "
+            "Printers on floor two are down. Lunch is at noon. "
+            "The quarterly budget review moves to next Thursday afternoon, okay.")
+    assert clean_text(text) == ("The quarterly budget review moves to next Thursday afternoon. "
+                                "Printers on floor two are down. Lunch is at noon.")
+    # the index can be disabled, leaving only the previous-sentence check
+    assert clean_text(text, index_capacity=0).endswith("Thursday afternoon, okay.")
+
+
+def test_threshold_is_configurable():
+    text = "We ship the release on Friday. We ship the build on Friday."
+    assert clean_text(text) == text
+    assert clean_text(text, threshold=0.5) == "We ship the release on Friday."
+
+
+def test_sentence_index_evicts_oldest():
+    index = SentenceIndex(capacity=2)
+    for words in ("alpha beta gamma delta", "one two three four", "red green blue cyan"):
+        index.add(words.split())
+    assert len(index) == 2
+    assert not index.contains_similar(frozenset("alpha beta gamma delta".split()), 0.85)
+    assert index.contains_similar(frozenset("red green blue cyan".split()), 0.85)
+
+
+def test_sentence_index_finds_short_sentence_inside_long_one():
+    # MinHash estimates Jaccard similarity, which a few words of a long sentence don't
+    # have with it; the indexed runs of words make up for that
+    rnd = random.Random(5)
+    vocab = [f"w{i}" for i in range(3000)]
+    index = SentenceIndex()
+    sentences = []
+    for _ in range(1000):
+        words = [rnd.choice(vocab[:200]) if rnd.random() < 0.4 else rnd.choice(vocab)
+                 for _ in range(rnd.randint(16, 40))]
+        index.add(words)
+        sentences.append(words)
+    found = total = 0
+    for _ in range(1000):
+        words = rnd.choice(sentences)
+        n = rnd.randint(4, 12)
+        start = rnd.randrange(len(words) - n)
+        part = frozenset(words[start:start + n])
+        if len(part) >= 4:
+            total += 1
+            found += index.contains_similar(part, 0.85)
+    assert found >= 0.99 * total
+
+
+def test_shortened_repeat_caught_later_in_session():
+    text = ("So the plan for next week is to finish the review and ship it on Friday. "
+            "Printers on floor two are down. Lunch is at noon. "
+            "Finish the review and ship it.")
+    assert clean_text(text) == ("So the plan for next week is to finish the review and ship it "
+                                "on Friday. Printers on floor two are down. Lunch is at noon.")
@@ -0,0 +1,64 @@
+"""Tests for the transcript search index."""
+import os
+
+from transcript_index import TranscriptIndex, fts_query, passages, session_start
+
+
+def _write(path, text):
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+def test_search_returns_session_timestamp_and_snippet(tmp_path):
+    _write(tmp_path / '20240105_093000.txt',
+           "Welcome everyone. [09:45:10] The budget sign off is due Friday. Thanks.")
+    _write(tmp_path / '20240106_100000.txt', "Nothing about money here.")
+    with TranscriptIndex(str(tmp_path)) as index:
+        assert index.sync() == (2, 0, 0)
+        [hit] = index.search('budget sign')
+    assert hit.session == '20240105_093000'
+    assert hit.timestamp == '2024-01-05 09:30:00'
+    assert '[budget]' in hit.snippet and '[sign]' in hit.snippet
+
+
+def test_sync_only_reindexes_changed_files(tmp_path):
+    a = _write(tmp_path / '20240105_093000.txt', "alpha words here.")
+    _write(tmp_path / '20240106_093000.txt', "beta words here.")
+    os.makedirs(tmp_path / '.journal')
+    _write(tmp_path / '.journal' / 'skip.txt', "alpha hidden.")
+    with TranscriptIndex(str(tmp_path)) as index:
+        index.sync()
+        assert index.sync() == (0, 0, 2)
+        _write(tmp_path / '20240105_093000.txt', "gamma replaced the text.")
+        os.remove(tmp_path / '20240106_093000.txt')
+        assert index.sync() == (1, 1, 0)
+        assert index.search('alpha') == []
+        assert [h.path for h in index.search('gamma')] == [os.path.abspath(a)]
+        assert index.search('beta') == []
+
+
+
+def test_readonly_search_does_not_wait_on_a_writer(tmp_path):
+    _write(tmp_path / '20240105_093000.txt', "alpha words here.")
+    with TranscriptIndex(str(tmp_path)) as index:
+        index.sync()
+        # a sync in progress on another connection, holding the write lock
+        index._db.execute('BEGIN IMMEDIATE')
+        index._db.execute('DELETE FROM files')
+        reader = TranscriptIndex(str(tmp_path), readonly=True)
+        reader._db.execute('PRAGMA busy_timeout = 0')
+        try:
+            assert [h.session for h in reader.search('alpha')] == ['20240105_093000']
+        finally:
+            reader.close()
+        index._db.rollback()
+
+
+def test_passages_follow_clock_markers():
+    start = session_start('20240105_233000.txt')
+    long = "word " * 70  # one passage per sentence
+    out = passages(f"{long}. [23:59:58] {long}. [00:00:05] {long}.", start)
+    assert [when.strftime('%d %H:%M:%S') for _, when in out] == \
+        ['05 23:30:00', '05 23:59:58', '06 00:00:05']
+    assert fts_query('sign-off "now"') == '"sign" "off" "now"*'
+    assert fts_query('  ') is None
@@ -0,0 +1,52 @@
+"""Tests for the background autosave writer."""
+import time
+
+import pytest
+
+from transcript_writer import TranscriptWriter
+
+
+def test_writes_are_grouped_and_committed_on_close(tmp_path):
+    path = tmp_path / "session.txt"
+    writer = TranscriptWriter(str(path), max_bytes=10_000, max_delay=60)
+    for i in range(100):
+        writer.write(f"word{i} ")
+    assert path.read_text(encoding="utf-8") == ""  # still queued
+    writer.close()
+    assert writer.closed
+    assert path.read_text(encoding="utf-8") == "".join(f"word{i} " for i in range(100))
+    assert writer.commits == 1
+
+
+def test_size_threshold_triggers_commit(tmp_path):
+    path = tmp_path / "session.txt"
+    writer = TranscriptWriter(str(path), max_bytes=16, max_delay=60)
+    writer.write("0123456789")
+    time.sleep(0.05)
+    assert writer.commits == 0  # under the threshold, and max_delay is far off
+    writer.write("abcdefghij")
+    deadline = time.monotonic() + 2
+    while writer.commits == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # committed by reaching max_bytes, without a flush
+    assert writer.commits == 1
+    assert path.read_text(encoding="utf-8") == "0123456789abcdefghij"
+    writer.close()
+
+
+def test_delay_threshold_and_flush(tmp_path):
+    path = tmp_path / "session.txt"
+    writer = TranscriptWriter(str(path), max_delay=0.05, sync='fsync')
+    writer.write("hello ")
+    assert writer.flush(timeout=2)
+    assert path.read_text(encoding="utf-8") == "hello "
+    writer.write("again")
+    writer.close()
+    writer.close()  # idempotent
+    writer.write("ignored after close")
+    assert path.read_text(encoding="utf-8") == "hello again"
+
+
+def test_rejects_unknown_sync_policy(tmp_path):
+    with pytest.raises(ValueError):
+        TranscriptWriter(str(tmp_path / "x.txt"), sync='sometimes')
@@ -0,0 +1,336 @@
+"""
+Transcript cleaning: drops Live Captions placeholder messages, collapses repeated words
+and removes duplicate or near-duplicate sentences.
+
+A sentence is a near-duplicate when more than `threshold` of its words already appear in
+the previous kept sentence or, via a bounded MinHash/LSH index, in any earlier kept
+sentence of the session (Live Captions often re-emits a revised sentence a few sentences
+later).
+
+`clean_text` cleans a whole transcript in one go. `StreamingCleaner` produces exactly the
+same result incrementally: text is fed in as it is captured, complete sentences are
+filtered as soon as their boundary is seen, and `finish()` only has to flush the last
+partial sentence. Both work on the tokens of the tokenizer shared with the live stage
+(caption_tokens.py), which carry each word's normalized form and sentence-end flag.
+
+Usage:
+    cleaner = StreamingCleaner()
+    for chunk in captured_chunks:
+        cleaner.feed(chunk)
+    text = cleaner.finish()   # == clean_text(''.join(captured_chunks))
+"""
+from collections import deque
+import random
+import re
+import zlib
+
+import caption_tokens
+
+# Live Captions shows this when there is no audio; it runs to the end of its line.
+NOISE_PREFIX = "Ready to show live captions in "
+_NOISE_RE = re.compile(re.escape(NOISE_PREFIX) + r"[^\r\n]*", re.IGNORECASE)
+
+# fraction of a sentence's words found in an earlier one for it to count as a repeat
+NEAR_DUP_THRESHOLD = 0.85
+# bump when a change to the cleaning rules changes their output; batch re-cleaning
+# (batch_clean.py) redoes every file cleaned by an older version
+CLEANER_VERSION = 2
+# kept sentences remembered for session-wide near-duplicate checks (0 disables)
+DEFAULT_INDEX_CAPACITY = 50000
+# sentences shorter than this are only compared against the previous kept sentence
+INDEX_MIN_WORDS = 4
+# smallest run of words indexed on its own from a longer sentence (see SentenceIndex)
+INDEX_WINDOW = 8
+
+_MERSENNE = (1 << 61) - 1
+_WORD_HASH_CACHE = 100000
+
+
+class SentenceIndex:
+    """Bounded MinHash/LSH index over the word sets of kept sentences.
+
+    Each sentence gets a `num_perm` MinHash signature split into `bands` bands; two
+    sentences become candidates when any band matches, so a query only looks at a few
+    buckets instead of every earlier sentence. Candidates are then verified exactly,
+    so the index never reports a false match. The oldest sentences are dropped once
+    `capacity` is exceeded.
+
+    A match is a containment test (most of the query's words in one earlier sentence)
+    but MinHash estimates Jaccard similarity, which is low for a short sentence inside
+    a long one. So runs of `window`, 2 * `window`, 4 * `window` ... consecutive words of
+    a longer sentence, overlapping by half, are indexed as well: a short revised
+    sentence lies inside some run not much longer than itself. Together with 2-row
+    bands, a sentence whose words all come from one earlier sentence is found over 99%
+    of the time (test_text_cleaner.py measures it). The runs make each sentence about
+    three times as costly to index, so on transcripts of a thousand or so sentences an
+    exact scan is faster; the index pays off from a few thousand on (bench_clean.py).
+    """
+
+    def __init__(self, capacity=DEFAULT_INDEX_CAPACITY, num_perm=64, bands=32, seed=1,
+                 window=INDEX_WINDOW):
+        self.capacity = max(0, int(capacity))
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.window = max(1, int(window))
+        rnd = random.Random(seed)
+        self._perms = [(rnd.randrange(1, _MERSENNE), rnd.randrange(_MERSENNE))
+                       for _ in range(self.bands * self.rows)]
+        self._buckets = [{} for _ in range(bands)]  # band key -> set of entry IDs
+        self._entries = {}                          # entry ID -> (words, {(band, key)})
+        self._order = deque()
+        self._next_id = 0
+        self._word_hashes = {}                      # word -> its value under every permutation
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _hashes(self, word):
+        hv = self._word_hashes.get(word)
+        if hv is None:
+            if len(self._word_hashes) >= _WORD_HASH_CACHE:
+                self._word_hashes = {}
+            # crc32 rather than hash() so signatures are stable across processes
+            h = zlib.crc32(word.encode('utf-8'))
+            hv = self._word_hashes[word] = tuple((a * h + b) % _MERSENNE for a, b in self._perms)
+        return hv
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [tuple(sig[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def _signatures(self, words):
+        """MinHash signatures of a sentence's runs of words and of the whole sentence.
+
+        Runs of `window` words overlap by half, so each is the union of two adjacent
+        half-window blocks; the runs twice as long are unions of the blocks of the
+        level below, and so on.
+        """
+        step = max(1, self.window // 2)
+        blocks = [list(map(min, zip(*[self._hashes(w) for w in words[i:i + step]])))
+                  for i in range(0, len(words), step)]
+        sigs = []
+        while len(blocks) > 2:
+            runs = [list(map(min, a, b)) for a, b in zip(blocks, blocks[1:])]
+            sigs += runs
+            blocks = runs[::2] + (blocks[-1:] if len(blocks) % 2 else [])
+        sigs.append(list(map(min, *blocks)) if len(blocks) > 1 else blocks[0])
+        return sigs
+
+    def add(self, words):
+        """Index a kept sentence, given as its words in order."""
+        if not self.capacity or not words:
+            return
+        keys = set()
+        for sig in self._signatures(words):
+            keys.update(enumerate(self._band_keys(sig)))
+        eid = self._next_id
+        self._next_id += 1
+        self._entries[eid] = (frozenset(words), keys)
+        self._order.append(eid)
+        buckets = self._buckets
+        for band, key in keys:
+            buckets[band].setdefault(key, set()).add(eid)
+        if len(self._entries) > self.capacity:
+            self._evict(self._order.popleft())
+
+    def contains_similar(self, words: frozenset, threshold: float) -> bool:
+        """True if more than `threshold` of `words` appear in some indexed sentence."""
+        if not self._entries or not words:
+            return False
+        need = threshold * len(words)
+        checked = set()
+        for bucket, key in zip(self._buckets, self._band_keys(list(map(min, zip(*[self._hashes(w) for w in words]))))):
+            for eid in bucket.get(key, ()):
+                if eid in checked:
+                    continue
+                checked.add(eid)
+                if len(words & self._entries[eid][0]) > need:
+                    return True
+        return False
+
+    def _evict(self, eid):
+        _words, keys = self._entries.pop(eid)
+        for band, key in keys:
+            bucket = self._buckets[band]
+            ids = bucket.get(key)
+            if ids is not None:
+                ids.discard(eid)
+                if not ids:
+                    del bucket[key]
+
+
+class _SentenceFilter:
+    """Per-session sentence de-duplication state shared by both cleaners."""
+
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD, index_capacity=DEFAULT_INDEX_CAPACITY):
+        self.threshold = threshold
+        self.seen = set()
+        self.prev_words = None
+        self.index = SentenceIndex(index_capacity)
+
+    def accept(self, tokens) -> bool:
+        """Return True if the sentence `tokens` should be kept, recording it if so."""
+        words = [t.word for t in tokens]
+        k = ' '.join(words).strip()
+        if not k or len(k) < 3:
+            return False
+        if k in self.seen:
+            return False
+
+        words = [w for w in words if w]
+        B = frozenset(words)
+        # near-duplicate check vs previous kept sentence
+        if self.prev_words is not None and B:
+            overlap = len(self.prev_words & B) / len(B)
+            if overlap > self.threshold:
+                # too similar to previous, skip
+                return False
+
+        # ...and vs any earlier kept sentence
+        if len(B) >= INDEX_MIN_WORDS and self.index.contains_similar(B, self.threshold):
+            return False
+
+        self.remember(k, words)
+        return True
+
+    def remember(self, key, words, index=True):
+        """Record a kept sentence (its normalized `key` and non-empty `words`)."""
+        self.seen.add(key)
+        self.prev_words = frozenset(words)
+        if index:
+            self.index.add(words)
+
+
+def clean_text(raw_text: str, threshold: float = NEAR_DUP_THRESHOLD,
+               index_capacity: int = DEFAULT_INDEX_CAPACITY) -> str:
+    """Remove repeated words and near-duplicate sentences from text.
+
+    - Collapses repeated words (e.g., "in in", "the the")
+    - Deduplicates sentences by normalized form
+    - Skips near-duplicates: sentences with more than `threshold` of their words in
+      the previous kept sentence or in any of the last `index_capacity` kept ones
+    """
+    if not raw_text:
+        return ""
+
+    # Remove known Live Captions default/placeholder messages that appear when
+    # there's no audio.
+    raw_text = _NOISE_RE.sub("", raw_text)
+
+    # one pass: words with repeats collapsed, each flagged if it ends a sentence
+    sentences = _SentenceFilter(threshold, index_capacity)
+    cleaned = []
+    sent = []
+    for tok in caption_tokens.tokenize(raw_text, min_repeat=2):
+        sent.append(tok)
+        if tok.ends:
+            if sentences.accept(sent):
+                cleaned.append(' '.join([t.raw for t in sent]))
+            sent = []
+    if sent and sentences.accept(sent):
+        cleaned.append(' '.join([t.raw for t in sent]))
+
+    return " ".join(cleaned)
+
+
+class StreamingCleaner:
+    """Incremental equivalent of `clean_text`.
+
+    Feeding a transcript in any number of chunks and calling `finish()` returns the
+    same string `clean_text` returns for the concatenated text. Work per `feed` is
+    proportional to the chunk, not to the transcript so far.
+    """
+
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD, index_capacity=DEFAULT_INDEX_CAPACITY,
+                 tokenizer=None):
+        self._raw = ''       # input that might still be part of a placeholder message
+        self._word = ''      # a word that may continue in the next chunk
+        self._pending = []   # tokens of the current unfinished sentence
+        self._tokenizer = tokenizer or caption_tokens.shared()
+        self._sentences = _SentenceFilter(threshold, index_capacity)
+        self._kept = []
+
+    def feed(self, text: str):
+        """Consume the next piece of captured text."""
+        if text:
+            self._raw += text
+            self._add(self._drop_noise(final=False))
+
+    def finish(self) -> str:
+        """Flush the trailing partial sentence and return the cleaned transcript."""
+        self._add(self._drop_noise(final=True))
+        if self._word:
+            self._pending.append(self._tokenizer.token(self._word))
+            self._word = ''
+        self._sentence(self._pending)
+        self._pending = []
+        return " ".join(self._kept)
+
+    def kept(self, start=0) -> list:
+        """Sentences kept so far, from the `start`-th on."""
+        return self._kept[start:]
+
+    def state(self) -> dict:
+        """JSON-serializable snapshot of the input not yet cleaned (see `restore`)."""
+        return {'raw': self._raw, 'word': self._word,
+                'pending': [t.raw for t in self._pending]}
+
+    def restore(self, state: dict, kept=()):
+        """Continue from a `state()` snapshot taken after the sentences `kept` were kept.
+
+        The sentence filter is rebuilt from `kept`: every sentence counts as seen, and
+        the newest `index_capacity` go back into the near-duplicate index, which is what
+        it held when the snapshot was taken.
+        """
+        token = self._tokenizer.token
+        self._kept = list(kept)
+        sentences = self._sentences
+        first_indexed = len(self._kept) - sentences.index.capacity
+        for i, sentence in enumerate(self._kept):
+            words = [token(w).word for w in sentence.split()]
+            sentences.remember(' '.join(words).strip(), [w for w in words if w],
+                               index=i >= first_indexed)
+        self._raw = state.get('raw') or ''
+        self._word = state.get('word') or ''
+        self._pending = [token(w) for w in state.get('pending') or ()]
+
+    def _drop_noise(self, final: bool) -> str:
+        # A placeholder message runs to the end of its line, so text from a possible
+        # match start is held back until the line is terminated.
+        buf = self._raw
+        out = []
+        pos = 0
+        hold = None
+        for m in _NOISE_RE.finditer(buf):
+            if not final and m.end() == len(buf):
+                hold = m.start()
+                break
+            out.append(buf[pos:m.start()])
+            pos = m.end()
+        if hold is None:
+            hold = len(buf) if final else max(pos, len(buf) - (len(NOISE_PREFIX) - 1))
+        out.append(buf[pos:hold])
+        self._raw = buf[hold:]
+        return ''.join(out)
+
+    def _add(self, text: str):
+        if not text:
+            return
+        # Only words followed by whitespace are complete; sentence boundaries can't
+        # occur inside a repeated-word run, so each sentence is collapsed on its own.
+        text = self._word + text
+        words = text.split()
+        self._word = words.pop() if words and not text[-1].isspace() else ''
+        token = self._tokenizer.token
+        pending = self._pending
+        for w in words:
+            tok = token(w)
+            pending.append(tok)
+            if tok.ends:
+                self._sentence(pending)
+                pending = self._pending = []
+
+    def _sentence(self, tokens):
+        tokens = self._tokenizer.collapse(tokens, min_repeat=2)
+        if tokens and self._sentences.accept(tokens):
+            self._kept.append(' '.join([t.raw for t in tokens]))
@@ -0,0 +1,239 @@
+"""
+Full-text search over the transcript folder, backed by SQLite FTS5.
+
+Each transcript `.txt` is split into passages of a few sentences, indexed together with
+the session name and the time the passage was said (the session start, advanced by any
+`[HH:MM:SS]` markers in the text). The index lives in `<transcript dir>/.index.sqlite3`
+and remembers each file's mtime and size, so `sync()` only re-reads files that changed
+and drops files that were deleted. The app calls `index_files()` for each transcript
+it saves.
+
+Opening the index may wait on another connection that is writing to it, so the app
+opens and syncs it on a background thread; the search window then queries through a
+`readonly=True` connection, which neither writes nor waits.
+
+Usage:
+    index = TranscriptIndex(transcript_dir)
+    index.sync()
+    for hit in index.search('budget sign off'):
+        print(hit.session, hit.timestamp, hit.snippet)
+"""
+from datetime import datetime, timedelta
+import os
+import re
+import sqlite3
+from threading import Thread
+
+INDEX_NAME = '.index.sqlite3'
+# passages are cut at the first sentence end after this many characters
+PASSAGE_CHARS = 300
+
+_SENTENCE_END_RE = re.compile(r"(?<=[\.!?])\s+")
+_SESSION_RE = re.compile(r"(\d{8}_\d{6})")
+_CLOCK_RE = re.compile(r"\[(\d{2}):(\d{2}):(\d{2})\]")
+_STARTED_RE = re.compile(r"\[Recording started (\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\]")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    session TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    first_row INTEGER,
+    last_row INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    text, file_id UNINDEXED, timestamp UNINDEXED, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+class Hit:
+    def __init__(self, session, path, timestamp, snippet, rank):
+        self.session = session
+        self.path = path
+        self.timestamp = timestamp  # 'YYYY-MM-DD HH:MM:SS'
+        self.snippet = snippet
+        self.rank = rank            # bm25, lower is better
+
+    def __repr__(self):
+        return f"Hit({self.session!r}, {self.timestamp!r}, {self.snippet!r})"
+
+
+def session_start(path, text=''):
+    """When a transcript's session started: from its name, its start marker or its mtime."""
+    m = _SESSION_RE.search(os.path.basename(path))
+    if m:
+        try:
+            return datetime.strptime(m.group(1), '%Y%m%d_%H%M%S')
+        except ValueError:
+            pass
+    m = _STARTED_RE.search(text[:200])
+    if m:
+        return datetime.strptime(m.group(1), '%Y-%m-%d %H:%M:%S')
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def passages(text, start):
+    """Split `text` into (passage, datetime) pairs of about PASSAGE_CHARS characters."""
+    current = start
+    out = []
+    buf = []
+    size = 0
+    when = None
+    for sent in _SENTENCE_END_RE.split(text):
+        sent = sent.strip()
+        if not sent:
+            continue
+        for m in _CLOCK_RE.finditer(sent):
+            h, mi, s = map(int, m.groups())
+            t = current.replace(hour=h, minute=mi, second=s)
+            if t < current - timedelta(hours=12):
+                t += timedelta(days=1)  # past midnight
+            current = t
+        if when is None:
+            when = current
+        buf.append(sent)
+        size += len(sent) + 1
+        if size >= PASSAGE_CHARS:
+            out.append((' '.join(buf), when))
+            buf, size, when = [], 0, None
+    if buf:
+        out.append((' '.join(buf), when))
+    return out
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query matching all of its words (prefix on the last)."""
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    quoted = ['"%s"' % w.replace('"', '""') for w in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+class TranscriptIndex:
+    def __init__(self, transcript_dir, db_path=None, readonly=False):
+        self.transcript_dir = transcript_dir
+        self.db_path = db_path or os.path.join(transcript_dir, INDEX_NAME)
+        self._db = sqlite3.connect(self.db_path, timeout=10)
+        if readonly:
+            # searching an index that is already set up: in WAL mode a reader never
+            # waits on a writer
+            self._db.execute('PRAGMA query_only = ON')
+            return
+        try:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.executescript(_SCHEMA)
+        except sqlite3.OperationalError as e:
+            self._db.close()
+            raise RuntimeError(f'SQLite FTS5 is not available: {e}') from e
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def transcript_files(self):
+        """Every .txt under the transcript folder, skipping hidden folders."""
+        for root, dirs, files in os.walk(self.transcript_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in files:
+                if name.endswith('.txt'):
+                    yield os.path.join(root, name)
+
+    def sync(self):
+        """Bring the index up to date; returns (indexed, removed, unchanged) file counts."""
+        known = {path: (mtime, size) for path, mtime, size
+                 in self._db.execute('SELECT path, mtime, size FROM files')}
+        indexed = unchanged = 0
+        for path in self.transcript_files():
+            path = os.path.abspath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if known.pop(path, None) == (st.st_mtime, st.st_size):
+                unchanged += 1
+                continue
+            self._index(path, st)
+            indexed += 1
+        for path in known:
+            self._remove(path)
+        self._db.commit()
+        return indexed, len(known), unchanged
+
+    def index_files(self, paths):
+        """(Re)index specific transcripts, e.g. a session that was just saved."""
+        for path in paths:
+            path = os.path.abspath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._remove(path)
+                continue
+            self._index(path, st)
+        self._db.commit()
+
+    def search(self, query, limit=20):
+        """Best matching passages for the words in `query`, as Hit objects."""
+        q = fts_query(query)
+        if q is None:
+            return []
+        rows = self._db.execute(
+            "SELECT f.session, f.path, p.timestamp,"
+            " snippet(passages, 0, '[', ']', '...', 16), p.rank"
+            " FROM passages p JOIN files f ON f.id = p.file_id"
+            " WHERE passages MATCH ? ORDER BY p.rank LIMIT ?", (q, limit))
+        return [Hit(*row) for row in rows]
+
+    def _index(self, path, st):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                text = f.read()
+        except OSError:
+            return
+        self._remove(path)
+        session = os.path.splitext(os.path.basename(path))[0]
+        cur = self._db.execute(
+            'INSERT INTO files (path, session, mtime, size) VALUES (?, ?, ?, ?)',
+            (path, session, st.st_mtime, st.st_size))
+        file_id = cur.lastrowid
+        first = last = None
+        for passage, when in passages(text, session_start(path, text)):
+            cur = self._db.execute('INSERT INTO passages (text, file_id, timestamp) VALUES (?, ?, ?)',
+                                   (passage, file_id, when.strftime('%Y-%m-%d %H:%M:%S')))
+            last = cur.lastrowid
+            if first is None:
+                first = last
+        self._db.execute('UPDATE files SET first_row = ?, last_row = ? WHERE id = ?',
+                         (first, last, file_id))
+
+    def _remove(self, path):
+        row = self._db.execute('SELECT id, first_row, last_row FROM files WHERE path = ?',
+                               (path,)).fetchone()
+        if row is None:
+            return
+        file_id, first, last = row
+        if first is not None:
+            # a file's passages are inserted together, so they form one rowid range
+            self._db.execute('DELETE FROM passages WHERE rowid BETWEEN ? AND ?', (first, last))
+        self._db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+
+def index_in_background(transcript_dir, paths):
+    """Index freshly saved transcripts on a daemon thread; errors are ignored."""
+    def run():
+        try:
+            with TranscriptIndex(transcript_dir) as index:
+                index.index_files(paths)
+        except Exception:
+            pass
+
+    Thread(target=run, name='transcript-index', daemon=True).start()
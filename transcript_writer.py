@@ -0,0 +1,187 @@
+"""
+Background, group-committing writer for the session autosave file.
+
+`write()` only queues text, so it is cheap to call from the Tk thread. A writer thread
+keeps one handle open and commits queued text in groups: as soon as `max_bytes` are
+pending, or `max_delay` seconds after the oldest pending write. `sync` sets what a commit
+does with the data:
+
+    'none'   write into the file object's buffer (the OS sees it on close)
+    'flush'  also flush to the OS (survives an app crash; the default)
+    'fsync'  also fsync (survives a power loss; slow on network drives)
+
+`close()` commits everything still queued and closes the file; writers still open at
+interpreter exit are closed by an atexit hook. With `binary=True` the writer takes bytes.
+Given a `stats` object (stage_stats.StageStats), each commit is timed as
+'autosave_write' and its size counted in 'bytes_written'.
+
+`write_atomic()` replaces a file in one step (temp file + fsync + rename), so a crash
+while saving never leaves a half-written transcript.
+
+Usage:
+    writer = TranscriptWriter(path)
+    writer.write("[Recording started ...]\\n")
+    writer.write("some caption text ")
+    writer.close()
+"""
+import atexit
+import os
+from threading import Condition, Thread
+import time
+import weakref
+
+SYNC_POLICIES = ('none', 'flush', 'fsync')
+
+_open_writers = weakref.WeakSet()
+
+
+class TranscriptWriter:
+    def __init__(self, path, max_bytes=8192, max_delay=0.5, sync='flush', encoding='utf-8',
+                 binary=False, stats=None):
+        if sync not in SYNC_POLICIES:
+            raise ValueError(f'sync must be one of {SYNC_POLICIES}, not {sync!r}')
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.sync = sync
+        self.binary = binary
+        self.stats = stats
+        self._cond = Condition()
+        self._pending = []
+        self._pending_bytes = 0
+        self._first_pending = None   # monotonic time of the oldest queued write
+        self._queued = 0             # writes queued so far
+        self._committed = 0          # writes committed so far
+        self._closing = False
+        # counters, for diagnostics
+        self.commits = 0
+        self.bytes_written = 0
+        self.error = None  # last write error, if any
+        if binary:
+            self._file = open(path, 'ab')
+        else:
+            self._file = open(path, 'a', encoding=encoding)
+        self._thread = Thread(target=self._run, name='transcript-writer', daemon=True)
+        self._thread.start()
+        _open_writers.add(self)
+
+    @property
+    def closed(self):
+        return self._file is None
+
+    def write(self, text):
+        """Queue `text` (bytes for a binary writer) for appending. Never blocks on disk I/O."""
+        if not text:
+            return
+        with self._cond:
+            if self._closing:
+                return
+            self._pending.append(text)
+            self._pending_bytes += len(text)
+            self._queued += 1
+            if self._first_pending is None:
+                self._first_pending = time.monotonic()
+            if self._pending_bytes >= self.max_bytes:
+                self._cond.notify_all()
+
+    def flush(self, timeout=None) -> bool:
+        """Commit everything queued so far now; returns False on timeout."""
+        with self._cond:
+            target = self._queued
+            self._first_pending = float('-inf') if self._pending else self._first_pending
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._committed >= target or self._file is None,
+                                       timeout)
+
+    def close(self, timeout=5.0, wait=True):
+        """Commit what is queued, sync it and close the file. Safe to call twice.
+
+        With `wait=False` the final commit happens in the background.
+        """
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._cond.notify_all()
+        if wait:
+            self._thread.join(timeout)
+
+    def _due(self):
+        if self._closing:
+            return True
+        if not self._pending:
+            return False
+        return (self._pending_bytes >= self.max_bytes
+                or time.monotonic() - self._first_pending >= self.max_delay)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    if self._pending:
+                        wait = self.max_delay - (time.monotonic() - self._first_pending)
+                        self._cond.wait(max(0.0, wait))
+                    else:
+                        self._cond.wait()
+                batch = (b'' if self.binary else '').join(self._pending)
+                count = len(self._pending)
+                self._pending = []
+                self._pending_bytes = 0
+                self._first_pending = None
+                closing = self._closing
+
+            if batch:
+                self._commit(batch)
+            with self._cond:
+                self._committed += count
+                if closing:
+                    self._close_file()
+                self._cond.notify_all()
+            if closing:
+                _open_writers.discard(self)
+                return
+
+    def _commit(self, batch):
+        try:
+            t0 = time.perf_counter()
+            self._file.write(batch)
+            if self.sync != 'none':
+                self._file.flush()
+            if self.sync == 'fsync':
+                os.fsync(self._file.fileno())
+            self.commits += 1
+            self.bytes_written += len(batch)
+            if self.stats is not None:
+                self.stats.record('autosave_write', time.perf_counter() - t0)
+                self.stats.count('bytes_written', len(batch))
+        except Exception as e:
+            self.error = e
+
+    def _close_file(self):
+        try:
+            self._file.flush()
+            if self.sync == 'fsync':
+                os.fsync(self._file.fileno())
+            self._file.close()
+        except Exception as e:
+            self.error = e
+        self._file = None
+
+
+def write_atomic(path, text, encoding='utf-8'):
+    """Replace `path` with `text` atomically: write a temp file, fsync, then rename."""
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding=encoding) as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+@atexit.register
+def _close_open_writers():
+    for writer in list(_open_writers):
+        try:
+            writer.close()
+        except Exception:
+            pass